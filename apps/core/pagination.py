@@ -0,0 +1,72 @@
+"""
+Paginação por keyset (seek): em vez de OFFSET, cada página começa depois da última
+linha da anterior, identificada por um cursor opaco com os valores das colunas de ordenação.
+
+O custo de uma página não cresce com a posição dela, desde que exista um índice
+com as mesmas colunas da ordenação.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursorError(ValueError):
+    """Cursor malformado ou adulterado."""
+
+
+def encode_cursor(values):
+    """Serializa os valores de ordenação da última linha em um cursor opaco (seguro para URLs)."""
+    # str() e não DjangoJSONEncoder: este trunca datetimes em milissegundos e o cursor precisa do valor exato
+    raw = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, size):
+    """Lê um cursor gerado por encode_cursor com size valores. Levanta InvalidCursorError se for inválido."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(str(e)) from e
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Cursor com número de campos inválido")
+    return values
+
+
+def keyset_filter(ordering, values):
+    """Filtro das linhas que vêm depois de values na ordenação (comparação lexicográfica)."""
+    condition = Q()
+    for i in range(len(ordering) - 1, -1, -1):
+        field = ordering[i].lstrip("-")
+        lookup = "lt" if ordering[i].startswith("-") else "gt"
+        step = Q(**{f"{field}__{lookup}": values[i]})
+        if i < len(ordering) - 1:
+            step |= Q(**{field: values[i]}) & condition
+        condition = step
+    return condition
+
+
+def _value(item, field):
+    return item[field] if isinstance(item, dict) else getattr(item, field)
+
+
+def keyset_page(queryset, ordering, page_size, cursor=None):
+    """
+    Uma página de queryset ordenada por ordering (ex.: ["created_at", "id"]; a última
+    coluna deve ser única).
+
+    Returns:
+        Tuple (itens, próximo cursor ou None se esta for a última página)
+    """
+    if cursor:
+        try:
+            queryset = queryset.filter(keyset_filter(ordering, decode_cursor(cursor, len(ordering))))
+        except (ValidationError, ValueError, TypeError) as e:
+            raise InvalidCursorError(str(e)) from e
+    items = list(queryset.order_by(*ordering)[: page_size + 1])
+    if len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, encode_cursor(_value(items[-1], field.lstrip("-")) for field in ordering)
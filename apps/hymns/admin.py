@@ -1,6 +1,16 @@
 from django.contrib import admin
 
-from .models import Comment, Favorite, Hymn, HymnAudio, HymnBook, HymnBookVersion
+from .models import (
+    Comment,
+    Favorite,
+    Hymn,
+    HymnAudio,
+    HymnBook,
+    HymnBookBundle,
+    HymnBookVersion,
+    ImportedFile,
+    StagedUpload,
+)
 
 
 class HymnInline(admin.TabularInline):
@@ -26,11 +36,11 @@ class HymnBookVersionInline(admin.TabularInline):
 class HymnBookAdmin(admin.ModelAdmin):
     """Admin para Hinários."""
 
-    list_display = ["name", "intro_name", "owner_name", "owner_user", "hymn_count", "created_at"]
+    list_display = ["name", "intro_name", "owner_name", "owner_user", "hymns_total", "created_at"]
     list_filter = ["created_at", "owner_name"]
     search_fields = ["name", "intro_name", "owner_name", "description"]
     prepopulated_fields = {"slug": ("name",)}
-    readonly_fields = ["id", "created_at", "updated_at", "hymn_count"]
+    readonly_fields = ["id", "created_at", "updated_at", "hymns_total"]
     inlines = [HymnBookVersionInline, HymnInline]
 
     fieldsets = [
@@ -49,7 +59,7 @@ class HymnBookAdmin(admin.ModelAdmin):
         (
             "Metadados",
             {
-                "fields": ["id", "hymn_count", "created_at", "updated_at"],
+                "fields": ["id", "hymns_total", "created_at", "updated_at"],
                 "classes": ["collapse"],
             },
         ),
@@ -215,3 +225,37 @@ class CommentAdmin(admin.ModelAdmin):
         return obj.text[:100] + "..." if len(obj.text) > 100 else obj.text
 
     text_preview.short_description = "Comentário"
+
+
+@admin.register(StagedUpload)
+class StagedUploadAdmin(admin.ModelAdmin):
+    """Admin para Uploads em andamento."""
+
+    list_display = ["name", "user", "filename", "hymns_count", "status", "progress", "created_at", "expires_at"]
+    list_filter = ["status", "created_at"]
+    search_fields = ["name", "filename", "user__username"]
+    readonly_fields = ["id", "duplicates", "error", "created_at", "updated_at"]
+    exclude = ["payload"]
+    list_select_related = ["user"]
+
+
+@admin.register(ImportedFile)
+class ImportedFileAdmin(admin.ModelAdmin):
+    """Admin para Arquivos importados."""
+
+    list_display = ["path", "hymn_book", "hymns_count", "content_hash", "imported_at"]
+    list_filter = ["imported_at"]
+    search_fields = ["path", "content_hash", "hymn_book__name"]
+    readonly_fields = ["id", "content_hash", "imported_at"]
+    list_select_related = ["hymn_book"]
+
+
+@admin.register(HymnBookBundle)
+class HymnBookBundleAdmin(admin.ModelAdmin):
+    """Admin para Pacotes offline (gerados automaticamente; somente leitura)."""
+
+    list_display = ["hymn_book", "version", "size", "created_at"]
+    list_filter = ["created_at"]
+    search_fields = ["hymn_book__name", "version"]
+    readonly_fields = ["id", "hymn_book", "version", "file", "size", "hymn_hashes", "created_at"]
+    list_select_related = ["hymn_book"]
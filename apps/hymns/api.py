@@ -0,0 +1,270 @@
+"""
+API JSON somente leitura (v1) de hinários, hinos, áudios e busca.
+
+- Campos: ?fields=a,b escolhe os campos retornados (padrão: DEFAULT_FIELDS do recurso).
+- Paginação por keyset: ?limit= e ?cursor= (o cursor de "next" já vem pronto na resposta).
+- Serialização a partir de .values(), sem instanciar models.
+- Respostas passam pelo cache de páginas (page_cache.conditional_page): ETag/Last-Modified,
+  304 sem consultar o banco e corpo em cache para anônimos.
+- Compressão gzip, ou brotli se o pacote brotli estiver instalado e o cliente aceitar.
+"""
+
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.text import compress_string
+
+from apps.core.pagination import InvalidCursorError, keyset_page
+from apps.search.typesense_client import search_hymns
+
+from . import page_cache, sync
+from .models import Hymn, HymnAudio, HymnBook
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dependência opcional
+    brotli = None
+
+# Respostas menores que isso não compensam a compressão
+MIN_COMPRESS_SIZE = 200
+
+HYMN_BOOK_FIELDS = ["id", "slug", "name", "owner_name", "intro_name", "description", "hymns_total", "created_at"]
+HYMN_BOOK_DEFAULT_FIELDS = ["id", "slug", "name", "owner_name", "hymns_total"]
+
+HYMN_FIELDS = [
+    "id",
+    "number",
+    "title",
+    "text",
+    "received_at",
+    "offered_to",
+    "style",
+    "extra_instructions",
+    "repetitions",
+    "favorites_count",
+    "comments_count",
+    "updated_at",
+]
+HYMN_LIST_DEFAULT_FIELDS = ["id", "number", "title", "style"]
+
+AUDIO_FIELDS = ["id", "title", "source", "recorded_at", "credits", "duration", "format", "audio_file", "allow_download"]
+
+
+class ApiError(Exception):
+    """Erro de parâmetro da requisição (vira uma resposta 400)."""
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder, json_dumps_params={"ensure_ascii": False})
+
+
+def compress_response(request, response):
+    """Comprime o corpo com brotli ou gzip conforme Accept-Encoding (ETags viram fracas, como no GZipMiddleware)."""
+    if response.streaming or response.status_code != 200 or response.has_header("Content-Encoding"):
+        return response
+    if len(response.content) < MIN_COMPRESS_SIZE:
+        return response
+
+    patch_vary_headers(response, ["Accept-Encoding"])
+    accept = request.headers.get("Accept-Encoding", "")
+    if brotli is not None and "br" in accept:
+        content, encoding = brotli.compress(response.content), "br"
+    elif "gzip" in accept:
+        content, encoding = compress_string(response.content), "gzip"
+    else:
+        return response
+
+    response.content = content
+    response["Content-Length"] = str(len(content))
+    response["Content-Encoding"] = encoding
+    etag = response.get("ETag")
+    if etag and not etag.startswith("W/"):
+        response["ETag"] = "W/" + etag
+    return response
+
+
+def api_view(view):
+    """Decorator das views da API: erros de parâmetro viram 400 e a resposta é comprimida."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            response = view(request, *args, **kwargs)
+        except ApiError as e:
+            response = json_response({"error": str(e)}, status=400)
+        return compress_response(request, response)
+
+    return wrapper
+
+
+def selected_fields(request, allowed, default):
+    """Campos pedidos em ?fields=, validados contra allowed."""
+    value = request.GET.get("fields")
+    if not value:
+        return list(default)
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ApiError(f"Campos desconhecidos: {', '.join(unknown)}. Disponíveis: {', '.join(allowed)}")
+    return fields
+
+
+def page_limit(request):
+    """?limit= entre 1 e API_MAX_PAGE_SIZE (padrão API_PAGE_SIZE)."""
+    try:
+        limit = int(request.GET.get("limit", settings.API_PAGE_SIZE))
+    except ValueError:
+        raise ApiError("Parâmetro 'limit' inválido") from None
+    return max(1, min(limit, settings.API_MAX_PAGE_SIZE))
+
+
+def paginated(request, queryset, ordering, fields):
+    """Página keyset de queryset como {"results": [...], "next": url ou None}, com só os campos pedidos."""
+    columns = list(dict.fromkeys(fields + [field.lstrip("-") for field in ordering]))
+    try:
+        rows, cursor = keyset_page(queryset.values(*columns), ordering, page_limit(request), request.GET.get("cursor"))
+    except InvalidCursorError:
+        raise ApiError("Cursor inválido") from None
+
+    next_url = None
+    if cursor:
+        params = request.GET.copy()
+        params["cursor"] = cursor
+        next_url = f"{request.path}?{params.urlencode()}"
+    return {"results": [{field: row[field] for field in fields} for row in rows], "next": next_url}
+
+
+def _audio_row(row):
+    if "audio_file" in row:
+        row["audio_file"] = default_storage.url(row["audio_file"]) if row["audio_file"] else None
+    return row
+
+
+@api_view
+def hymn_book_list(request):
+    """GET /api/v1/hinarios/ — hinários em ordem alfabética."""
+    fields = selected_fields(request, HYMN_BOOK_FIELDS, HYMN_BOOK_DEFAULT_FIELDS)
+    return page_cache.conditional_page(
+        request,
+        page_cache.SITE,
+        "",
+        lambda: json_response(paginated(request, HymnBook.objects.all(), ["name", "id"], fields)),
+    )
+
+
+@api_view
+def hymn_book_detail(request, slug):
+    """GET /api/v1/hinarios/<slug>/ — um hinário."""
+    fields = selected_fields(request, HYMN_BOOK_FIELDS, HYMN_BOOK_FIELDS)
+
+    def render():
+        return json_response(get_object_or_404(HymnBook.objects.values(*fields), slug=slug))
+
+    return page_cache.conditional_page(request, page_cache.HYMN_BOOK, slug, render)
+
+
+@api_view
+def hymn_book_hymns(request, slug):
+    """GET /api/v1/hinarios/<slug>/hinos/ — hinos do hinário, por número."""
+    fields = selected_fields(request, HYMN_FIELDS, HYMN_LIST_DEFAULT_FIELDS)
+
+    def render():
+        hymn_book = get_object_or_404(HymnBook.objects.only("id"), slug=slug)
+        return json_response(paginated(request, Hymn.objects.filter(hymn_book=hymn_book), ["number"], fields))
+
+    return page_cache.conditional_page(request, page_cache.HYMN_BOOK, slug, render)
+
+
+@api_view
+def hymn_detail(request, pk):
+    """GET /api/v1/hinos/<id>/ — um hino, com o slug e o nome do hinário."""
+    fields = selected_fields(request, HYMN_FIELDS, HYMN_FIELDS)
+
+    def render():
+        row = get_object_or_404(Hymn.objects.values(*fields, "hymn_book__slug", "hymn_book__name"), pk=pk)
+        data = {field: row[field] for field in fields}
+        data["hymn_book"] = {"slug": row["hymn_book__slug"], "name": row["hymn_book__name"]}
+        return json_response(data)
+
+    return page_cache.conditional_page(request, page_cache.HYMN, str(pk), render)
+
+
+@api_view
+def hymn_audios(request, pk):
+    """GET /api/v1/hinos/<id>/audios/ — áudios aprovados do hino, mais recentes primeiro."""
+    fields = selected_fields(request, AUDIO_FIELDS, AUDIO_FIELDS)
+
+    def render():
+        get_object_or_404(Hymn.objects.only("id"), pk=pk)
+        audios = HymnAudio.objects.filter(hymn_id=pk, is_approved=True)
+        data = paginated(request, audios, ["-created_at", "-id"], fields)
+        data["results"] = [_audio_row(row) for row in data["results"]]
+        return json_response(data)
+
+    return page_cache.conditional_page(request, page_cache.HYMN, str(pk), render)
+
+
+@api_view
+def search(request):
+    """
+    GET /api/v1/busca/?q= — busca de hinos (TypeSense, com fallback no banco).
+
+    Resultados seguem a relevância, que não tem chave estável para keyset: a paginação
+    aqui é por ?page=.
+    """
+    query = request.GET.get("q", "").strip()
+    if not query:
+        raise ApiError("Parâmetro 'q' é obrigatório")
+    fields = selected_fields(request, HYMN_FIELDS, HYMN_LIST_DEFAULT_FIELDS)
+    limit = page_limit(request)
+    try:
+        page = max(1, int(request.GET.get("page", 1)))
+    except ValueError:
+        raise ApiError("Parâmetro 'page' inválido") from None
+
+    columns = list(dict.fromkeys(["id"] + fields + ["hymn_book__slug", "hymn_book__name"]))
+    try:
+        ts_results = search_hymns(query, per_page=limit, page=page)
+        total = ts_results.get("found", 0)
+        hymn_ids = [hit["document"]["id"] for hit in ts_results.get("hits", [])]
+        rows_by_id = {str(row["id"]): row for row in Hymn.objects.filter(id__in=hymn_ids).values(*columns)}
+        rows = [rows_by_id[hymn_id] for hymn_id in hymn_ids if hymn_id in rows_by_id]
+    except Exception:
+        # Fallback para o banco se o TypeSense falhar
+        hymns = Hymn.objects.filter(
+            Q(title__icontains=query) | Q(text__icontains=query) | Q(hymn_book__name__icontains=query)
+        ).order_by("hymn_book__name", "number")
+        total = hymns.count()
+        rows = list(hymns.values(*columns)[(page - 1) * limit : page * limit])
+
+    results = []
+    for row in rows:
+        data = {field: row[field] for field in fields}
+        data["hymn_book"] = {"slug": row["hymn_book__slug"], "name": row["hymn_book__name"]}
+        results.append(data)
+    return json_response({"query": query, "total": total, "page": page, "results": results})
+
+
+@api_view
+def sync_feed(request):
+    """
+    GET /api/v1/sync/?since=<cursor> — hinários e hinos criados, alterados ou removidos
+    desde o cursor (ver sync.py). Sem ?since=, começa do início do catálogo.
+
+    Responde 410 se o cursor for antigo demais: o cliente deve baixar o catálogo de novo.
+    """
+    try:
+        data = sync.changes_since(request.GET.get("since"), limit=page_limit(request))
+    except InvalidCursorError:
+        raise ApiError("Cursor inválido") from None
+    except sync.ResyncRequiredError:
+        return json_response({"error": "Cursor expirado; sincronize o catálogo completo novamente"}, status=410)
+    response = json_response(data)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -0,0 +1,137 @@
+"""
+Pacotes offline de hinários (HymnBookBundle).
+
+Cada pacote é o hinário inteiro em JSON canônico, comprimido com gzip uma única vez
+e identificado pelo hash do conteúdo: a mesma versão nunca muda, então pode ser
+servida com cache imutável. Pacotes são gerados pela task build_hymn_book_bundle
+quando o hinário muda (ver signals.py), nunca durante uma requisição.
+"""
+
+import gzip
+import hashlib
+import json
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .ingestion import HYMN_TEXT_FIELDS
+from .models import Hymn, HymnBook, HymnBookBundle
+
+
+def _canonical_json(data) -> bytes:
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode(
+        "utf-8"
+    )
+
+
+def _hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def hymn_to_bundle(hymn: Hymn) -> Dict:
+    """Um hino no formato do pacote (campos vazios omitidos)."""
+    data = {"id": str(hymn.id), "number": hymn.number, "title": hymn.title, "text": hymn.text}
+    if hymn.received_at:
+        data["received_at"] = hymn.received_at
+    for field in HYMN_TEXT_FIELDS:
+        value = getattr(hymn, field)
+        if value:
+            data[field] = value
+    return data
+
+
+def bundle_payload(hymn_book: HymnBook) -> Dict:
+    """Conteúdo completo do pacote de um hinário."""
+    hymns = Hymn.objects.filter(hymn_book=hymn_book).order_by("number").iterator(chunk_size=500)
+    return {
+        "hymn_book": {
+            "slug": hymn_book.slug,
+            "name": hymn_book.name,
+            "owner": hymn_book.owner_name,
+            "intro_name": hymn_book.intro_name,
+            "description": hymn_book.description,
+        },
+        "hymns": [hymn_to_bundle(hymn) for hymn in hymns],
+    }
+
+
+def build_bundle(hymn_book: HymnBook) -> HymnBookBundle:
+    """
+    Gera o pacote do hinário, se o conteúdo mudou desde o último, e remove versões
+    além de HYMNBOOK_BUNDLE_HISTORY. Retorna o pacote da versão atual.
+    """
+    payload = bundle_payload(hymn_book)
+    body = _canonical_json(payload)
+    version = _hash(body)
+
+    bundle = HymnBookBundle.objects.filter(hymn_book=hymn_book, version=version).first()
+    if bundle is not None:
+        if latest_bundle(hymn_book) != bundle:
+            # Conteúdo voltou a uma versão anterior: ela passa a ser a atual
+            bundle.created_at = timezone.now()
+            HymnBookBundle.objects.filter(pk=bundle.pk).update(created_at=bundle.created_at)
+        return bundle
+
+    compressed = gzip.compress(body, compresslevel=9, mtime=0)
+    bundle = HymnBookBundle(
+        hymn_book=hymn_book,
+        version=version,
+        size=len(compressed),
+        hymn_hashes={hymn["id"]: _hash(_canonical_json(hymn)) for hymn in payload["hymns"]},
+    )
+    bundle.file.save(f"{hymn_book.slug}-{version[:16]}.json.gz", ContentFile(compressed), save=False)
+    try:
+        with transaction.atomic():
+            bundle.save()
+    except IntegrityError:
+        # Outra task gerou a mesma versão em paralelo
+        bundle.file.delete(save=False)
+        return HymnBookBundle.objects.get(hymn_book=hymn_book, version=version)
+
+    prune_bundles(hymn_book)
+    return bundle
+
+
+def prune_bundles(hymn_book: HymnBook) -> int:
+    """Remove pacotes antigos (e seus arquivos) além dos HYMNBOOK_BUNDLE_HISTORY mais recentes."""
+    old = list(hymn_book.bundles.order_by("-created_at")[settings.HYMNBOOK_BUNDLE_HISTORY :])
+    for bundle in old:
+        bundle.file.delete(save=False)
+        bundle.delete()
+    return len(old)
+
+
+def latest_bundle(hymn_book: HymnBook) -> Optional[HymnBookBundle]:
+    """Pacote mais recente do hinário, ou None se ainda não foi gerado."""
+    return hymn_book.bundles.order_by("-created_at").first()
+
+
+def read_bundle(bundle: HymnBookBundle) -> Dict:
+    """Conteúdo descomprimido de um pacote."""
+    with bundle.file.open("rb") as f:
+        return json.loads(gzip.decompress(f.read()))
+
+
+def bundle_delta(since: HymnBookBundle, current: HymnBookBundle) -> Dict:
+    """
+    Diferença entre duas versões do pacote: hinos novos ou alterados (completos) e ids removidos.
+
+    O hinário (nome, dono, descrição) é sempre incluído, por ser pequeno.
+    """
+    changed_ids = {
+        hymn_id for hymn_id, digest in current.hymn_hashes.items() if since.hymn_hashes.get(hymn_id) != digest
+    }
+    removed: List[str] = sorted(set(since.hymn_hashes) - set(current.hymn_hashes))
+
+    payload = read_bundle(current)
+    return {
+        "version": current.version,
+        "since": since.version,
+        "hymn_book": payload["hymn_book"],
+        "hymns": [hymn for hymn in payload["hymns"] if hymn["id"] in changed_ids],
+        "removed": removed,
+    }
@@ -4,7 +4,7 @@ Detecta possíveis duplicatas usando fuzzy matching e comparação de hinos.
 """
 
 from difflib import SequenceMatcher
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Tuple
 
 from apps.search.typesense_client import search_hymns
 
@@ -142,6 +142,7 @@ def find_duplicates_with_content(
     hymns: List[Dict],
     name_threshold: float = 0.7,
     content_threshold: float = 0.8,
+    progress_callback: Callable[[int, int], None] | None = None,
 ) -> Dict:
     """
     Busca duplicatas combinando similaridade de nome e conteúdo.
@@ -151,6 +152,7 @@ def find_duplicates_with_content(
         hymns: Lista de hinos do hinário proposto
         name_threshold: Threshold de similaridade de nome (0.0 a 1.0)
         content_threshold: Threshold de similaridade de conteúdo (0.0 a 1.0)
+        progress_callback: Chamado como (etapas_concluidas, total_etapas) a cada etapa
 
     Returns:
         Dict com:
@@ -167,17 +169,26 @@ def find_duplicates_with_content(
         "low_confidence": [],  # Levemente similar
     }
 
+    def report(done, total):
+        if progress_callback:
+            progress_callback(done, total)
+
     # 1. Busca match exato
     exact = find_exact_match(name)
     if exact:
         result["exact_match"] = exact
+        report(1, 1)
         return result
 
     # 2. Busca hinários similares por nome
     similar_by_name = find_similar_hymnbooks(name, threshold=name_threshold, limit=10)
 
+    # Etapas: match exato + busca por nome + uma comparação por hinário similar
+    total_steps = 2 + len(similar_by_name)
+    report(2, total_steps)
+
     # 3. Para cada hinário similar, compara conteúdo se houver dados de hinos
-    for hymnbook, name_score in similar_by_name:
+    for step, (hymnbook, name_score) in enumerate(similar_by_name, start=3):
         content_score = 0.0
 
         if hymns:
@@ -206,9 +217,32 @@ def find_duplicates_with_content(
             # Baixa confiança: apenas nome similar ou conteúdo levemente similar
             result["low_confidence"].append((hymnbook, name_score, content_score))
 
+        report(step, total_steps)
+
     return result
 
 
+def serialize_duplicates(duplicates: Dict) -> Dict:
+    """
+    Converte o resultado de find_duplicates_with_content para um formato JSON.
+
+    Args:
+        duplicates: Dict retornado por find_duplicates_with_content
+
+    Returns:
+        Dict com IDs de hinários (str) no lugar das instâncias de HymnBook
+    """
+    exact_match = duplicates["exact_match"]
+
+    return {
+        "exact_match": str(exact_match.id) if exact_match else None,
+        **{
+            level: [(str(hb.id), name_score, content_score) for hb, name_score, content_score in duplicates[level]]
+            for level in ("high_confidence", "medium_confidence", "low_confidence")
+        },
+    }
+
+
 def suggest_similar_via_typesense(query: str, limit: int = 5) -> List[Dict]:
     """
     Busca hinários similares usando TypeSense (typo-tolerance).
@@ -238,7 +272,7 @@ def suggest_similar_via_typesense(query: str, limit: int = 5) -> List[Dict]:
         return [
             {
                 "hymnbook": hb,
-                "hymn_count": hb.hymn_count,
+                "hymn_count": hb.hymns_total,
             }
             for hb in hymnbooks
         ]
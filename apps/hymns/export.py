@@ -0,0 +1,103 @@
+"""
+Exportação do catálogo de hinários em YAML (formato aceito pelo import_yaml) ou JSONL.
+
+Hinários e hinos são lidos com cursores no servidor (.iterator(chunk_size=...)) e
+serializados um hinário por vez, de modo que a memória usada não depende do tamanho
+do catálogo. Usado pelo comando export_hymnbooks e pela view de exportação.
+"""
+
+import json
+import zlib
+from typing import Dict, Iterable, Iterator
+
+import yaml
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .ingestion import HYMN_TEXT_FIELDS
+from .models import Hymn, HymnBook
+
+EXPORT_FORMATS = ["yaml", "jsonl"]
+
+EXPORT_CHUNK_SIZE = 500
+
+# Dumper em C (libyaml) quando disponível
+_BaseDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+class ExportDumper(_BaseDumper):
+    """Dumper que escreve textos com várias linhas em bloco literal (|), como nos arquivos originais."""
+
+
+def _represent_str(dumper, value):
+    style = "|" if "\n" in value else None
+    return dumper.represent_scalar("tag:yaml.org,2002:str", value, style=style)
+
+
+ExportDumper.add_representer(str, _represent_str)
+
+
+def hymn_to_dict(hymn: Hymn) -> Dict:
+    """Converte um hino para o formato de hino do import_yaml, omitindo campos vazios."""
+    data = {"number": hymn.number, "title": hymn.title, "text": hymn.text}
+    if hymn.received_at:
+        data["received_at"] = hymn.received_at
+    for field in HYMN_TEXT_FIELDS:
+        value = getattr(hymn, field)
+        if value:
+            data[field] = value
+    return data
+
+
+def hymn_book_to_dict(hymn_book: HymnBook, chunk_size: int = EXPORT_CHUNK_SIZE) -> Dict:
+    """Converte um hinário e seus hinos para o formato do import_yaml ({"hymn_book": {...}})."""
+    data = {"name": hymn_book.name, "owner": hymn_book.owner_name}
+    if hymn_book.intro_name:
+        data["intro_name"] = hymn_book.intro_name
+    if hymn_book.description:
+        data["description"] = hymn_book.description
+
+    hymns = Hymn.objects.filter(hymn_book=hymn_book).order_by("number").iterator(chunk_size=chunk_size)
+    data["hymns"] = [hymn_to_dict(hymn) for hymn in hymns]
+    return {"hymn_book": data}
+
+
+def iter_hymn_books(chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Dict]:
+    """Itera o catálogo inteiro, um hinário (com seus hinos) por vez."""
+    for hymn_book in HymnBook.objects.order_by("name").iterator(chunk_size=chunk_size):
+        yield hymn_book_to_dict(hymn_book, chunk_size=chunk_size)
+
+
+def dump_yaml(data: Dict) -> str:
+    """Serializa um hinário como documento YAML."""
+    return yaml.dump(data, Dumper=ExportDumper, allow_unicode=True, sort_keys=False)
+
+
+def dump_jsonl(data: Dict) -> str:
+    """Serializa um hinário como uma linha JSON."""
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def iter_export(export_format: str = "yaml", chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Gera o catálogo serializado, um hinário por chunk.
+
+    No formato YAML cada hinário é um documento separado por "---"; no JSONL, uma linha.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    for index, data in enumerate(iter_hymn_books(chunk_size=chunk_size)):
+        if export_format == "jsonl":
+            yield dump_jsonl(data)
+        else:
+            yield ("---\n" if index else "") + dump_yaml(data)
+
+
+def gzip_stream(chunks: Iterable[str], level: int = 6) -> Iterator[bytes]:
+    """Comprime um iterável de strings em um stream gzip, sem acumular o conteúdo em memória."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: cabeçalho gzip
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode("utf-8"))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
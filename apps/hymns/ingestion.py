@@ -0,0 +1,390 @@
+"""
+Leitura e validação de hinários em YAML.
+
+Compartilhado entre o upload web e o comando import_yaml: o arquivo é lido direto
+do stream (com o parser em C da libyaml quando disponível) e validado em uma única
+passada, produzindo uma estrutura normalizada em memória.
+"""
+
+import hashlib
+import posixpath
+import tarfile
+import zipfile
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import yaml
+from django.utils import timezone
+
+from .models import Hymn, HymnBook, Tombstone
+from .signals import bulk_delete, invalidate_hymn_book
+
+# Parser em C (libyaml) é bem mais rápido; cai para o parser Python se não estiver disponível
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+HYMN_TEXT_FIELDS = ["offered_to", "style", "extra_instructions", "repetitions"]
+
+# Campos comparados ao sincronizar hinos existentes com o YAML
+HYMN_SYNC_FIELDS = ["title", "text", "received_at"] + HYMN_TEXT_FIELDS
+
+BULK_CREATE_BATCH_SIZE = 500
+
+YAML_SUFFIXES = (".yaml", ".yml")
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+class IngestionError(ValueError):
+    """Erro de validação de um hinário em YAML."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+def load_yaml(stream):
+    """
+    Faz o parse de um YAML a partir de um stream (arquivo aberto, UploadedFile) ou string.
+
+    Raises:
+        yaml.YAMLError: Se o conteúdo não for um YAML válido
+    """
+    return yaml.load(stream, Loader=YamlLoader)
+
+
+def load_yaml_documents(stream):
+    """
+    Itera os documentos de um YAML com vários documentos separados por "---" (ex.: a
+    saída YAML do export_hymnbooks), lidos um por vez. Um YAML comum gera um documento.
+
+    Raises:
+        yaml.YAMLError: Se o conteúdo não for um YAML válido (ao chegar no documento inválido)
+    """
+    return yaml.load_all(stream, Loader=YamlLoader)
+
+
+def file_hash(path) -> str:
+    """Retorna o SHA-256 (hex) do conteúdo de um arquivo, lido em blocos."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def parse_yaml_file(path) -> Dict:
+    """
+    Lê e valida um arquivo de hinário (modo estrito) sem tocar no banco de dados.
+
+    Pensado para rodar em um processo worker do import_yaml --dir: erros são devolvidos
+    como texto em vez de levantados, para que uma falha não interrompa o lote.
+
+    Returns:
+        Dict com path, hymn_book (hinário normalizado ou None), warnings e error
+    """
+    return parse_yaml_stream(path, lambda: open(path, "rb"))
+
+
+def parse_yaml_stream(path, opener) -> Dict:
+    """Como parse_yaml_file, mas lendo do stream devolvido por opener() (ex.: membro de um arquivo .zip)."""
+    result = {"path": str(path), "hymn_book": None, "warnings": [], "error": None}
+    try:
+        with opener() as f:
+            data = load_yaml(f)
+        result["hymn_book"], result["warnings"] = parse_hymnbook(data)
+    except yaml.YAMLError as e:
+        result["error"] = f"Error parsing YAML file: {e}"
+    except IngestionError as e:
+        result["error"] = str(e)
+    except ValueError as e:
+        # O loader converte datas e números ao ler (ex.: received_at: 2020-13-45)
+        result["error"] = f"Invalid value in YAML file: {e}"
+    except OSError as e:
+        result["error"] = f"Error reading file: {e}"
+    return result
+
+
+def is_archive(path) -> bool:
+    """Retorna True se o caminho tem extensão de um arquivo compactado suportado (.zip, .tar.gz, ...)."""
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+class Archive:
+    """
+    Acesso de leitura aos membros de um .zip ou .tar(.gz/.bz2/.xz) como streams.
+
+    Nada é extraído para o disco: cada membro é lido sob demanda direto do arquivo
+    compactado. Use como context manager.
+
+    Em .tar.gz o stream descomprimido só anda para frente: voltar a um membro anterior
+    recomeça a descompressão do início. Por isso os membros YAML são lidos em uma única
+    passada, na ordem do pacote (read_yaml_members), e cada conteúdo serve para o hash
+    e para o parse. Capas abertas sob demanda (open) ainda custam um reposicionamento.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        if zipfile.is_zipfile(self.path):
+            self._zip = zipfile.ZipFile(self.path)
+            self._tar = None
+            self._members = {info.filename: info for info in self._zip.infolist() if not info.is_dir()}
+        else:
+            self._zip = None
+            self._tar = tarfile.open(self.path, "r:*")
+            self._members = {info.name: info for info in self._tar.getmembers() if info.isfile()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        (self._zip or self._tar).close()
+
+    def names(self) -> List[str]:
+        """Nomes dos arquivos (não diretórios) do pacote, na ordem em que estão gravados."""
+        return list(self._members)
+
+    def yaml_names(self) -> List[str]:
+        """Nomes dos membros YAML, na ordem do pacote, ignorando metadados do macOS (__MACOSX/)."""
+        return [
+            name for name in self.names() if name.lower().endswith(YAML_SUFFIXES) and not name.startswith("__MACOSX/")
+        ]
+
+    def read_yaml_members(self) -> Iterator[Tuple[str, bytes]]:
+        """(nome, conteúdo) de cada membro YAML, lidos uma única vez, na ordem do pacote."""
+        for name in self.yaml_names():
+            with self.open(name) as f:
+                yield name, f.read()
+
+    def open(self, name):
+        """Abre um membro como stream binário."""
+        if self._zip is not None:
+            return self._zip.open(self._members[name])
+        return self._tar.extractfile(self._members[name])
+
+    def resolve(self, base_name, relative_path) -> str | None:
+        """Resolve um caminho relativo a outro membro (ex.: cover_image_path do YAML). None se não existir."""
+        name = posixpath.normpath(posixpath.join(posixpath.dirname(base_name), relative_path))
+        return name if name in self._members else None
+
+
+def _clean_str(value) -> str:
+    """Converte valor opcional do YAML para string sem espaços nas pontas."""
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def _parse_date(value) -> date | None:
+    """Converte received_at (date do YAML ou string YYYY-MM-DD) para date. Levanta ValueError se inválido."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), "%Y-%m-%d").date()
+
+
+def parse_hymnbook(data, strict: bool = True) -> Tuple[Dict, List[str]]:
+    """
+    Valida e normaliza os dados de um hinário em uma única passada.
+
+    Args:
+        data: Conteúdo do YAML já carregado
+        strict: Exige a chave raiz "hymn_book", dono e ao menos um hino (usado pelo import_yaml).
+            Fora do modo estrito aceita os campos direto na raiz e hinário sem hinos (upload web).
+
+    Returns:
+        Tuple[Dict, List[str]]: (hinário normalizado, avisos). O hinário tem as chaves
+            name, owner, intro_name, description, cover_image_path e hymns; cada hino tem
+            number, title, text, received_at e os campos de texto opcionais.
+
+    Raises:
+        IngestionError: Se o hinário for inválido
+    """
+    if not isinstance(data, dict):
+        raise IngestionError("YAML file must contain a mapping at the root", code="invalid_root")
+
+    if "hymn_book" in data:
+        hymn_book_data = data["hymn_book"]
+    elif strict:
+        raise IngestionError("YAML file must contain 'hymn_book' key", code="missing_root")
+    else:
+        hymn_book_data = data
+
+    if not isinstance(hymn_book_data, dict):
+        raise IngestionError("hymn_book must be a mapping", code="invalid_root")
+
+    name = _clean_str(hymn_book_data.get("name"))
+    if not name:
+        raise IngestionError("hymn_book.name is required", code="missing_name")
+
+    owner = _clean_str(hymn_book_data.get("owner") or hymn_book_data.get("owner_name"))
+    # Um dono vazio explícito (owner: "") é aceito: é assim que o export grava hinários sem dono conhecido
+    if strict and not owner and hymn_book_data.get("owner", hymn_book_data.get("owner_name")) is None:
+        raise IngestionError("hymn_book.owner is required", code="missing_owner")
+
+    hymns_data = hymn_book_data.get("hymns") or []
+    if strict and not hymns_data:
+        raise IngestionError("No hymns found in YAML file", code="no_hymns")
+    if not isinstance(hymns_data, list):
+        raise IngestionError("hymn_book.hymns must be a list", code="invalid_hymns")
+
+    warnings = []
+    hymns = []
+    seen_numbers = set()
+    duplicate_numbers = set()
+
+    for position, hymn_data in enumerate(hymns_data, start=1):
+        if not isinstance(hymn_data, dict):
+            raise IngestionError(f"Hymn #{position} must be a mapping", code="invalid_hymns")
+        number = hymn_data.get("number")
+        title = _clean_str(hymn_data.get("title"))
+        text = _clean_str(hymn_data.get("text"))
+
+        if not number:
+            raise IngestionError(f"Hymn number is required for hymn: {title}", code="missing_number")
+        if not isinstance(number, int) or number < 0:
+            raise IngestionError(f"Invalid hymn number: {number}", code="invalid_number")
+        if not title:
+            raise IngestionError(f"Hymn title is required for hymn number: {number}", code="missing_title")
+        if not text:
+            raise IngestionError(f"Hymn text is required for hymn: {title}", code="missing_text")
+
+        if number in seen_numbers:
+            duplicate_numbers.add(number)
+        seen_numbers.add(number)
+
+        received_at = None
+        if hymn_data.get("received_at"):
+            try:
+                received_at = _parse_date(hymn_data["received_at"])
+            except ValueError:
+                warnings.append(f"Invalid date format for hymn {number}: {hymn_data['received_at']}")
+
+        hymn = {
+            "number": number,
+            "title": title,
+            "text": text,
+            "received_at": received_at,
+        }
+        for field in HYMN_TEXT_FIELDS:
+            hymn[field] = _clean_str(hymn_data.get(field))
+        hymns.append(hymn)
+
+    if duplicate_numbers:
+        raise IngestionError(
+            f"Duplicate hymn numbers found in YAML: {', '.join(map(str, sorted(duplicate_numbers)))}",
+            code="duplicate_numbers",
+        )
+
+    hymn_book = {
+        "name": name,
+        "owner": owner,
+        "intro_name": _clean_str(hymn_book_data.get("intro_name")),
+        "description": _clean_str(hymn_book_data.get("description")),
+        "cover_image_path": _clean_str(hymn_book_data.get("cover_image_path")),
+        "hymns": hymns,
+    }
+
+    return hymn_book, warnings
+
+
+def build_hymns(hymn_book: HymnBook, hymns: Iterable[Dict]) -> List[Hymn]:
+    """Cria instâncias (não salvas) de Hymn a partir de hinos normalizados."""
+    return [
+        Hymn(
+            hymn_book=hymn_book,
+            number=hymn["number"],
+            title=hymn["title"],
+            text=hymn["text"],
+            received_at=hymn.get("received_at"),
+            **{field: hymn.get(field, "") for field in HYMN_TEXT_FIELDS},
+        )
+        for hymn in hymns
+    ]
+
+
+def bulk_create_hymns(hymn_book: HymnBook, hymns: Iterable[Dict]) -> List[Hymn]:
+    """
+    Insere hinos normalizados em lote (um INSERT por BULK_CREATE_BATCH_SIZE hinos).
+
+    bulk_create não passa por Hymn.save nem dispara signals, então o contador hymns_total
+    e o cache de páginas são atualizados aqui. Chamar dentro de uma transação.
+    """
+    created = Hymn.objects.bulk_create(build_hymns(hymn_book, hymns), batch_size=BULK_CREATE_BATCH_SIZE)
+    if created:
+        HymnBook.adjust_hymns_total(hymn_book.pk, len(created))
+        hymn_book.hymns_total += len(created)
+        invalidate_hymn_book(hymn_book)
+    return created
+
+
+def delete_hymns(hymn_book: HymnBook, hymn_ids: List) -> None:
+    """
+    Remove hinos do hinário em um único DELETE (favoritos, comentários e áudios vão em cascata).
+
+    Os receivers por hino ficam suspensos (signals.bulk_delete): o contador hymns_total,
+    o cache de páginas e as remoções (Tombstone) são atualizados aqui uma vez para o lote.
+    Chamar dentro de uma transação.
+    """
+    with bulk_delete():
+        Hymn.objects.filter(id__in=hymn_ids).delete()
+    Tombstone.objects.bulk_create(
+        [Tombstone(object_type=Tombstone.TYPE_HYMN, object_id=pk) for pk in hymn_ids],
+        batch_size=BULK_CREATE_BATCH_SIZE,
+    )
+    HymnBook.adjust_hymns_total(hymn_book.pk, -len(hymn_ids))
+    hymn_book.hymns_total -= len(hymn_ids)
+    invalidate_hymn_book(hymn_book, hymn_ids)
+
+
+def sync_hymns(hymn_book: HymnBook, hymns: Iterable[Dict]) -> Dict[str, List]:
+    """
+    Sincroniza os hinos de um hinário existente com hinos normalizados, comparando por número.
+
+    Apenas a diferença é gravada: hinos novos via bulk_create, alterados via bulk_update
+    (só os campos que mudaram) e removidos via um único DELETE. Hinos inalterados mantêm
+    seus IDs e tudo que está ligado a eles (favoritos, comentários, áudios).
+
+    Returns:
+        Dict com "created" e "updated" (listas de Hymn) e "deleted" (lista de IDs)
+    """
+    existing = {hymn.number: hymn for hymn in hymn_book.hymns.all()}
+    now = timezone.now()
+
+    to_create = []
+    updated = []
+    # Agrupa por conjunto de campos alterados para que cada UPDATE toque só o necessário
+    updates_by_fields = defaultdict(list)
+
+    for hymn_data in hymns:
+        hymn = existing.pop(hymn_data["number"], None)
+
+        if hymn is None:
+            to_create.append(hymn_data)
+            continue
+
+        changed_fields = []
+        for field in HYMN_SYNC_FIELDS:
+            value = hymn_data.get(field, None if field == "received_at" else "")
+            if getattr(hymn, field) != value:
+                setattr(hymn, field, value)
+                changed_fields.append(field)
+
+        if changed_fields:
+            hymn.updated_at = now
+            updates_by_fields[tuple(changed_fields) + ("updated_at",)].append(hymn)
+            updated.append(hymn)
+
+    for fields, hymns_to_update in updates_by_fields.items():
+        Hymn.objects.bulk_update(hymns_to_update, fields, batch_size=BULK_CREATE_BATCH_SIZE)
+    if updated:
+        invalidate_hymn_book(hymn_book, [hymn.id for hymn in updated])
+
+    deleted = [hymn.id for hymn in existing.values()]
+    if deleted:
+        delete_hymns(hymn_book, deleted)
+
+    created = bulk_create_hymns(hymn_book, to_create) if to_create else []
+
+    return {"created": created, "updated": updated, "deleted": deleted}
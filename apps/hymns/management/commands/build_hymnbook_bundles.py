@@ -0,0 +1,36 @@
+"""
+Management command to build the offline bundles of hymn books.
+
+Bundles are normally built in the background whenever a hymn book changes; this
+command backfills them (e.g. after deploying the feature or restoring a backup).
+
+Usage:
+    python manage.py build_hymnbook_bundles
+    python manage.py build_hymnbook_bundles --slug o-cruzeiro
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.hymns.bundles import build_bundle, latest_bundle
+from apps.hymns.models import HymnBook
+
+
+class Command(BaseCommand):
+    help = "Build the offline bundle of every hymn book whose content changed since its last bundle"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--slug", type=str, help="Only build the bundle of this hymn book")
+
+    def handle(self, *args, **options):
+        hymn_books = HymnBook.objects.order_by("name")
+        if options["slug"]:
+            hymn_books = hymn_books.filter(slug=options["slug"])
+
+        built = new = 0
+        for hymn_book in hymn_books.iterator():
+            previous = latest_bundle(hymn_book)
+            if build_bundle(hymn_book) != previous:
+                new += 1
+            built += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Checked {built} hymn books, built {new} new bundles"))
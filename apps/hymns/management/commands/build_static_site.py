@@ -0,0 +1,38 @@
+"""
+Management command to pre-render the public catalogue pages as static HTML.
+
+Only pages whose source rows changed since the last build are rendered again
+(see apps/hymns/static_site.py); run it from cron or after imports.
+
+Usage:
+    python manage.py build_static_site
+    python manage.py build_static_site --workers 8 --output /srv/static_site
+    python manage.py build_static_site --full  # after template changes
+"""
+
+import os
+
+from django.core.management.base import BaseCommand
+
+from apps.hymns.static_site import build_static_site
+
+
+class Command(BaseCommand):
+    help = "Render the public hymn book and hymn pages to static HTML files, incrementally"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", type=str, help="Output directory (default: STATIC_SITE_ROOT)")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of rendering processes")
+        parser.add_argument("--full", action="store_true", help="Ignore the manifest and render every page")
+
+    def handle(self, *args, **options):
+        result = build_static_site(options["output"], workers=max(1, options["workers"]), full=options["full"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"✓ Rendered {result['rendered']} pages, {result['unchanged']} unchanged, "
+                f"{result['removed']} removed"
+            )
+        )
+        if result["failed"]:
+            self.stdout.write(self.style.WARNING(f"{result['failed']} pages failed to render and will be retried"))
@@ -0,0 +1,18 @@
+"""
+Management command to remove expired staged uploads.
+
+Usage:
+    python manage.py cleanup_staged_uploads
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.hymns.tasks import cleanup_expired_staged_uploads
+
+
+class Command(BaseCommand):
+    help = "Remove expired staged hymnbook uploads"
+
+    def handle(self, *args, **options):
+        count = cleanup_expired_staged_uploads()
+        self.stdout.write(self.style.SUCCESS(f"✓ Removed {count} expired staged uploads"))
@@ -0,0 +1,74 @@
+"""
+Management command to export the hymn book catalogue.
+
+Usage:
+    python manage.py export_hymnbooks > catalogue.yaml
+    python manage.py export_hymnbooks --format jsonl --output catalogue.jsonl.gz
+    python manage.py export_hymnbooks --output-dir backup/
+"""
+
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.hymns.export import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, dump_yaml, gzip_stream, hymn_book_to_dict, iter_export
+from apps.hymns.models import HymnBook
+
+
+class Command(BaseCommand):
+    help = "Export hymn books and hymns as YAML (import_yaml format) or JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="yaml", help="Output format (default: yaml)")
+        parser.add_argument("--output", type=str, help="Output file (default: stdout). A .gz suffix enables gzip")
+        parser.add_argument("--gzip", action="store_true", help="Compress the output with gzip")
+        parser.add_argument(
+            "--output-dir",
+            type=str,
+            help="Write one YAML file per hymn book into this directory (importable with import_yaml --dir)",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=EXPORT_CHUNK_SIZE, help="Rows fetched per database round trip"
+        )
+
+    def handle(self, *args, **options):
+        output = options["output"]
+        chunk_size = options["chunk_size"]
+
+        if options["output_dir"]:
+            if output or options["format"] != "yaml":
+                raise CommandError("--output-dir writes YAML files and cannot be combined with --output or --format")
+            self._export_to_dir(options["output_dir"], chunk_size)
+            return
+
+        chunks = iter_export(options["format"], chunk_size=chunk_size)
+        compress = options["gzip"] or bool(output and output.endswith(".gz"))
+
+        if not output:
+            if compress:
+                for data in gzip_stream(chunks):
+                    sys.stdout.buffer.write(data)
+            else:
+                for chunk in chunks:
+                    self.stdout.write(chunk, ending="")
+            return
+
+        data = gzip_stream(chunks) if compress else (chunk.encode("utf-8") for chunk in chunks)
+        with open(output, "wb") as f:
+            for block in data:
+                f.write(block)
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Exported hymn books to {output}"))
+
+    def _export_to_dir(self, output_dir, chunk_size):
+        """Write each hymn book to <output_dir>/<slug>.yaml."""
+        os.makedirs(output_dir, exist_ok=True)
+
+        count = 0
+        for hymn_book in HymnBook.objects.order_by("name").iterator(chunk_size=chunk_size):
+            with open(os.path.join(output_dir, f"{hymn_book.slug}.yaml"), "w", encoding="utf-8") as f:
+                f.write(dump_yaml(hymn_book_to_dict(hymn_book, chunk_size=chunk_size)))
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✓ Exported {count} hymn books to {output_dir}"))
@@ -4,71 +4,126 @@ Management command to import hymn books from YAML files.
 Usage:
     python manage.py import_yaml <yaml_file_path>
     python manage.py import_yaml <yaml_file_path> --update
+    python manage.py import_yaml --dir <directory_or_glob> [--workers N] [--update]
+    python manage.py import_yaml <archive.zip|archive.tar.gz> [--update]
+
+A YAML file may hold several hymn books as separate documents ("---"), as written
+by export_hymnbooks; each one is imported in its own transaction.
 """
 
+import glob
+import hashlib
+import io
 import os
-from datetime import datetime
+import posixpath
+import tarfile
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
+import django
 import yaml
+from django.core.files import File
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from apps.hymns.models import Hymn, HymnBook
+from apps.hymns.ingestion import (
+    Archive,
+    IngestionError,
+    bulk_create_hymns,
+    file_hash,
+    is_archive,
+    load_yaml_documents,
+    parse_hymnbook,
+    parse_yaml_file,
+    parse_yaml_stream,
+    sync_hymns,
+)
+from apps.hymns.models import HymnBook, ImportedFile
+from apps.search.tasks import delete_hymns_task, index_hymns_task
+
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
 
 
 class Command(BaseCommand):
     help = "Import hymn books from YAML files"
 
     def add_arguments(self, parser):
-        parser.add_argument("yaml_file", type=str, help="Path to the YAML file to import")
+        parser.add_argument(
+            "yaml_file", nargs="?", type=str, help="Path to the YAML file (or .zip/.tar.gz of YAML files) to import"
+        )
+        parser.add_argument(
+            "--dir",
+            dest="source",
+            type=str,
+            help="Import every .yaml/.yml file in a directory (recursively) or matching a glob pattern",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            help=f"Processes used to parse files in --dir mode (default: {DEFAULT_WORKERS}; 1 parses in-process)",
+        )
         parser.add_argument("--update", action="store_true", help="Update existing hymn book if it already exists")
         parser.add_argument("--dry-run", action="store_true", help="Preview import without saving to database")
 
     def handle(self, *args, **options):
         yaml_file = options["yaml_file"]
+        source = options["source"]
         update = options["update"]
         dry_run = options["dry_run"]
 
+        if source:
+            if yaml_file:
+                raise CommandError("Pass either a YAML file or --dir, not both")
+            return self._import_many(source, options["workers"], update, dry_run)
+
+        if not yaml_file:
+            raise CommandError("Pass a YAML file or --dir")
+
         # Check if file exists
         if not os.path.exists(yaml_file):
             raise CommandError(f"File not found: {yaml_file}")
 
-        # Load YAML
+        if is_archive(yaml_file):
+            return self._import_archive(yaml_file, update, dry_run)
+
+        # Load YAML (streamed straight into the parser). A multi-document stream, such as
+        # the export_hymnbooks YAML output, holds one hymn book per document
+        documents = 0
         try:
-            with open(yaml_file, "r", encoding="utf-8") as f:
-                data = yaml.safe_load(f)
+            with open(yaml_file, "rb") as f:
+                for data in load_yaml_documents(f):
+                    # Empty documents (e.g. a trailing "---") are skipped
+                    if data is None:
+                        continue
+                    documents += 1
+                    self._import_document(data, yaml_file, update, dry_run)
         except yaml.YAMLError as e:
             raise CommandError(f"Error parsing YAML file: {e}") from e
+        except CommandError:
+            raise
         except Exception as e:
             raise CommandError(f"Error reading file: {e}") from e
 
-        # Validate structure
-        if "hymn_book" not in data:
-            raise CommandError("YAML file must contain 'hymn_book' key")
-
-        hymn_book_data = data["hymn_book"]
-
-        # Extract required fields
-        name = hymn_book_data.get("name", "").strip()
-        if not name:
-            raise CommandError("hymn_book.name is required")
+        if not documents:
+            raise CommandError("YAML file must contain a mapping at the root")
 
-        owner_name = hymn_book_data.get("owner", "").strip()
-        if not owner_name:
-            raise CommandError("hymn_book.owner is required")
-
-        intro_name = hymn_book_data.get("intro_name", "").strip()
-        # cover_image_path = hymn_book_data.get("cover_image_path", "")  # TODO: Implement cover image upload
-        hymns_data = hymn_book_data.get("hymns", [])
+    def _import_document(self, data, yaml_file, update, dry_run):
+        """Validate and save one hymn book document of a YAML file."""
+        # Validate structure (single pass over all hymns)
+        try:
+            hymn_book_data, warnings = parse_hymnbook(data)
+        except IngestionError as e:
+            raise CommandError(str(e)) from e
 
-        if not hymns_data:
-            raise CommandError("No hymns found in YAML file")
+        for warning in warnings:
+            self.stdout.write(self.style.WARNING(f"  {warning}"))
 
-        # Check for duplicate hymn numbers
-        hymn_numbers = [h.get("number") for h in hymns_data]
-        duplicates = [num for num in set(hymn_numbers) if hymn_numbers.count(num) > 1]
-        if duplicates:
-            raise CommandError(f"Duplicate hymn numbers found in YAML: {', '.join(map(str, sorted(duplicates)))}")
+        name = hymn_book_data["name"]
+        owner_name = hymn_book_data["owner"]
+        intro_name = hymn_book_data["intro_name"]
+        hymns_data = hymn_book_data["hymns"]
 
         self.stdout.write(self.style.SUCCESS(f"\nImporting: {name}"))
         self.stdout.write(f"Owner: {owner_name}")
@@ -80,78 +135,318 @@ class Command(BaseCommand):
             self._preview_import(name, owner_name, intro_name, hymns_data)
             return
 
-        # Import to database
         try:
-            with transaction.atomic():
-                # Check if hymn book exists
-                hymn_book = None
-                created = False
-
-                try:
-                    hymn_book = HymnBook.objects.get(name=name)
-                    if not update:
-                        raise CommandError(f"Hymn book '{name}' already exists. Use --update to update it.")
-                    self.stdout.write(self.style.WARNING(f"Updating existing hymn book: {name}"))
-                    # Delete existing hymns
-                    hymn_book.hymns.all().delete()
-                except HymnBook.DoesNotExist:
-                    hymn_book = HymnBook(name=name)
-                    created = True
-
-                # Update hymn book fields
-                hymn_book.owner_name = owner_name
-                hymn_book.intro_name = intro_name
-                # Note: cover_image handling would require file management
-                hymn_book.save()
-
-                # Create hymns
-                hymns_created = 0
-                for hymn_data in hymns_data:
-                    self._create_hymn(hymn_book, hymn_data)
-                    hymns_created += 1
-                    if hymns_created % 10 == 0:
-                        self.stdout.write(f"  Created {hymns_created}/{len(hymns_data)} hymns...")
-
-                action = "Created" if created else "Updated"
-                self.stdout.write(self.style.SUCCESS(f"\n✓ {action} hymn book '{name}' with {hymns_created} hymns"))
-
+            self._save_hymn_book(hymn_book_data, update, open_cover=self._disk_cover_opener(yaml_file))
+        except CommandError:
+            raise
         except Exception as e:
             raise CommandError(f"Error importing hymn book: {e}") from e
 
-    def _create_hymn(self, hymn_book, hymn_data):
-        """Create a hymn from YAML data."""
-        number = hymn_data.get("number")
-        title = hymn_data.get("title", "").strip()
-        text = hymn_data.get("text", "").strip()
-
-        if not number:
-            raise ValueError(f"Hymn number is required for hymn: {title}")
-        if not title:
-            raise ValueError(f"Hymn title is required for hymn number: {number}")
-        if not text:
-            raise ValueError(f"Hymn text is required for hymn: {title}")
-
-        # Parse received_at date
-        received_at = None
-        received_at_str = hymn_data.get("received_at")
-        if received_at_str:
+    def _save_hymn_book(self, hymn_book_data, update, imported_file=None, open_cover=None):
+        """
+        Create or update a hymn book from normalized data in a single transaction.
+
+        imported_file, when given, is a (path, content hash) pair recorded in the same
+        transaction so a later --dir run can skip the file. open_cover maps the YAML's
+        cover_image_path to a binary stream (or None when the image is missing).
+        """
+        name = hymn_book_data["name"]
+        owner_name = hymn_book_data["owner"]
+        intro_name = hymn_book_data["intro_name"]
+        description = hymn_book_data["description"]
+        cover_image_path = hymn_book_data["cover_image_path"]
+        hymns_data = hymn_book_data["hymns"]
+
+        with transaction.atomic():
+            # Check if hymn book exists
+            hymn_book = HymnBook.objects.filter(name=name).first()
+
+            if hymn_book is None:
+                hymn_book = HymnBook.objects.create(
+                    name=name, owner_name=owner_name, intro_name=intro_name, description=description
+                )
+                hymns = bulk_create_hymns(hymn_book, hymns_data)
+                changed_ids = [hymn.id for hymn in hymns]
+                deleted_ids = []
+                self.stdout.write(self.style.SUCCESS(f"\n✓ Created hymn book '{name}' with {len(hymns)} hymns"))
+            else:
+                if not update:
+                    raise CommandError(f"Hymn book '{name}' already exists. Use --update to update it.")
+                self.stdout.write(self.style.WARNING(f"Updating existing hymn book: {name}"))
+                changed_ids, deleted_ids = self._update_hymn_book(
+                    hymn_book, owner_name, intro_name, description, hymns_data
+                )
+
+            if cover_image_path and open_cover is not None and not hymn_book.cover_image:
+                self._attach_cover(hymn_book, cover_image_path, open_cover)
+
+            if imported_file is not None:
+                path, content_hash = imported_file
+                ImportedFile.objects.create(
+                    content_hash=content_hash, path=path, hymn_book=hymn_book, hymns_count=len(hymns_data)
+                )
+
+            # Reindex only what changed, after commit
+            if changed_ids:
+                ids = [str(pk) for pk in changed_ids]
+                transaction.on_commit(lambda: index_hymns_task.delay(ids), robust=True)
+            if deleted_ids:
+                removed = [str(pk) for pk in deleted_ids]
+                transaction.on_commit(lambda: delete_hymns_task.delay(removed), robust=True)
+
+        return hymn_book
+
+    def _find_files(self, source):
+        """List YAML files in a directory (recursively) or matching a glob pattern."""
+        if os.path.isdir(source):
+            paths = [
+                path
+                for pattern in ("**/*.yaml", "**/*.yml")
+                for path in glob.glob(os.path.join(source, pattern), recursive=True)
+            ]
+        else:
+            paths = glob.glob(source, recursive=True)
+        return sorted(path for path in paths if os.path.isfile(path))
+
+    def _import_many(self, source, workers, update, dry_run):
+        """
+        Import every YAML file from a directory or glob.
+
+        Files are parsed and validated in a pool of worker processes; only the main
+        process talks to the database, committing one hymn book per transaction, so the
+        import uses a single connection regardless of the number of workers. Files whose
+        content hash was already imported are skipped, which makes the command restartable.
+        """
+        paths = self._find_files(source)
+        if not paths:
+            raise CommandError(f"No YAML files found in: {source}")
+
+        started = time.perf_counter()
+        imported_hashes = set(ImportedFile.objects.values_list("content_hash", flat=True))
+        failures = []
+        skipped = 0
+
+        # Hash first so unchanged files are never parsed again
+        pending = {}
+        for path in paths:
             try:
-                received_at = datetime.strptime(str(received_at_str), "%Y-%m-%d").date()
-            except ValueError:
-                self.stdout.write(self.style.WARNING(f"  Invalid date format for hymn {number}: {received_at_str}"))
-
-        hymn = Hymn.objects.create(
-            hymn_book=hymn_book,
-            number=number,
-            title=title,
-            text=text,
-            received_at=received_at,
-            offered_to=hymn_data.get("offered_to", "").strip(),
-            style=hymn_data.get("style", "").strip(),
-            extra_instructions=hymn_data.get("extra_instructions", "").strip(),
-            repetitions=hymn_data.get("repetitions", "").strip(),
+                content_hash = file_hash(path)
+            except OSError as e:
+                failures.append((path, f"Error reading file: {e}"))
+                continue
+            if content_hash in imported_hashes:
+                skipped += 1
+                continue
+            # Identical copies within the same run are imported once
+            imported_hashes.add(content_hash)
+            pending[path] = content_hash
+
+        self.stdout.write(
+            f"Found {len(paths)} files: {len(pending)} to import, {skipped} already imported "
+            f"({max(workers, 1)} worker{'s' if workers > 1 else ''})"
         )
-        return hymn
+        if dry_run:
+            self.stdout.write(self.style.WARNING("DRY RUN MODE - No changes will be saved\n"))
+
+        results = self._parse_files(list(pending), workers)
+        imported, hymns_total = self._save_results(results, pending, self._disk_cover_opener, failures, update, dry_run)
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self._report(len(paths), imported, skipped, failures, hymns_total, elapsed, dry_run)
+
+        if failures:
+            raise CommandError(f"{len(failures)} file(s) failed to import")
+
+    def _import_archive(self, archive_path, update, dry_run):
+        """
+        Import every YAML member of a .zip/.tar.gz archive.
+
+        Members are read as streams straight from the archive (no extraction to disk) and
+        saved through the same bulk path as --dir, including the content-hash skip.
+        Cover images referenced by cover_image_path are looked up inside the archive,
+        relative to the YAML member.
+        """
+        try:
+            archive = Archive(archive_path)
+        except (zipfile.BadZipFile, tarfile.TarError, OSError) as e:
+            raise CommandError(f"Error reading archive: {e}") from e
+
+        with archive:
+            names = archive.yaml_names()
+            if not names:
+                raise CommandError(f"No YAML files found in: {archive_path}")
+
+            started = time.perf_counter()
+            imported_hashes = set(ImportedFile.objects.values_list("content_hash", flat=True))
+            failures = []
+            skipped = 0
+            hashes = {}
+
+            self.stdout.write(f"Found {len(names)} files in {archive_path}")
+            if dry_run:
+                self.stdout.write(self.style.WARNING("DRY RUN MODE - No changes will be saved\n"))
+
+            prefix = f"{archive_path}:"
+
+            def cover_opener(path):
+                def open_cover(cover_image_path):
+                    name = archive.resolve(path[len(prefix) :], cover_image_path)
+                    return archive.open(name) if name else None
+
+                return open_cover
+
+            def parse_members():
+                # One pass in archive order: each member is read once, then hashed and parsed from memory
+                nonlocal skipped
+                for name, content in archive.read_yaml_members():
+                    content_hash = hashlib.sha256(content).hexdigest()
+                    if content_hash in imported_hashes:
+                        skipped += 1
+                        continue
+                    imported_hashes.add(content_hash)
+                    path = f"{prefix}{name}"
+                    hashes[path] = content_hash
+                    yield parse_yaml_stream(path, lambda content=content: io.BytesIO(content))
+
+            # Generator: each member is parsed only when the previous one has been saved
+            imported, hymns_total = self._save_results(parse_members(), hashes, cover_opener, failures, update, dry_run)
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self._report(len(names), imported, skipped, failures, hymns_total, elapsed, dry_run)
+
+        if failures:
+            raise CommandError(f"{len(failures)} file(s) failed to import")
+
+    def _save_results(self, results, hashes, cover_opener, failures, update, dry_run):
+        """
+        Save parse results one hymn book per transaction. Failures are appended to failures.
+
+        Returns:
+            (imported files, imported hymns)
+        """
+        imported = 0
+        hymns_total = 0
+
+        for result in results:
+            path = result["path"]
+            if result["error"]:
+                failures.append((path, result["error"]))
+                continue
+
+            for warning in result["warnings"]:
+                self.stdout.write(self.style.WARNING(f"  {path}: {warning}"))
+
+            hymn_book_data = result["hymn_book"]
+            if not dry_run:
+                try:
+                    self._save_hymn_book(
+                        hymn_book_data,
+                        update,
+                        imported_file=(path, hashes[path]),
+                        open_cover=cover_opener(path),
+                    )
+                except Exception as e:
+                    failures.append((path, str(e)))
+                    continue
+
+            imported += 1
+            hymns_total += len(hymn_book_data["hymns"])
+
+        return imported, hymns_total
+
+    def _disk_cover_opener(self, yaml_path):
+        """Return an open_cover callable resolving cover_image_path relative to the YAML file."""
+        base_dir = os.path.dirname(os.path.abspath(yaml_path))
+
+        def open_cover(cover_image_path):
+            path = os.path.join(base_dir, cover_image_path)
+            return open(path, "rb") if os.path.isfile(path) else None
+
+        return open_cover
+
+    def _attach_cover(self, hymn_book, cover_image_path, open_cover):
+        """Stream the cover image into storage. A missing image is a warning, not an error."""
+        stream = open_cover(cover_image_path)
+        if stream is None:
+            self.stdout.write(self.style.WARNING(f"  Cover image not found: {cover_image_path}"))
+            return
+
+        with stream:
+            hymn_book.cover_image.save(posixpath.basename(cover_image_path), File(stream), save=False)
+        hymn_book.save(update_fields=["cover_image", "updated_at"])
+
+    def _parse_files(self, paths, workers):
+        """
+        Yield parse results for paths, in completion order.
+
+        At most workers * 2 files are in flight, so memory stays bounded no matter how
+        many files are pending while the main process is busy committing.
+        """
+        if workers <= 1:
+            for path in paths:
+                yield parse_yaml_file(path)
+            return
+
+        queue = iter(paths)
+        # django.setup makes the models importable under the "spawn" start method too
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+            in_flight = set()
+            for path in queue:
+                in_flight.add(executor.submit(parse_yaml_file, path))
+                if len(in_flight) >= workers * 2:
+                    break
+
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = next(queue, None)
+                    if path is not None:
+                        in_flight.add(executor.submit(parse_yaml_file, path))
+                    yield future.result()
+
+    def _report(self, total, imported, skipped, failures, hymns_total, elapsed, dry_run):
+        """Print the aggregate report of a --dir import."""
+        verb = "Validated" if dry_run else "Imported"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\n✓ {verb} {imported} of {total} files ({hymns_total} hymns) in {elapsed:.2f}s: "
+                f"{imported / elapsed:.1f} files/s, {hymns_total / elapsed:.1f} hymns/s"
+            )
+        )
+        if skipped:
+            self.stdout.write(f"  Skipped {skipped} already imported files")
+        if failures:
+            self.stdout.write(self.style.ERROR(f"  {len(failures)} failed:"))
+            for path, reason in failures:
+                self.stdout.write(self.style.ERROR(f"    {path}: {reason}"))
+
+    def _update_hymn_book(self, hymn_book, owner_name, intro_name, description, hymns_data):
+        """Apply only the differences to an existing hymn book. Returns (changed ids, deleted ids)."""
+        owner_changed = hymn_book.owner_name != owner_name
+
+        if owner_changed or hymn_book.intro_name != intro_name or hymn_book.description != description:
+            hymn_book.owner_name = owner_name
+            hymn_book.intro_name = intro_name
+            hymn_book.description = description
+            hymn_book.save(update_fields=["owner_name", "intro_name", "description", "updated_at"])
+
+        result = sync_hymns(hymn_book, hymns_data)
+
+        unchanged = len(hymns_data) - len(result["created"]) - len(result["updated"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\n✓ Updated hymn book '{hymn_book.name}': {len(result['created'])} created, "
+                f"{len(result['updated'])} updated, {len(result['deleted'])} deleted, {unchanged} unchanged"
+            )
+        )
+
+        if owner_changed:
+            # owner_name is part of every search document
+            changed_ids = list(hymn_book.hymns.values_list("id", flat=True))
+        else:
+            changed_ids = [hymn.id for hymn in result["created"] + result["updated"]]
+
+        return changed_ids, result["deleted"]
 
     def _preview_import(self, name, owner_name, intro_name, hymns_data):
         """Preview import without saving."""
@@ -162,9 +457,7 @@ class Command(BaseCommand):
         self.stdout.write("\nFirst 5 hymns:")
 
         for _i, hymn_data in enumerate(hymns_data[:5]):
-            self.stdout.write(
-                f"  {hymn_data.get('number')}. {hymn_data.get('title')} " f"({hymn_data.get('style', 'N/A')})"
-            )
+            self.stdout.write(f"  {hymn_data['number']}. {hymn_data['title']} ({hymn_data['style'] or 'N/A'})")
 
         if len(hymns_data) > 5:
             self.stdout.write(f"  ... and {len(hymns_data) - 5} more hymns")
@@ -0,0 +1,18 @@
+"""
+Management command to recompute the denormalized hymn counters of hymn books.
+
+Usage:
+    python manage.py repair_hymn_counts
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.hymns.tasks import repair_hymn_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute HymnBook.hymns_total where it drifted from the actual number of hymns"
+
+    def handle(self, *args, **options):
+        count = repair_hymn_counts()
+        self.stdout.write(self.style.SUCCESS(f"✓ Repaired hymn counts of {count} hymn books"))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:39
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hymns', '0003_comment_favorite_hymnaudio'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StagedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('filename', models.CharField(max_length=255, verbose_name='Arquivo')),
+                ('name', models.CharField(max_length=255, verbose_name='Nome do hinário')),
+                ('hymns_count', models.PositiveIntegerField(default=0, verbose_name='Total de hinos')),
+                ('hymns', models.JSONField(blank=True, default=list, help_text='Número, título e letra de cada hino', verbose_name='Hinos')),
+                ('status', models.CharField(choices=[('pending', 'Aguardando'), ('running', 'Em análise'), ('done', 'Concluído'), ('failed', 'Falhou')], default='pending', max_length=10, verbose_name='Status')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progresso (%)')),
+                ('duplicates', models.JSONField(blank=True, default=dict, help_text='Resultado da classificação', verbose_name='Duplicatas')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='staged_uploads', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Upload em andamento',
+                'verbose_name_plural': 'Uploads em andamento',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', '-created_at'], name='hymns_stage_user_id_683bd6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:41
+
+import apps.hymns.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hymns", "0004_stagedupload"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="stagedupload",
+            name="hymns",
+        ),
+        migrations.AddField(
+            model_name="stagedupload",
+            name="expires_at",
+            field=models.DateTimeField(
+                default=apps.hymns.models.default_staged_upload_expiry, verbose_name="Expira em"
+            ),
+        ),
+        migrations.AddField(
+            model_name="stagedupload",
+            name="payload",
+            field=models.BinaryField(
+                default=b"", help_text="Dados do hinário em JSON comprimido (zlib)", verbose_name="Dados"
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name="stagedupload",
+            index=models.Index(fields=["expires_at"], name="hymns_stage_expires_9b63e5_idx"),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:50
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hymns", "0005_stagedupload_payload"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportedFile",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("content_hash", models.CharField(max_length=64, unique=True, verbose_name="Hash do conteúdo")),
+                ("path", models.CharField(max_length=500, verbose_name="Caminho")),
+                ("hymns_count", models.PositiveIntegerField(default=0, verbose_name="Total de hinos")),
+                ("imported_at", models.DateTimeField(auto_now_add=True, verbose_name="Importado em")),
+                (
+                    "hymn_book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="imported_files",
+                        to="hymns.hymnbook",
+                        verbose_name="Hinário",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Arquivo importado",
+                "verbose_name_plural": "Arquivos importados",
+                "ordering": ["-imported_at"],
+            },
+        ),
+    ]
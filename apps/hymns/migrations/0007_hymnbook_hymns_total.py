@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:56
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_hymns_total(apps, schema_editor):
+    HymnBook = apps.get_model("hymns", "HymnBook")
+    Hymn = apps.get_model("hymns", "Hymn")
+    counts = Hymn.objects.filter(hymn_book=OuterRef("pk")).order_by().values("hymn_book").annotate(total=Count("pk"))
+    HymnBook.objects.update(hymns_total=Coalesce(Subquery(counts.values("total")), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hymns", "0006_importedfile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="hymnbook",
+            name="hymns_total",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Contador denormalizado, mantido ao criar/remover hinos (repair_hymn_counts corrige)",
+                verbose_name="Total de hinos",
+            ),
+        ),
+        migrations.RunPython(populate_hymns_total, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_social_counts(apps, schema_editor):
+    Hymn = apps.get_model("hymns", "Hymn")
+    Favorite = apps.get_model("hymns", "Favorite")
+    Comment = apps.get_model("hymns", "Comment")
+
+    def count(queryset):
+        counts = queryset.filter(hymn=OuterRef("pk")).order_by().values("hymn").annotate(total=Count("pk"))
+        return Coalesce(Subquery(counts.values("total")), 0)
+
+    # comments_count conta só comentários visíveis
+    Hymn.objects.update(
+        favorites_count=count(Favorite.objects.all()),
+        comments_count=count(Comment.objects.filter(is_approved=True, is_flagged=False)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hymns", "0007_hymnbook_hymns_total"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="hymn",
+            name="comments_count",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Comentários"),
+        ),
+        migrations.AddField(
+            model_name="hymn",
+            name="favorites_count",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Favoritos"),
+        ),
+        migrations.RunPython(populate_social_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hymns", "0008_hymn_social_counts"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="comment",
+            index=models.Index(
+                condition=models.Q(("is_approved", True), ("is_flagged", False)),
+                fields=["hymn", "created_at", "id"],
+                name="comment_visible_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:19
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hymns", "0009_comment_visible_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HymnBookBundle",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                (
+                    "version",
+                    models.CharField(help_text="Hash do conteúdo do pacote", max_length=64, verbose_name="Versão"),
+                ),
+                ("file", models.FileField(upload_to="hymnbooks/bundles/", verbose_name="Arquivo")),
+                (
+                    "size",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Tamanho comprimido", verbose_name="Tamanho (bytes)"
+                    ),
+                ),
+                (
+                    "hymn_hashes",
+                    models.JSONField(
+                        default=dict, help_text="id do hino → hash do conteúdo", verbose_name="Hashes dos hinos"
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Criado em")),
+                (
+                    "hymn_book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bundles",
+                        to="hymns.hymnbook",
+                        verbose_name="Hinário",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Pacote offline",
+                "verbose_name_plural": "Pacotes offline",
+                "ordering": ["-created_at"],
+                "get_latest_by": "created_at",
+                "unique_together": {("hymn_book", "version")},
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("hymns", "0010_hymnbookbundle"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                (
+                    "object_type",
+                    models.CharField(
+                        choices=[("hymn_book", "Hinário"), ("hymn", "Hino")], max_length=20, verbose_name="Tipo"
+                    ),
+                ),
+                ("object_id", models.UUIDField(verbose_name="ID do objeto")),
+                ("deleted_at", models.DateTimeField(auto_now_add=True, verbose_name="Removido em")),
+            ],
+            options={
+                "verbose_name": "Remoção",
+                "verbose_name_plural": "Remoções",
+                "ordering": ["deleted_at", "id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="hymn",
+            index=models.Index(fields=["updated_at", "id"], name="hymns_hymn_updated_c63321_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="hymnbook",
+            index=models.Index(fields=["updated_at", "id"], name="hymns_hymnb_updated_42706b_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(fields=["deleted_at", "id"], name="hymns_tombs_deleted_7a737d_idx"),
+        ),
+    ]
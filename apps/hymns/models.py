@@ -1,6 +1,14 @@
+import json
 import uuid
-
-from django.db import models
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.functional import cached_property
 from django.utils.text import slugify
 
 
@@ -27,6 +35,12 @@ class HymnBook(models.Model):
     )
     cover_image = models.ImageField("Imagem de capa", upload_to="hymn_covers/", blank=True, null=True)
     description = models.TextField("Descrição", blank=True)
+    hymns_total = models.PositiveIntegerField(
+        "Total de hinos",
+        default=0,
+        editable=False,
+        help_text="Contador denormalizado, mantido ao criar/remover hinos (repair_hymn_counts corrige)",
+    )
 
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     updated_at = models.DateTimeField("Atualizado em", auto_now=True)
@@ -39,6 +53,8 @@ class HymnBook(models.Model):
             models.Index(fields=["name"]),
             models.Index(fields=["owner_name"]),
             models.Index(fields=["created_at"]),
+            # Feed de sincronização (sync.py)
+            models.Index(fields=["updated_at", "id"]),
         ]
 
     def __str__(self):
@@ -51,8 +67,13 @@ class HymnBook(models.Model):
 
     @property
     def hymn_count(self):
-        """Retorna o número de hinos neste hinário."""
-        return self.hymns.count()
+        """Retorna o número de hinos neste hinário (contador denormalizado, sem consulta)."""
+        return self.hymns_total
+
+    @staticmethod
+    def adjust_hymns_total(hymn_book_id, delta):
+        """Soma delta ao contador de hinos com um UPDATE atômico (F()), sem ler o hinário."""
+        HymnBook.objects.filter(pk=hymn_book_id).update(hymns_total=F("hymns_total") + delta)
 
 
 class Hymn(models.Model):
@@ -75,6 +96,10 @@ class Hymn(models.Model):
         "Repetições", max_length=100, blank=True, help_text="Ex: 1-4, 5-8 (indicação de estrofes a repetir)"
     )
 
+    # Contadores denormalizados (views sociais mantêm com F(); reconcile_social_counts corrige)
+    favorites_count = models.PositiveIntegerField("Favoritos", default=0, editable=False)
+    comments_count = models.PositiveIntegerField("Comentários", default=0, editable=False)
+
     created_at = models.DateTimeField("Criado em", auto_now_add=True)
     updated_at = models.DateTimeField("Atualizado em", auto_now=True)
 
@@ -87,11 +112,37 @@ class Hymn(models.Model):
             models.Index(fields=["hymn_book", "number"]),
             models.Index(fields=["title"]),
             models.Index(fields=["received_at"]),
+            # Feed de sincronização (sync.py)
+            models.Index(fields=["updated_at", "id"]),
         ]
 
     def __str__(self):
         return f"{self.hymn_book.name} - {self.number}. {self.title}"
 
+    def save(self, *args, **kwargs):
+        """
+        Grava em uma transação e ajusta junto o contador hymns_total: +1 no hinário ao criar
+        e, se o hino mudou de hinário, -1 no antigo e +1 no novo. O hinário anterior só é
+        consultado quando o hino já existe e hymn_book pode ter sido alterado.
+        """
+        adding = self._state.adding
+        update_fields = kwargs.get("update_fields")
+        check_move = not adding and (update_fields is None or {"hymn_book", "hymn_book_id"} & set(update_fields))
+
+        with transaction.atomic():
+            previous = None
+            if check_move:
+                previous = Hymn.objects.filter(pk=self.pk).values_list("hymn_book_id", flat=True).first()
+            super().save(*args, **kwargs)
+
+            if not adding and previous in (None, self.hymn_book_id):
+                return
+            if not adding:
+                HymnBook.adjust_hymns_total(previous, -1)
+            HymnBook.adjust_hymns_total(self.hymn_book_id, 1)
+            if Hymn.hymn_book.is_cached(self):
+                self.hymn_book.hymns_total += 1
+
     @property
     def full_title(self):
         """Retorna título completo: Hinário - Nº. Título"""
@@ -259,7 +310,192 @@ class Comment(models.Model):
             models.Index(fields=["hymn", "-created_at"]),
             models.Index(fields=["user", "-created_at"]),
             models.Index(fields=["is_approved"]),
+            # Paginação por keyset (created_at, id) dos comentários visíveis de um hino
+            models.Index(
+                fields=["hymn", "created_at", "id"],
+                name="comment_visible_idx",
+                condition=models.Q(is_approved=True, is_flagged=False),
+            ),
         ]
 
     def __str__(self):
         return f"{self.user.username} em {self.hymn.title}: {self.text[:50]}..."
+
+    @property
+    def is_visible(self):
+        """Aprovado e não reportado: exibido na página do hino e contado em Hymn.comments_count."""
+        return self.is_approved and not self.is_flagged
+
+
+def default_staged_upload_expiry():
+    """Data de expiração padrão de um upload em andamento."""
+    return timezone.now() + timedelta(hours=settings.STAGED_UPLOAD_TTL_HOURS)
+
+
+class StagedUpload(models.Model):
+    """
+    Upload de hinário em andamento.
+
+    Guarda os dados do hinário (JSON comprimido com zlib) entre as etapas do upload,
+    mantendo na sessão apenas o ID, e o estado da detecção de duplicatas, que roda
+    em background (Celery) para não prender o worker web durante o POST do upload.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Aguardando"),
+        (STATUS_RUNNING, "Em análise"),
+        (STATUS_DONE, "Concluído"),
+        (STATUS_FAILED, "Falhou"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    user = models.ForeignKey(
+        "users.User", on_delete=models.CASCADE, related_name="staged_uploads", verbose_name="Usuário"
+    )
+    filename = models.CharField("Arquivo", max_length=255)
+    name = models.CharField("Nome do hinário", max_length=255)
+    hymns_count = models.PositiveIntegerField("Total de hinos", default=0)
+    payload = models.BinaryField("Dados", help_text="Dados do hinário em JSON comprimido (zlib)")
+
+    # Detecção de duplicatas
+    status = models.CharField("Status", max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    progress = models.PositiveSmallIntegerField("Progresso (%)", default=0)
+    duplicates = models.JSONField("Duplicatas", default=dict, blank=True, help_text="Resultado da classificação")
+    error = models.TextField("Erro", blank=True)
+
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+    updated_at = models.DateTimeField("Atualizado em", auto_now=True)
+    expires_at = models.DateTimeField("Expira em", default=default_staged_upload_expiry)
+
+    class Meta:
+        verbose_name = "Upload em andamento"
+        verbose_name_plural = "Uploads em andamento"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["user", "-created_at"]),
+            models.Index(fields=["expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
+
+    def set_payload(self, data):
+        """Comprime e armazena os dados do hinário (dict com name, owner, hymns, ...)."""
+        self.payload = zlib.compress(json.dumps(data, cls=DjangoJSONEncoder).encode("utf-8"))
+        self.__dict__.pop("payload_data", None)
+
+    @cached_property
+    def payload_data(self):
+        """Dados do hinário descomprimidos (lidos uma única vez por instância)."""
+        return json.loads(zlib.decompress(self.payload))
+
+    @property
+    def hymns(self):
+        """Número, título e letra de cada hino, no formato usado pela detecção de duplicatas."""
+        return [
+            {
+                "number": h.get("number"),
+                "title": h.get("title", ""),
+                "text": h.get("text", ""),
+            }
+            for h in self.payload_data.get("hymns", [])
+        ]
+
+    @property
+    def is_finished(self):
+        """Retorna True se a detecção de duplicatas terminou (com sucesso ou erro)."""
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+class ImportedFile(models.Model):
+    """
+    Arquivo YAML já importado pelo comando import_yaml.
+
+    Identificado pelo hash SHA-256 do conteúdo, permite retomar uma importação em lote
+    pulando arquivos que já foram importados sem alterações.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    content_hash = models.CharField("Hash do conteúdo", max_length=64, unique=True)
+    path = models.CharField("Caminho", max_length=500)
+    hymn_book = models.ForeignKey(
+        HymnBook, on_delete=models.CASCADE, related_name="imported_files", verbose_name="Hinário"
+    )
+    hymns_count = models.PositiveIntegerField("Total de hinos", default=0)
+
+    imported_at = models.DateTimeField("Importado em", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Arquivo importado"
+        verbose_name_plural = "Arquivos importados"
+        ordering = ["-imported_at"]
+
+    def __str__(self):
+        return f"{self.path} ({self.content_hash[:12]})"
+
+
+class HymnBookBundle(models.Model):
+    """
+    Pacote offline de um hinário: todos os hinos em um JSON comprimido com gzip.
+
+    Identificado pelo hash do conteúdo (version), é imutável; o hash de cada hino
+    (hymn_hashes) permite responder quais hinos mudaram entre duas versões.
+    Gerado em segundo plano (ver bundles.py).
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+    hymn_book = models.ForeignKey(HymnBook, on_delete=models.CASCADE, related_name="bundles", verbose_name="Hinário")
+    version = models.CharField("Versão", max_length=64, help_text="Hash do conteúdo do pacote")
+    file = models.FileField("Arquivo", upload_to="hymnbooks/bundles/")
+    size = models.PositiveIntegerField("Tamanho (bytes)", default=0, help_text="Tamanho comprimido")
+    hymn_hashes = models.JSONField("Hashes dos hinos", default=dict, help_text="id do hino → hash do conteúdo")
+
+    created_at = models.DateTimeField("Criado em", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Pacote offline"
+        verbose_name_plural = "Pacotes offline"
+        ordering = ["-created_at"]
+        unique_together = [["hymn_book", "version"]]
+        get_latest_by = "created_at"
+
+    def __str__(self):
+        return f"{self.hymn_book.name} ({self.version[:12]})"
+
+
+class Tombstone(models.Model):
+    """
+    Registro de um hinário ou hino removido, para que clientes que sincronizam o
+    catálogo (sync.py) saibam o que apagar. Gravado por signals e expurgado após
+    SYNC_TOMBSTONE_TTL_DAYS.
+    """
+
+    TYPE_HYMN_BOOK = "hymn_book"
+    TYPE_HYMN = "hymn"
+    TYPE_CHOICES = [
+        (TYPE_HYMN_BOOK, "Hinário"),
+        (TYPE_HYMN, "Hino"),
+    ]
+
+    object_type = models.CharField("Tipo", max_length=20, choices=TYPE_CHOICES)
+    object_id = models.UUIDField("ID do objeto")
+    deleted_at = models.DateTimeField("Removido em", auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Remoção"
+        verbose_name_plural = "Remoções"
+        ordering = ["deleted_at", "id"]
+        indexes = [
+            models.Index(fields=["deleted_at", "id"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_object_type_display()} {self.object_id} removido em {self.deleted_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,167 @@
+"""
+Cache de páginas para visitantes anônimos, versionado por objeto.
+
+Cada página é guardada sob uma chave que inclui a versão do objeto que ela exibe
+(hino, hinário ou o site inteiro, no caso da home). Invalidar é apenas trocar a
+versão (ver signals.py): as entradas antigas deixam de ser lidas e expiram sozinhas.
+
+A mesma versão serve de validador HTTP (ETag / Last-Modified): um GET condicional
+é respondido com 304 sem renderizar a página nem consultar o banco.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+SITE = "site"
+HYMN = "hymn"
+HYMN_BOOK = "hymnbook"
+SITEMAP = "sitemap"
+
+
+def _version_key(kind, ident):
+    return f"pagecache:v:{kind}:{ident}"
+
+
+def _new_version():
+    # Marca de tempo em nanossegundos: única o bastante e serve de Last-Modified
+    return str(time.time_ns())
+
+
+def get_version(kind, ident=""):
+    """Retorna a versão atual de um objeto (criando uma se ainda não existir)."""
+    key = _version_key(kind, ident)
+    version = cache.get(key)
+    if version is None:
+        version = _new_version()
+        # add não sobrescreve uma versão gravada em paralelo
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_version(kind, *idents):
+    """Invalida as páginas dos objetos informados (uma única ida ao cache)."""
+    version = _new_version()
+    cache.set_many({_version_key(kind, ident): version for ident in idents or [""]}, timeout=None)
+
+
+def page_key(request, kind, ident=""):
+    """Chave da página: objeto + versão + URL completa (inclui query string, ex.: paginação)."""
+    path = hashlib.md5(request.get_full_path().encode("utf-8"), usedforsecurity=False).hexdigest()
+    return f"pagecache:page:{kind}:{ident}:{get_version(kind, ident)}:{path}"
+
+
+def last_modified(version):
+    """Instante (epoch, em segundos) representado por uma versão, ou None se ela não for uma marca de tempo."""
+    try:
+        return int(version) // 1_000_000_000
+    except ValueError:
+        return None
+
+
+def page_etag(request, kind, ident=""):
+    """
+    ETag da página: versão do objeto + usuário (páginas autenticadas mostram favoritos
+    e botões próprios de cada usuário). Não depende da renderização.
+
+    Para autenticados entram também a sessão e o segredo CSRF, trocados no login: depois
+    de sair e entrar de novo, o navegador não reaproveita um HTML com o token antigo.
+    """
+    if request.user.is_authenticated:
+        user = f"{request.user.pk}:{request.session.session_key}:{request.META.get('CSRF_COOKIE', '')}"
+    else:
+        user = "anon"
+    raw = f"{kind}:{ident}:{get_version(kind, ident)}:{user}"
+    return quote_etag(hashlib.md5(raw.encode("utf-8"), usedforsecurity=False).hexdigest())
+
+
+def patch_page_cache_control(request, response):
+    """Anônimos: cache público por PAGE_BROWSER_MAX_AGE. Autenticados: privado e sempre revalidado."""
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.PAGE_BROWSER_MAX_AGE)
+    patch_vary_headers(response, ["Cookie"])
+
+
+def is_cacheable(request):
+    """Só GETs anônimos sem mensagens pendentes são servidos do cache."""
+    return request.method == "GET" and not request.user.is_authenticated and not len(get_messages(request))
+
+
+def cached_page(request, kind, ident, render):
+    """
+    Serve a página do cache para visitantes anônimos, ou a renderiza com render() e guarda.
+
+    Respostas que não são 200, que definem cookies ou que usaram o token CSRF
+    (específico da sessão) nunca são guardadas.
+    """
+    if not is_cacheable(request):
+        return render()
+
+    key = page_key(request, kind, ident)
+    cached = cache.get(key)
+    if cached is not None:
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+
+    response = render()
+    if hasattr(response, "render") and not response.is_rendered:
+        response.render()
+
+    if response.status_code == 200 and not response.cookies and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        cache.set(key, (response.content, response["Content-Type"]), settings.PAGE_CACHE_TIMEOUT)
+    return response
+
+
+def conditional_page(request, kind, ident, render):
+    """
+    Responde GETs condicionais com 304 a partir da versão do objeto, sem renderizar.
+
+    Demais requisições passam por cached_page() e recebem ETag, Last-Modified e
+    Cache-Control. Requisições com mensagens pendentes nunca recebem 304, para que
+    as mensagens sejam exibidas.
+    """
+    if request.method not in ("GET", "HEAD") or len(get_messages(request)):
+        return cached_page(request, kind, ident, render)
+
+    version = get_version(kind, ident)
+    etag = page_etag(request, kind, ident)
+    modified = last_modified(version)
+
+    response = get_conditional_response(request, etag=etag, last_modified=modified)
+    if response is None:
+        response = cached_page(request, kind, ident, render)
+        if response.status_code != 200:
+            return response
+        response["ETag"] = etag
+        if modified is not None:
+            response["Last-Modified"] = http_date(modified)
+    patch_page_cache_control(request, response)
+    return response
+
+
+class AnonymousPageCacheMixin:
+    """
+    Mixin para class-based views: serve GETs anônimos do cache versionado por objeto
+    e responde GETs condicionais (anônimos ou não) com 304.
+    """
+
+    page_cache_kind = SITE
+
+    def get_page_cache_ident(self):
+        """Identificador do objeto exibido, disponível sem consultar o banco (pk ou slug da URL)."""
+        return ""
+
+    def get(self, request, *args, **kwargs):
+        parent_get = super().get
+        return conditional_page(
+            request, self.page_cache_kind, self.get_page_cache_ident(), lambda: parent_get(request, *args, **kwargs)
+        )
@@ -0,0 +1,122 @@
+"""
+PDF para impressão de um hinário (capa, índice e hinos com seus metadados).
+
+O PDF é renderizado pela task build_hymn_book_pdf, nunca durante uma requisição, a
+partir do pacote offline mais recente (bundles.py): o nome do arquivo deriva do hash
+de conteúdo do pacote, então cada conteúdo é renderizado uma única vez e o arquivo
+existente é servido direto pelo storage de mídia. Enquanto não existe, a view mostra
+uma página de "sendo gerado".
+
+Hinários sem PDF enviado por usuários ganham uma HymnBookVersion com o PDF gerado
+(identificada pelo diretório AUTO_PDF_DIR).
+"""
+
+import base64
+import hashlib
+import re
+from typing import Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.loader import render_to_string
+
+from .bundles import read_bundle
+from .models import HymnBook, HymnBookBundle, HymnBookVersion
+
+AUTO_PDF_DIR = "hymnbooks/pdfs/auto"
+AUTO_VERSION_NAME = "PDF gerado automaticamente"
+
+# Trocar quando o template do PDF mudar: força uma nova renderização de todos os hinários
+PDF_LAYOUT_VERSION = "1"
+
+
+def pdf_name(hymn_book: HymnBook, bundle: HymnBookBundle) -> str:
+    """Caminho no storage do PDF do conteúdo atual (pacote + capa + layout)."""
+    raw = f"{PDF_LAYOUT_VERSION}:{bundle.version}:{hymn_book.cover_image.name or ''}"
+    digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    return f"{AUTO_PDF_DIR}/{hymn_book.slug}-{digest[:16]}.pdf"
+
+
+def _cover_data_uri(hymn_book: HymnBook) -> Optional[str]:
+    """Capa embutida no HTML: o renderizador não precisa acessar o storage por URL."""
+    if not hymn_book.cover_image:
+        return None
+    with hymn_book.cover_image.open("rb") as f:
+        content = f.read()
+    extension = hymn_book.cover_image.name.rsplit(".", 1)[-1].lower()
+    mime = "image/png" if extension == "png" else "image/jpeg"
+    return f"data:{mime};base64,{base64.b64encode(content).decode('ascii')}"
+
+
+def render_html(hymn_book: HymnBook, bundle: HymnBookBundle) -> str:
+    """HTML de impressão do hinário, a partir do conteúdo do pacote."""
+    payload = read_bundle(bundle)
+    return render_to_string(
+        "hymns/hymnbook_pdf.html",
+        {"hymnbook": payload["hymn_book"], "hymns": payload["hymns"], "cover": _cover_data_uri(hymn_book)},
+    )
+
+
+def render_pdf(hymn_book: HymnBook, bundle: HymnBookBundle) -> bytes:
+    """Renderiza o PDF do hinário (segundos para hinários grandes: só em tasks)."""
+    # Import tardio: carregar o WeasyPrint é caro e só os workers precisam dele
+    from weasyprint import HTML
+
+    return HTML(string=render_html(hymn_book, bundle)).write_pdf()
+
+
+def build_pdf(hymn_book: HymnBook, bundle: HymnBookBundle) -> str:
+    """
+    Gera o PDF do pacote, se ainda não existe, remove os PDFs gerados de conteúdos
+    anteriores e atualiza a versão automática do hinário. Retorna o caminho no storage.
+    """
+    name = pdf_name(hymn_book, bundle)
+    if not default_storage.exists(name):
+        saved = default_storage.save(name, ContentFile(render_pdf(hymn_book, bundle)))
+        if saved != name:
+            # Outra task gravou o mesmo conteúdo em paralelo
+            default_storage.delete(saved)
+
+    prune_pdfs(hymn_book, keep=name)
+    attach_to_version(hymn_book, name)
+    return name
+
+
+def prune_pdfs(hymn_book: HymnBook, keep: str) -> int:
+    """Remove PDFs gerados do hinário além de keep."""
+    try:
+        _dirs, files = default_storage.listdir(AUTO_PDF_DIR)
+    except FileNotFoundError:
+        return 0
+    pattern = re.compile(rf"^{re.escape(hymn_book.slug)}-[0-9a-f]{{16}}\.pdf$")
+    old = [f"{AUTO_PDF_DIR}/{file}" for file in files if pattern.match(file) and f"{AUTO_PDF_DIR}/{file}" != keep]
+    for name in old:
+        default_storage.delete(name)
+    return len(old)
+
+
+def attach_to_version(hymn_book: HymnBook, name: str) -> Optional[HymnBookVersion]:
+    """Aponta a versão automática para o PDF gerado, se nenhum PDF foi enviado por usuários."""
+    with_pdf = hymn_book.versions.exclude(pdf_file="").exclude(pdf_file__isnull=True)
+    if with_pdf.exclude(pdf_file__startswith=f"{AUTO_PDF_DIR}/").exists():
+        return None
+
+    version = with_pdf.first()
+    if version is None:
+        version = HymnBookVersion(
+            hymn_book=hymn_book,
+            version_name=AUTO_VERSION_NAME,
+            description="Gerado a partir dos hinos cadastrados no portal.",
+        )
+    if version.pdf_file.name != name:
+        version.pdf_file.name = name
+        version.save()
+    return version
+
+
+def ready_pdf_url(hymn_book: HymnBook, bundle: Optional[HymnBookBundle]) -> Optional[str]:
+    """URL do PDF do conteúdo atual, ou None se ainda não foi gerado."""
+    if bundle is None:
+        return None
+    name = pdf_name(hymn_book, bundle)
+    return default_storage.url(name) if default_storage.exists(name) else None
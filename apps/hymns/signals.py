@@ -0,0 +1,156 @@
+"""
+Invalidação do cache de páginas (page_cache.py, incluindo os sitemaps), das
+estatísticas da home (stats.py) e dos pacotes offline (bundles.py) quando hinos,
+hinários, seus conteúdos e usuários mudam, e registro das remoções (Tombstone) para o feed de sincronização (sync.py).
+
+Também desconta de HymnBook.hymns_total cada hino removido (inclusive por queryset);
+criações e trocas de hinário são contadas em Hymn.save. bulk_create não dispara
+signals e exclusões dentro de bulk_delete() pulam o trabalho por hino: quem os usa
+ajusta contador, cache e remoções uma vez para o lote (ingestion.bulk_create_hymns,
+ingestion.delete_hymns).
+
+As versões são trocadas só após o commit, para que uma requisição concorrente não
+guarde a página antiga sob a versão nova.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import page_cache, sitemaps, stats
+from .models import Comment, Favorite, Hymn, HymnAudio, HymnBook, Tombstone
+
+_bulk_deleting = ContextVar("hymns_bulk_deleting", default=False)
+
+
+@contextmanager
+def bulk_delete():
+    """Suspende os receivers de exclusão de hinos e do seu conteúdo (contador, cache, Tombstone)."""
+    token = _bulk_deleting.set(True)
+    try:
+        yield
+    finally:
+        _bulk_deleting.reset(token)
+
+
+def refresh_stats():
+    """Agenda o recálculo das estatísticas após o commit (uma task por vez, mesmo em importações em lote)."""
+    from .tasks import refresh_site_stats
+
+    def enqueue():
+        if cache.add(stats.REFRESH_PENDING_KEY, True, timeout=60):
+            refresh_site_stats.delay()
+
+    transaction.on_commit(enqueue)
+
+
+def rebuild_bundle(hymn_book_id):
+    """Agenda a geração do pacote offline do hinário após o commit (uma task por hinário por vez)."""
+    from .tasks import build_hymn_book_bundle
+
+    def enqueue():
+        if cache.add(f"bundle-pending:{hymn_book_id}", True, timeout=60):
+            build_hymn_book_bundle.delay(str(hymn_book_id))
+
+    transaction.on_commit(enqueue)
+
+
+def generate_pdf(hymn_book_id):
+    """Agenda a geração do PDF do hinário após o commit (uma renderização por hinário por vez)."""
+    from .tasks import build_hymn_book_pdf
+
+    def enqueue():
+        # Expira sozinha se o worker morrer no meio da renderização
+        if cache.add(f"pdf-pending:{hymn_book_id}", True, timeout=10 * 60):
+            build_hymn_book_pdf.delay(str(hymn_book_id))
+
+    transaction.on_commit(enqueue)
+
+
+def invalidate_hymn_book(hymn_book, hymn_ids=()):
+    """
+    Invalida a página do hinário, a home/listagem e, opcionalmente, páginas de hinos,
+    e agenda a atualização das estatísticas e do pacote offline.
+    """
+    slug = hymn_book.slug
+
+    def bump():
+        page_cache.bump_version(page_cache.HYMN_BOOK, slug)
+        page_cache.bump_version(page_cache.SITE)
+        if hymn_ids:
+            page_cache.bump_version(page_cache.HYMN, *[str(pk) for pk in hymn_ids])
+        # O índice ("") traz a data da última alteração de cada seção
+        page_cache.bump_version(page_cache.SITEMAP, sitemaps.HYMN_BOOKS, sitemaps.HYMNS, "")
+
+    transaction.on_commit(bump)
+    refresh_stats()
+    rebuild_bundle(hymn_book.pk)
+
+
+def invalidate_hymn(hymn_id):
+    """Invalida apenas a página de um hino (comentários, áudios, favoritos)."""
+    transaction.on_commit(lambda: page_cache.bump_version(page_cache.HYMN, str(hymn_id)))
+
+
+@receiver([post_save, post_delete], sender=HymnBook)
+def hymn_book_changed(sender, instance, **kwargs):
+    # Nome e dono aparecem em todas as páginas de hinos do hinário
+    hymn_ids = [] if kwargs.get("signal") is post_delete else list(instance.hymns.values_list("id", flat=True))
+    invalidate_hymn_book(instance, hymn_ids)
+
+
+@receiver([post_save, post_delete], sender=Hymn)
+def hymn_changed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, HymnBook):
+        # Exclusão em cascata do hinário: o receiver do hinário já invalidou tudo
+        return
+    if _bulk_deleting.get():
+        return
+    invalidate_hymn_book(instance.hymn_book, [instance.pk])
+
+
+@receiver(post_delete, sender=Hymn)
+def count_deleted_hymn(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, HymnBook) or (isinstance(origin, QuerySet) and origin.model is HymnBook):
+        # O hinário foi removido junto
+        return
+    if _bulk_deleting.get():
+        return
+    HymnBook.adjust_hymns_total(instance.hymn_book_id, -1)
+    if Hymn.hymn_book.is_cached(instance):
+        instance.hymn_book.hymns_total -= 1
+
+
+@receiver(post_delete, sender=HymnBook)
+@receiver(post_delete, sender=Hymn)
+def record_tombstone(sender, instance, **kwargs):
+    if _bulk_deleting.get():
+        return
+    # Na mesma transação da exclusão: some junto se ela for desfeita
+    object_type = Tombstone.TYPE_HYMN_BOOK if sender is HymnBook else Tombstone.TYPE_HYMN
+    Tombstone.objects.create(object_type=object_type, object_id=instance.pk)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # Logins só gravam last_login, que não aparece no sitemap de perfis
+    if not created and update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    transaction.on_commit(lambda: page_cache.bump_version(page_cache.SITEMAP, sitemaps.PROFILES, ""))
+
+
+@receiver([post_save, post_delete], sender=HymnAudio)
+@receiver([post_save, post_delete], sender=Comment)
+@receiver([post_save, post_delete], sender=Favorite)
+def hymn_content_changed(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, (Hymn, HymnBook)) or _bulk_deleting.get():
+        return
+    invalidate_hymn(instance.hymn_id)
+    if sender is HymnAudio:
+        refresh_stats()
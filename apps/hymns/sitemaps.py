@@ -0,0 +1,110 @@
+"""
+Sitemaps de hinários, hinos e perfis, com um índice (sitemap.xml).
+
+Cada seção é lida com values_list (sem instanciar models) e dividida em páginas de
+SITEMAP_PAGE_SIZE URLs, bem abaixo do limite de 50 mil do protocolo. O XML passa
+pelo cache de páginas (page_cache.conditional_page) sob a versão da seção, trocada
+em signals.py quando suas linhas mudam: crawlers não geram consultas ao banco.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sitemaps import Sitemap
+from django.contrib.sitemaps import views as sitemap_views
+from django.db.models import Max
+from django.http import Http404
+from django.urls import reverse
+
+from . import page_cache
+from .models import Hymn, HymnBook
+
+# Seções do sitemap; o nome também é o identificador da versão no cache de páginas
+HYMN_BOOKS = "hinarios"
+HYMNS = "hinos"
+PROFILES = "perfis"
+
+X_ROBOTS_TAG = "noindex, noodp, noarchive"
+
+
+class CatalogSitemap(Sitemap):
+    """Base das seções: itens são tuplas (identificador, updated_at) de values_list."""
+
+    model = None
+    url_name = None
+    url_kwarg = None
+    lookup_field = "pk"
+
+    @property
+    def limit(self):
+        return settings.SITEMAP_PAGE_SIZE
+
+    def items(self):
+        # Ordem pela chave primária: páginas estáveis e servidas pelo índice da PK
+        return self.model.objects.order_by("pk").values_list(self.lookup_field, "updated_at")
+
+    def location(self, item):
+        return reverse(self.url_name, kwargs={self.url_kwarg: item[0]})
+
+    def lastmod(self, item):
+        return item[1]
+
+    def get_latest_lastmod(self):
+        # O padrão do Django percorre todos os itens; um MAX usa o índice (updated_at, id)
+        return self.model.objects.aggregate(latest=Max("updated_at"))["latest"]
+
+
+class HymnBookSitemap(CatalogSitemap):
+    model = HymnBook
+    url_name = "hymns:hymnbook_detail"
+    url_kwarg = "slug"
+    lookup_field = "slug"
+    priority = 0.8
+
+
+class HymnSitemap(CatalogSitemap):
+    model = Hymn
+    url_name = "hymns:hymn_detail"
+    url_kwarg = "pk"
+    priority = 0.6
+
+
+class ProfileSitemap(Sitemap):
+    """Perfis públicos de usuários ativos (o usuário não guarda data de alteração)."""
+
+    priority = 0.3
+
+    @property
+    def limit(self):
+        return settings.SITEMAP_PAGE_SIZE
+
+    def items(self):
+        return get_user_model().objects.filter(is_active=True).order_by("pk").values_list("username", flat=True)
+
+    def location(self, item):
+        return reverse("users:profile", kwargs={"username": item})
+
+
+SITEMAPS = {
+    HYMN_BOOKS: HymnBookSitemap,
+    HYMNS: HymnSitemap,
+    PROFILES: ProfileSitemap,
+}
+
+
+def _cached(request, ident, render):
+    response = page_cache.conditional_page(request, page_cache.SITEMAP, ident, render)
+    # Cabeçalho do Django que não sobrevive ao cache (só o corpo é guardado)
+    response["X-Robots-Tag"] = X_ROBOTS_TAG
+    return response
+
+
+def sitemap_index_view(request):
+    """sitemap.xml: uma entrada por página de cada seção."""
+    return _cached(request, "", lambda: sitemap_views.index(request, SITEMAPS, sitemap_url_name="sitemap_section"))
+
+
+def sitemap_section_view(request, section):
+    """sitemap-<seção>.xml?p=<página>."""
+    if section not in SITEMAPS:
+        raise Http404("Seção de sitemap desconhecida")
+    return _cached(request, section, lambda: sitemap_views.sitemap(request, SITEMAPS, section=section))
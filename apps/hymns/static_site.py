@@ -0,0 +1,192 @@
+"""
+Exportação estática das páginas públicas do catálogo (comando build_static_site).
+
+Cada página pública sem query string (início, lista de hinários, hinário, hino) é
+renderizada como visitante anônimo e gravada em STATIC_SITE_ROOT como
+<caminho>/index.html, mais uma cópia .gz para servidores que servem arquivos
+pré-comprimidos. Exemplo de nginx, mandando para o Django só quem tem sessão ou
+query string (busca, paginação):
+
+    location / {
+        if ($cookie_sessionid) { proxy_pass http://django; }
+        if ($args) { proxy_pass http://django; }
+        root /srv/static_site;
+        gzip_static on;
+        try_files $uri $uri/index.html @django;
+    }
+
+A reconstrução é incremental: para cada página calcula-se uma impressão digital das
+linhas que a alimentam (hino, hinário, áudios e comentários visíveis), sem renderizar
+nada, e só as páginas cuja impressão mudou desde o último build (manifesto
+MANIFEST_NAME na raiz da saída) são renderizadas, em processos paralelos. Páginas de
+objetos removidos são apagadas. Mudanças de template exigem --full.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.test import Client
+from django.urls import reverse
+
+from . import stats
+from .models import Comment, Hymn, HymnAudio, HymnBook
+
+MANIFEST_NAME = ".static-site-manifest.json"
+
+# Páginas por processo em cada lote enviado aos workers
+RENDER_CHUNK_SIZE = 50
+
+
+def _fingerprint(*values) -> str:
+    return hashlib.sha1(repr(values).encode("utf-8")).hexdigest()
+
+
+def _subquery(queryset, aggregate, output_field=None):
+    """Agregado de queryset por hino (evita multiplicar linhas com dois JOINs no mesmo SELECT)."""
+    queryset = queryset.filter(hymn=OuterRef("pk")).order_by().values("hymn")
+    return Subquery(queryset.annotate(value=aggregate).values("value"), output_field=output_field)
+
+
+def page_fingerprints() -> Dict[str, str]:
+    """Caminho de cada página pública -> impressão digital do seu conteúdo de origem."""
+    catalog = HymnBook.objects.aggregate(
+        count=Count("id"), changed=Max("updated_at"), hymns=Coalesce(Sum("hymns_total"), 0)
+    )
+    site = _fingerprint(catalog, sorted(stats.get_stats().items()))
+    pages = {reverse("hymns:home"): site, reverse("hymns:hymnbook_list"): site}
+
+    hymn_books = HymnBook.objects.annotate(hymns_changed=Max("hymns__updated_at")).values_list(
+        "slug", "updated_at", "hymns_total", "hymns_changed"
+    )
+    for slug, *values in hymn_books.iterator(chunk_size=500):
+        pages[reverse("hymns:hymnbook_detail", kwargs={"slug": slug})] = _fingerprint(*values)
+
+    audios = HymnAudio.objects.filter(is_approved=True)
+    comments = Comment.objects.filter(is_approved=True, is_flagged=False)
+    hymns = Hymn.objects.annotate(
+        audios_count=_subquery(audios, Count("id"), IntegerField()),
+        audios_changed=_subquery(audios, Max("updated_at")),
+        comments_visible=_subquery(comments, Count("id"), IntegerField()),
+        comments_changed=_subquery(comments, Max("updated_at")),
+    ).values_list(
+        "pk",
+        "updated_at",
+        "favorites_count",
+        "comments_count",
+        "hymn_book__updated_at",
+        "audios_count",
+        "audios_changed",
+        "comments_visible",
+        "comments_changed",
+    )
+    for pk, *values in hymns.iterator(chunk_size=500):
+        pages[reverse("hymns:hymn_detail", kwargs={"pk": pk})] = _fingerprint(*values)
+    return pages
+
+
+def page_file(output_dir: Path, path: str) -> Path:
+    """Arquivo de saída de uma página: /hinarios/x/ -> <saída>/hinarios/x/index.html."""
+    return Path(output_dir, path.strip("/"), "index.html")
+
+
+def _write(file: Path, content: bytes):
+    """Grava de forma atômica: o servidor nunca vê um arquivo pela metade."""
+    file.parent.mkdir(parents=True, exist_ok=True)
+    tmp = file.with_name(f".{file.name}.tmp")
+    tmp.write_bytes(content)
+    os.replace(tmp, file)
+
+
+def render_pages(paths: Iterable[str], output_dir: str) -> List[str]:
+    """Renderiza as páginas como visitante anônimo e grava os arquivos. Retorna as gravadas."""
+    client = Client(HTTP_HOST=settings.STATIC_SITE_HOST)
+    written = []
+    for path in paths:
+        response = client.get(path)
+        if response.status_code != 200:
+            continue
+        file = page_file(Path(output_dir), path)
+        _write(file, response.content)
+        _write(file.with_name(file.name + ".gz"), gzip.compress(response.content, compresslevel=9, mtime=0))
+        written.append(path)
+    return written
+
+
+def _remove_page(output_dir: Path, path: str):
+    file = page_file(output_dir, path)
+    for target in (file, file.with_name(file.name + ".gz")):
+        target.unlink(missing_ok=True)
+    # Remove diretórios que ficaram vazios, sem subir além da raiz da saída
+    directory = file.parent
+    while directory != output_dir and directory.is_dir() and not any(directory.iterdir()):
+        directory.rmdir()
+        directory = directory.parent
+
+
+def load_manifest(output_dir: Path) -> Dict[str, str]:
+    try:
+        return json.loads((output_dir / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def build_static_site(output_dir=None, workers=1, full=False) -> Dict[str, int]:
+    """
+    Atualiza a exportação estática em output_dir (padrão STATIC_SITE_ROOT).
+
+    Args:
+        workers: Processos de renderização; 1 renderiza no processo atual
+        full: Ignora o manifesto e renderiza todas as páginas
+
+    Returns:
+        Contagens "rendered", "unchanged", "removed" e "failed"
+    """
+    output_dir = Path(output_dir or settings.STATIC_SITE_ROOT)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {} if full else load_manifest(output_dir)
+
+    # Impressões calculadas antes de renderizar: se algo mudar durante o build, a
+    # página sai mais nova que a impressão e é apenas renderizada de novo no próximo
+    fingerprints = page_fingerprints()
+    stale = [
+        path
+        for path, fingerprint in fingerprints.items()
+        if manifest.get(path) != fingerprint or not page_file(output_dir, path).exists()
+    ]
+    removed = [path for path in manifest if path not in fingerprints]
+    for path in removed:
+        _remove_page(output_dir, path)
+
+    if workers > 1 and len(stale) > RENDER_CHUNK_SIZE:
+        # Cada processo abre a própria conexão; não herdar a do processo pai
+        connections.close_all()
+        chunks = [stale[i : i + RENDER_CHUNK_SIZE] for i in range(0, len(stale), RENDER_CHUNK_SIZE)]
+        # django.setup no initializer: necessário quando o método de início não é fork
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            written = [
+                path for paths in pool.map(render_pages, chunks, [str(output_dir)] * len(chunks)) for path in paths
+            ]
+    else:
+        written = render_pages(stale, str(output_dir))
+
+    # Páginas que falharam mantêm a impressão antiga e são tentadas de novo no próximo build
+    new_manifest = {path: manifest[path] for path in fingerprints if path in manifest}
+    new_manifest.update({path: fingerprints[path] for path in written})
+    _write(output_dir / MANIFEST_NAME, json.dumps(new_manifest, sort_keys=True).encode("utf-8"))
+
+    return {
+        "rendered": len(written),
+        "unchanged": len(fingerprints) - len(stale),
+        "removed": len(removed),
+        "failed": len(stale) - len(written),
+    }
@@ -0,0 +1,80 @@
+"""
+Estatísticas do site (totais de hinários, hinos, áudios e colaboradores) servidas do cache.
+
+A home não faz COUNT: lê o dicionário guardado em cache, que é recalculado pela task
+refresh_site_stats quando o acervo muda (ver signals.py) e periodicamente pelo beat.
+Em tabelas muito grandes no PostgreSQL, o total pode vir da estimativa de pg_class.reltuples
+(ver SITE_STATS_ESTIMATE_THRESHOLD).
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from . import page_cache
+from .models import Hymn, HymnAudio, HymnBook, HymnBookVersion
+
+STATS_KEY = "site-stats"
+REFRESH_PENDING_KEY = "site-stats:refresh-pending"
+
+
+def estimated_count(model):
+    """
+    Número aproximado de linhas da tabela do model segundo o planner do PostgreSQL.
+
+    Retorna None em outros bancos ou se a tabela ainda não foi analisada.
+    """
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+def table_count(model):
+    """Total de linhas do model: estimativa quando passa de SITE_STATS_ESTIMATE_THRESHOLD, senão COUNT exato."""
+    threshold = settings.SITE_STATS_ESTIMATE_THRESHOLD
+    if threshold:
+        estimate = estimated_count(model)
+        if estimate is not None and estimate >= threshold:
+            return estimate
+    return model.objects.count()
+
+
+def compute_stats():
+    """Calcula as estatísticas consultando o banco."""
+    from apps.users.models import User
+
+    contributors = User.objects.filter(
+        Exists(HymnAudio.objects.filter(uploaded_by=OuterRef("pk"), is_approved=True))
+        | Exists(HymnBookVersion.objects.filter(uploaded_by=OuterRef("pk")))
+    )
+    return {
+        "hymn_books": table_count(HymnBook),
+        "hymns": table_count(Hymn),
+        "audios": HymnAudio.objects.filter(is_approved=True).count(),
+        "contributors": contributors.count(),
+    }
+
+
+def refresh_stats():
+    """Recalcula e guarda as estatísticas; invalida a home se algum total mudou."""
+    stats = compute_stats()
+    if cache.get(STATS_KEY) != stats:
+        cache.set(STATS_KEY, stats, timeout=None)
+        page_cache.bump_version(page_cache.SITE)
+    return stats
+
+
+def get_stats():
+    """Estatísticas do cache. Só consulta o banco se o cache estiver vazio (ex.: logo após um deploy)."""
+    stats = cache.get(STATS_KEY)
+    if stats is None:
+        stats = compute_stats()
+        # add não sobrescreve um valor mais novo gravado pela task em paralelo
+        cache.add(STATS_KEY, stats, timeout=None)
+    return stats
@@ -0,0 +1,146 @@
+"""
+Feed de sincronização do catálogo para clientes com cópia local (app móvel).
+
+O feed intercala três fluxos, cada um lido por keyset em um índice próprio:
+hinários alterados (updated_at, id), hinos alterados (updated_at, id) e remoções
+(Tombstone: deleted_at, id). O cursor opaco guarda a posição em cada fluxo, então
+o custo de uma sincronização é proporcional ao número de mudanças, não ao catálogo.
+
+Só entram mudanças mais antigas que SYNC_LAG_SECONDS: uma transação ainda não
+confirmada pode gravar um updated_at anterior ao de linhas já visíveis, e o atraso
+evita que o cliente pule essa linha.
+
+Limite: updated_at é o instante da escrita, não do commit. Uma transação que fica
+aberta por mais de SYNC_LAG_SECONDS depois de gravar (ex.: importação de um hinário
+grande com upload da capa, em que sync_hymns carimba o início) pode confirmar linhas
+que ficam atrás de um cursor já emitido, e o cliente só as recebe na próxima mudança
+delas. SYNC_LAG_SECONDS deve ser maior que a transação de escrita mais longa.
+
+HymnBook.hymns_total não entra no feed: ele muda com F() sem tocar em updated_at, e
+o cliente já recebe os hinos para contá-los.
+"""
+
+import heapq
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.pagination import InvalidCursorError, decode_cursor, encode_cursor, keyset_filter
+
+from .models import Hymn, HymnBook, Tombstone
+
+HYMN_BOOK_SYNC_FIELDS = ["id", "slug", "name", "owner_name", "intro_name", "description"]
+HYMN_SYNC_FIELDS = [
+    "id",
+    "hymn_book_id",
+    "number",
+    "title",
+    "text",
+    "received_at",
+    "offered_to",
+    "style",
+    "extra_instructions",
+    "repetitions",
+]
+
+
+class ResyncRequiredError(Exception):
+    """O cursor é mais antigo que as remoções guardadas: o cliente precisa baixar o catálogo de novo."""
+
+
+def _streams():
+    """Fluxos do feed: (nome, queryset, coluna de tempo, campos, tipo no feed, operação)."""
+    return [
+        ("hymn_books", HymnBook.objects.all(), "updated_at", HYMN_BOOK_SYNC_FIELDS, "hymn_book", "upsert"),
+        ("hymns", Hymn.objects.all(), "updated_at", HYMN_SYNC_FIELDS, "hymn", "upsert"),
+        ("tombstones", Tombstone.objects.all(), "deleted_at", ["object_type", "object_id"], None, "delete"),
+    ]
+
+
+def _decode(cursor):
+    """Posições (timestamp, id) de cada fluxo e o instante em que o cursor foi emitido."""
+    if not cursor:
+        return None, {}
+    values = decode_cursor(cursor, 7)
+    issued_at = parse_datetime(values[0]) if values[0] else None
+    if values[0] and issued_at is None:
+        raise InvalidCursorError("Data inválida no cursor")
+    positions = {}
+    for i, (name, *_rest) in enumerate(_streams()):
+        timestamp, pk = values[1 + 2 * i], values[2 + 2 * i]
+        if timestamp is not None:
+            positions[name] = (timestamp, pk)
+    return issued_at, positions
+
+
+def _encode(issued_at, positions):
+    values = [issued_at]
+    for name, *_rest in _streams():
+        values.extend(positions.get(name, (None, None)))
+    return encode_cursor(values)
+
+
+def _change(row, time_field, fields, object_type, op):
+    if op == "delete":
+        return {"type": row["object_type"], "op": op, "id": row["object_id"], "changed_at": row[time_field]}
+    return {
+        "type": object_type,
+        "op": op,
+        "id": row["id"],
+        "changed_at": row[time_field],
+        "data": {field: row[field] for field in fields},
+    }
+
+
+def changes_since(cursor=None, limit=None):
+    """
+    Próxima página de mudanças depois do cursor (None = desde o início do catálogo).
+
+    Returns:
+        Dict com "changes" (em ordem de changed_at), "cursor" (guardar para a próxima
+        sincronização) e "has_more"
+
+    Raises:
+        InvalidCursorError: cursor malformado
+        ResyncRequiredError: cursor mais antigo que SYNC_TOMBSTONE_TTL_DAYS
+    """
+    limit = limit or settings.API_PAGE_SIZE
+    now = timezone.now()
+    issued_at, positions = _decode(cursor)
+    if issued_at and issued_at < now - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS):
+        raise ResyncRequiredError()
+
+    horizon = now - timedelta(seconds=settings.SYNC_LAG_SECONDS)
+    streams = _streams()
+    candidates = []
+    full_streams = False
+    for rank, (name, queryset, time_field, fields, _object_type, _op) in enumerate(streams):
+        ordering = [time_field, "id"]
+        queryset = queryset.filter(**{f"{time_field}__lte": horizon})
+        if name in positions:
+            try:
+                queryset = queryset.filter(keyset_filter(ordering, positions[name]))
+            except (ValidationError, ValueError, TypeError) as e:
+                raise InvalidCursorError(str(e)) from e
+        rows = list(queryset.order_by(*ordering).values(*dict.fromkeys(fields + ordering))[:limit])
+        full_streams = full_streams or len(rows) == limit
+        # rank desempata mudanças com o mesmo instante em fluxos diferentes
+        candidates.append([(row[time_field], rank, row["id"], row) for row in rows])
+
+    taken = list(heapq.merge(*candidates))[:limit]
+    leftover = sum(len(rows) for rows in candidates) - len(taken)
+
+    changes = []
+    for changed_at, rank, pk, row in taken:
+        name, _queryset, time_field, fields, object_type, op = streams[rank]
+        positions[name] = (changed_at, pk)
+        changes.append(_change(row, time_field, fields, object_type, op))
+
+    return {
+        "changes": changes,
+        "cursor": _encode(now, positions),
+        "has_more": leftover > 0 or full_streams,
+    }
@@ -0,0 +1,171 @@
+"""
+Celery tasks for the hymns app.
+"""
+
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import bundles, pdfs, stats
+from .disambiguation import find_duplicates_with_content, serialize_duplicates
+from .models import Comment, Favorite, Hymn, HymnBook, StagedUpload, Tombstone
+
+
+@shared_task
+def detect_upload_duplicates(staged_upload_id):
+    """
+    Detecta duplicatas de um upload em andamento e grava a classificação no StagedUpload.
+
+    O progresso é atualizado a cada etapa para que o navegador possa acompanhar via polling.
+    """
+    staged_upload = StagedUpload.objects.filter(id=staged_upload_id).first()
+    if staged_upload is None:
+        # Cancelado ou expirado antes de a task rodar
+        return
+
+    staged_upload.status = StagedUpload.STATUS_RUNNING
+    staged_upload.save(update_fields=["status", "updated_at"])
+
+    def update_progress(done, total):
+        StagedUpload.objects.filter(id=staged_upload.id).update(progress=int(done * 100 / total))
+
+    try:
+        duplicates = find_duplicates_with_content(
+            name=staged_upload.name,
+            hymns=staged_upload.hymns,
+            name_threshold=0.7,
+            content_threshold=0.8,
+            progress_callback=update_progress,
+        )
+    except Exception as e:
+        staged_upload.status = StagedUpload.STATUS_FAILED
+        staged_upload.error = str(e)
+        staged_upload.save(update_fields=["status", "error", "updated_at"])
+        return
+
+    staged_upload.duplicates = serialize_duplicates(duplicates)
+    staged_upload.status = StagedUpload.STATUS_DONE
+    staged_upload.progress = 100
+    staged_upload.save(update_fields=["duplicates", "status", "progress", "updated_at"])
+
+
+@shared_task
+def cleanup_expired_staged_uploads():
+    """Remove uploads em andamento que já expiraram. Retorna quantos foram removidos."""
+    deleted, _ = StagedUpload.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def _related_count(model, field, **filters):
+    """Contagem de linhas de model cujo field aponta para o registro externo (para usar em annotate/update)."""
+    counts = (
+        model.objects.filter(**{field: OuterRef("pk")}, **filters).order_by().values(field).annotate(total=Count("pk"))
+    )
+    return Coalesce(Subquery(counts.values("total")), 0)
+
+
+def _reconcile_counters(queryset, counters, batch_size=500):
+    """
+    Corrige contadores denormalizados que divergem da contagem real.
+
+    Args:
+        queryset: Registros a verificar
+        counters: Dict {campo contador: expressão com a contagem real}
+
+    Returns:
+        int: Quantos registros foram corrigidos
+    """
+    actual = {f"actual_{field}": expression for field, expression in counters.items()}
+    # Só os registros divergentes são carregados (normalmente poucos)
+    wrong = list(
+        queryset.annotate(**actual).exclude(**{field: F(f"actual_{field}") for field in counters}).only("pk", *counters)
+    )
+    for obj in wrong:
+        for field in counters:
+            setattr(obj, field, getattr(obj, f"actual_{field}"))
+    queryset.model.objects.bulk_update(wrong, list(counters), batch_size=batch_size)
+    return len(wrong)
+
+
+@shared_task
+def repair_hymn_counts():
+    """Recalcula HymnBook.hymns_total onde ele diverge da contagem real. Retorna quantos hinários foram corrigidos."""
+    return _reconcile_counters(HymnBook.objects.all(), {"hymns_total": _related_count(Hymn, "hymn_book")})
+
+
+@shared_task
+def reconcile_social_counts():
+    """
+    Recalcula os contadores sociais denormalizados (favoritos e comentários dos hinos,
+    seguidores e seguindo dos usuários) que divergiram, ex.: por exclusões em cascata.
+
+    Returns:
+        Dict com quantos hinos e usuários foram corrigidos
+    """
+    from apps.users.models import User, UserFollow
+
+    hymns = _reconcile_counters(
+        Hymn.objects.all(),
+        {
+            "favorites_count": _related_count(Favorite, "hymn"),
+            "comments_count": _related_count(Comment, "hymn", is_approved=True, is_flagged=False),
+        },
+    )
+    users = _reconcile_counters(
+        User.objects.all(),
+        {
+            "followers_count": _related_count(UserFollow, "followed"),
+            "following_count": _related_count(UserFollow, "follower"),
+        },
+    )
+    return {"hymns": hymns, "users": users}
+
+
+@shared_task
+def refresh_site_stats():
+    """Recalcula as estatísticas da home (stats.py). Retorna os totais."""
+    cache.delete(stats.REFRESH_PENDING_KEY)
+    return stats.refresh_stats()
+
+
+@shared_task
+def build_hymn_book_bundle(hymn_book_id):
+    """Gera o pacote offline do hinário (bundles.py). Retorna a versão, ou None se o hinário não existe mais."""
+    cache.delete(f"bundle-pending:{hymn_book_id}")
+    hymn_book = HymnBook.objects.filter(pk=hymn_book_id).first()
+    if hymn_book is None:
+        return None
+    version = bundles.build_bundle(hymn_book).version
+    if hymn_book.versions.filter(pdf_file__startswith=f"{pdfs.AUTO_PDF_DIR}/").exists():
+        # O PDF automático já é oferecido como versão do hinário: mantê-lo atualizado
+        from .signals import generate_pdf
+
+        generate_pdf(hymn_book.pk)
+    return version
+
+
+@shared_task
+def build_hymn_book_pdf(hymn_book_id):
+    """Gera o PDF para impressão do hinário (pdfs.py). Retorna o caminho no storage, ou None se o hinário não existe mais."""
+    try:
+        hymn_book = HymnBook.objects.filter(pk=hymn_book_id).first()
+        if hymn_book is None:
+            return None
+        bundle = bundles.latest_bundle(hymn_book) or bundles.build_bundle(hymn_book)
+        return pdfs.build_pdf(hymn_book, bundle)
+    finally:
+        # Só depois de renderizar: enquanto isso, novas requisições não agendam outra renderização
+        cache.delete(f"pdf-pending:{hymn_book_id}")
+
+
+@shared_task
+def prune_tombstones():
+    """Remove registros de remoção mais antigos que SYNC_TOMBSTONE_TTL_DAYS. Retorna quantos foram removidos."""
+    cutoff = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS)
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+    return deleted
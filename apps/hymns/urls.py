@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views, views_social
+from . import api, views, views_bundles, views_social
 
 app_name = "hymns"
 
@@ -8,8 +8,28 @@ urlpatterns = [
     path("", views.home_view, name="home"),
     path("hinarios/", views.HymnBookListView.as_view(), name="hymnbook_list"),
     path("hinarios/<slug:slug>/", views.HymnBookDetailView.as_view(), name="hymnbook_detail"),
+    path("hinarios/<slug:slug>/indice/", views.hymnbook_toc_view, name="hymnbook_toc"),
+    path("hinarios/<slug:slug>/pdf/", views.hymnbook_pdf_view, name="hymnbook_pdf"),
+    # Pacote offline
+    path("hinarios/<slug:slug>/pacote/", views_bundles.hymnbook_bundle_view, name="hymnbook_bundle"),
+    path("hinarios/<slug:slug>/pacote/delta/", views_bundles.hymnbook_bundle_delta_view, name="hymnbook_bundle_delta"),
+    path(
+        "hinarios/<slug:slug>/pacote/<str:version>.json",
+        views_bundles.hymnbook_bundle_file_view,
+        name="hymnbook_bundle_file",
+    ),
     path("hinos/<uuid:pk>/", views.HymnDetailView.as_view(), name="hymn_detail"),
+    path("hinos/<uuid:hymn_id>/comentarios/", views.hymn_comments_view, name="hymn_comments"),
     path("busca/", views.search_view, name="search"),
+    path("exportar/", views.export_view, name="export"),
+    # API JSON somente leitura (v1)
+    path("api/v1/hinarios/", api.hymn_book_list, name="api_hymnbook_list"),
+    path("api/v1/hinarios/<slug:slug>/", api.hymn_book_detail, name="api_hymnbook_detail"),
+    path("api/v1/hinarios/<slug:slug>/hinos/", api.hymn_book_hymns, name="api_hymnbook_hymns"),
+    path("api/v1/hinos/<uuid:pk>/", api.hymn_detail, name="api_hymn_detail"),
+    path("api/v1/hinos/<uuid:pk>/audios/", api.hymn_audios, name="api_hymn_audios"),
+    path("api/v1/busca/", api.search, name="api_search"),
+    path("api/v1/sync/", api.sync_feed, name="api_sync"),
     # Social features
     path("hinos/<uuid:hymn_id>/favoritar/", views_social.toggle_favorite, name="toggle_favorite"),
     path("hinos/<uuid:hymn_id>/comentar/", views_social.add_comment, name="add_comment"),
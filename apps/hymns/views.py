@@ -1,12 +1,34 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.views.generic import DetailView, ListView
 
+from apps.core.pagination import InvalidCursorError, keyset_page
 from apps.search.typesense_client import search_hymns
 
-from .models import Hymn, HymnBook
+from . import bundles, page_cache, pdfs, stats
+from .export import EXPORT_FORMATS, gzip_stream, iter_export
+from .models import Comment, Favorite, Hymn, HymnAudio, HymnBook
+from .signals import generate_pdf
 
+# Ordem (e chave do keyset) dos comentários de um hino; coberta por comment_visible_idx
+COMMENTS_ORDERING = ["created_at", "id"]
 
-class HymnBookListView(ListView):
+# Campos do índice do hinário: nunca carregar letra e instruções só para listar títulos
+TOC_FIELDS = ("id", "number", "title", "style")
+
+
+def toc_hymns(hymn_book_id, after=0):
+    """Uma página do índice do hinário (hinos com número maior que after), só com TOC_FIELDS."""
+    hymns = Hymn.objects.filter(hymn_book_id=hymn_book_id, number__gt=after).order_by("number").only(*TOC_FIELDS)
+    return hymns[: settings.HYMNBOOK_TOC_PAGE_SIZE]
+
+
+class HymnBookListView(page_cache.AnonymousPageCacheMixin, ListView):
     """List all hymn books."""
 
     model = HymnBook
@@ -18,7 +40,7 @@ class HymnBookListView(ListView):
         return HymnBook.objects.all().order_by("name")
 
 
-class HymnBookDetailView(DetailView):
+class HymnBookDetailView(page_cache.AnonymousPageCacheMixin, DetailView):
     """Display a single hymn book with all its hymns."""
 
     model = HymnBook
@@ -26,41 +48,120 @@ class HymnBookDetailView(DetailView):
     context_object_name = "hymnbook"
     slug_field = "slug"
     slug_url_kwarg = "slug"
+    page_cache_kind = page_cache.HYMN_BOOK
+
+    def get_page_cache_ident(self):
+        return self.kwargs["slug"]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["hymns"] = self.object.hymns.all().order_by("number")
+        # Consulta preguiçosa: só roda se o fragmento do índice não estiver em cache
+        context["hymns"] = toc_hymns(self.object.pk)
+        context["toc_has_more"] = self.object.hymns_total > settings.HYMNBOOK_TOC_PAGE_SIZE
+        context["toc_version"] = page_cache.get_version(page_cache.HYMN_BOOK, self.object.slug)
+        context["toc_cache_timeout"] = settings.PAGE_CACHE_TIMEOUT
         return context
 
 
-class HymnDetailView(DetailView):
+def hymnbook_toc_view(request, slug):
+    """
+    Índice do hinário em JSON, paginado por número (?after=<último número recebido>).
+
+    Usado pela página do hinário para carregar o restante do índice de hinários grandes.
+    """
+    try:
+        after = int(request.GET.get("after", 0))
+    except ValueError:
+        return HttpResponseBadRequest("Parâmetro 'after' inválido")
+
+    def render_toc():
+        hymn_book = get_object_or_404(HymnBook.objects.only("id"), slug=slug)
+        hymns = list(toc_hymns(hymn_book.pk, after).values(*TOC_FIELDS))
+        full_page = len(hymns) == settings.HYMNBOOK_TOC_PAGE_SIZE
+        return JsonResponse(
+            {
+                "hymns": [
+                    {
+                        "id": str(hymn["id"]),
+                        "number": hymn["number"],
+                        "title": hymn["title"],
+                        "style": hymn["style"],
+                        "url": reverse("hymns:hymn_detail", kwargs={"pk": hymn["id"]}),
+                    }
+                    for hymn in hymns
+                ],
+                "next_after": hymns[-1]["number"] if full_page else None,
+            }
+        )
+
+    return page_cache.conditional_page(request, page_cache.HYMN_BOOK, slug, render_toc)
+
+
+class HymnDetailView(page_cache.AnonymousPageCacheMixin, DetailView):
     """Display a single hymn."""
 
     model = Hymn
     template_name = "hymns/hymn_detail.html"
     context_object_name = "hymn"
     pk_url_kwarg = "pk"
+    page_cache_kind = page_cache.HYMN
+
+    def get_page_cache_ident(self):
+        return str(self.kwargs["pk"])
 
     def get_queryset(self):
-        return Hymn.objects.select_related("hymn_book")
+        """
+        Hino, hinário e áudios em um número fixo de consultas. O estado do usuário
+        (favoritou?) vem anotado na própria consulta do hino; os comentários são
+        paginados em get_context_data.
+        """
+        queryset = Hymn.objects.select_related("hymn_book").prefetch_related(
+            Prefetch(
+                "audios",
+                queryset=HymnAudio.objects.filter(is_approved=True).order_by("-created_at"),
+                to_attr="approved_audios",
+            ),
+        )
+        if self.request.user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(Favorite.objects.filter(user=self.request.user, hymn=OuterRef("pk")))
+            )
+        return queryset
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         hymn = self.object
 
-        # Check if favorited by current user
-        if self.request.user.is_authenticated:
-            from .models import Favorite
+        context["is_favorited"] = getattr(hymn, "is_favorited", False)
+        context["audios"] = hymn.approved_audios
+        context["comments"], context["comments_cursor"] = comments_page(hymn)
 
-            context["is_favorited"] = Favorite.objects.filter(user=self.request.user, hymn=hymn).exists()
+        return context
 
-        # Get approved audios
-        context["audios"] = hymn.audios.filter(is_approved=True).order_by("-created_at")
 
-        # Get approved comments
-        context["comments"] = hymn.comments.filter(is_approved=True, is_flagged=False).order_by("created_at")
+def comments_page(hymn, cursor=None):
+    """Uma página de comentários visíveis do hino, do mais antigo ao mais novo (keyset em created_at, id)."""
+    comments = Comment.objects.filter(hymn=hymn, is_approved=True, is_flagged=False).select_related("user")
+    page, next_cursor = keyset_page(comments, COMMENTS_ORDERING, settings.COMMENTS_PAGE_SIZE, cursor)
+    for comment in page:
+        comment.hymn = hymn
+    return page, next_cursor
 
-        return context
+
+def hymn_comments_view(request, hymn_id):
+    """
+    Próxima página de comentários de um hino (?cursor=), para o botão "carregar mais".
+
+    Retorna o HTML dos cartões (mesmo partial da página do hino) e o próximo cursor.
+    """
+    hymn = get_object_or_404(Hymn.objects.only("id"), id=hymn_id)
+    try:
+        comments, next_cursor = comments_page(hymn, request.GET.get("cursor"))
+    except InvalidCursorError:
+        return HttpResponseBadRequest("Cursor inválido")
+
+    html = render_to_string("hymns/_comments.html", {"comments": comments}, request=request)
+    return JsonResponse({"html": html, "next_cursor": next_cursor})
 
 
 def search_view(request):
@@ -103,13 +204,51 @@ def search_view(request):
 
 def home_view(request):
     """Home page with featured hymn books and search."""
-    recent_hymnbooks = HymnBook.objects.all().order_by("-created_at")[:6]
-    total_hymnbooks = HymnBook.objects.count()
-    total_hymns = Hymn.objects.count()
 
-    context = {
-        "recent_hymnbooks": recent_hymnbooks,
-        "total_hymnbooks": total_hymnbooks,
-        "total_hymns": total_hymns,
-    }
-    return render(request, "hymns/home.html", context)
+    def render_home():
+        recent_hymnbooks = HymnBook.objects.all().order_by("-created_at")[:6]
+        site_stats = stats.get_stats()
+
+        context = {
+            "recent_hymnbooks": recent_hymnbooks,
+            "total_hymnbooks": site_stats["hymn_books"],
+            "total_hymns": site_stats["hymns"],
+            "total_audios": site_stats["audios"],
+            "total_contributors": site_stats["contributors"],
+        }
+        return render(request, "hymns/home.html", context)
+
+    return page_cache.conditional_page(request, page_cache.SITE, "", render_home)
+
+
+@login_required
+def export_view(request):
+    """
+    Stream the whole catalogue as a gzip file (?format=yaml or jsonl).
+
+    Hymn books are read with server-side cursors and compressed as they are serialized,
+    so memory stays constant whatever the size of the catalogue.
+    """
+    export_format = request.GET.get("format", "yaml")
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(f"Formato inválido. Use: {', '.join(EXPORT_FORMATS)}")
+
+    response = StreamingHttpResponse(gzip_stream(iter_export(export_format)), content_type="application/gzip")
+    response["Content-Disposition"] = f'attachment; filename="hinarios.{export_format}.gz"'
+    return response
+
+
+def hymnbook_pdf_view(request, slug):
+    """
+    PDF para impressão do hinário: redireciona para o arquivo no storage se já foi gerado
+    para o conteúdo atual; senão agenda a geração e mostra uma página de espera.
+    """
+    hymn_book = get_object_or_404(HymnBook.objects.only("id", "slug", "name", "cover_image"), slug=slug)
+    url = pdfs.ready_pdf_url(hymn_book, bundles.latest_bundle(hymn_book))
+    if url:
+        return redirect(url)
+
+    generate_pdf(hymn_book.pk)
+    response = render(request, "hymns/hymnbook_pdf_pending.html", {"hymnbook": hymn_book}, status=202)
+    response["Retry-After"] = "10"
+    return response
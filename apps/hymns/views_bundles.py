@@ -0,0 +1,107 @@
+"""
+Views dos pacotes offline de hinários (ver bundles.py).
+
+O manifesto (pacote/) indica a versão atual; o arquivo de cada versão é imutável e
+servido já comprimido; o delta devolve só os hinos alterados desde uma versão anterior.
+"""
+
+import gzip
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+from . import bundles
+from .models import HymnBook, HymnBookBundle
+from .signals import rebuild_bundle
+
+# Um ano: cada versão do pacote tem URL própria e nunca muda
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _not_built(hymn_book):
+    """Pacote ainda não gerado: agenda a geração e pede para o cliente tentar de novo."""
+    rebuild_bundle(hymn_book.pk)
+    response = JsonResponse({"error": "O pacote deste hinário ainda está sendo gerado"}, status=503)
+    response["Retry-After"] = "30"
+    return response
+
+
+def _bundle_url(bundle, slug):
+    return reverse("hymns:hymnbook_bundle_file", kwargs={"slug": slug, "version": bundle.version})
+
+
+def hymnbook_bundle_view(request, slug):
+    """Manifesto do pacote offline: versão atual, URL do arquivo e tamanho."""
+    hymn_book = get_object_or_404(HymnBook.objects.only("id", "slug"), slug=slug)
+    bundle = bundles.latest_bundle(hymn_book)
+    if bundle is None:
+        return _not_built(hymn_book)
+
+    etag = quote_etag(bundle.version)
+    response = get_conditional_response(request, etag=etag) or JsonResponse(
+        {
+            "version": bundle.version,
+            "url": _bundle_url(bundle, slug),
+            "size": bundle.size,
+            "delta_url": reverse("hymns:hymnbook_bundle_delta", kwargs={"slug": slug}),
+        }
+    )
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
+
+def hymnbook_bundle_file_view(request, slug, version):
+    """Arquivo de uma versão do pacote, servido pré-comprimido e com cache imutável."""
+    bundle = get_object_or_404(HymnBookBundle, hymn_book__slug=slug, version=version)
+
+    etag = quote_etag(bundle.version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        with bundle.file.open("rb") as f:
+            content = f.read()
+        if "gzip" in request.headers.get("Accept-Encoding", ""):
+            response = HttpResponse(content, content_type="application/json")
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(gzip.decompress(content), content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True)
+    patch_vary_headers(response, ["Accept-Encoding"])
+    return response
+
+
+def hymnbook_bundle_delta_view(request, slug):
+    """
+    Hinos novos ou alterados desde ?since=<versão>, mais os ids removidos.
+
+    Se a versão informada não existe mais (histórico limitado a HYMNBOOK_BUNDLE_HISTORY),
+    responde 410 com a URL do pacote completo.
+    """
+    hymn_book = get_object_or_404(HymnBook.objects.only("id", "slug"), slug=slug)
+    current = bundles.latest_bundle(hymn_book)
+    if current is None:
+        return _not_built(hymn_book)
+
+    since_version = request.GET.get("since", "")
+    key = f"bundle-delta:{hymn_book.pk}:{current.version}:{since_version}"
+    delta = cache.get(key)
+    if delta is None:
+        since = HymnBookBundle.objects.filter(hymn_book=hymn_book, version=since_version).first()
+        if since is None:
+            return JsonResponse(
+                {"error": "Versão desconhecida; baixe o pacote completo", "url": _bundle_url(current, slug)},
+                status=410,
+            )
+        # Par de versões imutáveis: o delta nunca muda
+        delta = bundles.bundle_delta(since, current)
+        cache.set(key, delta, settings.PAGE_CACHE_TIMEOUT)
+
+    response = JsonResponse(delta)
+    patch_cache_control(response, public=True, max_age=settings.PAGE_BROWSER_MAX_AGE)
+    return response
@@ -4,11 +4,14 @@ Views para features sociais (favoritos, comentários, áudio).
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import F
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_POST
 
 from apps.users.models import Notification
+from apps.users.notifications import notify
 
 from .forms import CommentForm, HymnAudioUploadForm
 from .models import Comment, Favorite, Hymn, HymnAudio
@@ -20,11 +23,17 @@ def toggle_favorite(request, hymn_id):
     """Toggle favorito em um hino (AJAX)."""
     hymn = get_object_or_404(Hymn, id=hymn_id)
 
-    favorite, created = Favorite.objects.get_or_create(user=request.user, hymn=hymn)
+    with transaction.atomic():
+        favorite, created = Favorite.objects.get_or_create(user=request.user, hymn=hymn)
+
+        if created:
+            Hymn.objects.filter(pk=hymn.pk).update(favorites_count=F("favorites_count") + 1)
+        else:
+            favorite.delete()
+            Hymn.objects.filter(pk=hymn.pk, favorites_count__gt=0).update(favorites_count=F("favorites_count") - 1)
 
     if not created:
         # Já existia, então remove
-        favorite.delete()
         is_favorited = False
         message = "Removido dos favoritos"
     else:
@@ -34,12 +43,12 @@ def toggle_favorite(request, hymn_id):
 
         # Criar notificação para o uploader do hinário (se não for o próprio usuário)
         if hymn.hymn_book.owner_user and hymn.hymn_book.owner_user != request.user:
-            Notification.objects.create(
-                recipient=hymn.hymn_book.owner_user,
-                sender=request.user,
-                notification_type=Notification.TYPE_FAVORITE,
-                title="Novo favorito",
-                message=f"{request.user.username} favoritou o hino {hymn.title}",
+            notify(
+                hymn.hymn_book.owner_user,
+                request.user,
+                Notification.TYPE_FAVORITE,
+                target_key=f"hymn:{hymn.id}",
+                target_label=hymn.title,
                 link=f"/hinos/{hymn.id}/",
             )
 
@@ -61,19 +70,20 @@ def add_comment(request, hymn_id):
             comment = form.save(commit=False)
             comment.hymn = hymn
             comment.user = request.user
-            comment.save()
+            with transaction.atomic():
+                comment.save()
+                Hymn.objects.filter(pk=hymn.pk).update(comments_count=F("comments_count") + 1)
 
             messages.success(request, "Comentário adicionado!")
 
-            # Notificar outros comentadores e uploader
-            # (Implementação simplificada - em produção, evitar spam)
+            # Notificar o uploader (comentários no mesmo hino são agrupados)
             if hymn.hymn_book.owner_user and hymn.hymn_book.owner_user != request.user:
-                Notification.objects.create(
-                    recipient=hymn.hymn_book.owner_user,
-                    sender=request.user,
-                    notification_type=Notification.TYPE_COMMENT,
-                    title="Novo comentário",
-                    message=f"{request.user.username} comentou em {hymn.title}",
+                notify(
+                    hymn.hymn_book.owner_user,
+                    request.user,
+                    Notification.TYPE_COMMENT,
+                    target_key=f"hymn:{hymn.id}",
+                    target_label=hymn.title,
                     link=f"/hinos/{hymn.id}/",
                 )
 
@@ -95,7 +105,11 @@ def delete_comment(request, comment_id):
         return redirect("hymns:hymn_detail", pk=comment.hymn.id)
 
     hymn = comment.hymn
-    comment.delete()
+    with transaction.atomic():
+        comment.delete()
+        # comments_count conta só comentários visíveis
+        if comment.is_visible:
+            Hymn.objects.filter(pk=hymn.pk, comments_count__gt=0).update(comments_count=F("comments_count") - 1)
     messages.success(request, "Comentário deletado.")
 
     return redirect("hymns:hymn_detail", pk=hymn.id)
@@ -107,8 +121,15 @@ def flag_comment(request, comment_id):
     """Reportar comentário como abuso."""
     comment = get_object_or_404(Comment, id=comment_id)
 
-    comment.is_flagged = True
-    comment.save(update_fields=["is_flagged"])
+    if not comment.is_flagged:
+        was_visible = comment.is_visible
+        with transaction.atomic():
+            comment.is_flagged = True
+            comment.save(update_fields=["is_flagged"])
+            if was_visible:
+                Hymn.objects.filter(pk=comment.hymn_id, comments_count__gt=0).update(
+                    comments_count=F("comments_count") - 1
+                )
 
     messages.success(request, "Comentário reportado. Obrigado!")
 
@@ -0,0 +1,23 @@
+"""
+Celery tasks for the search app.
+"""
+
+from celery import shared_task
+
+from .typesense_client import delete_hymn, index_hymns
+
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def index_hymns_task(hymn_ids):
+    """Index the given hymns in TypeSense with a single bulk import."""
+    from apps.hymns.models import Hymn
+
+    hymns = Hymn.objects.filter(id__in=hymn_ids).select_related("hymn_book")
+    return index_hymns(hymns)
+
+
+@shared_task
+def delete_hymns_task(hymn_ids):
+    """Remove the given hymns from the TypeSense index."""
+    for hymn_id in hymn_ids:
+        delete_hymn(hymn_id)
@@ -56,11 +56,8 @@ def create_hymns_collection():
     return client.collections.create(HYMNS_SCHEMA)
 
 
-def index_hymn(hymn):
-    """Index a single hymn in TypeSense."""
-    client = get_typesense_client()
-
-    # Prepare document
+def build_hymn_document(hymn):
+    """Build the TypeSense document for a hymn (expects hymn_book to be loaded)."""
     doc = {
         "id": str(hymn.id),
         "hymn_book_id": str(hymn.hymn_book.id),
@@ -82,8 +79,48 @@ def index_hymn(hymn):
 
         doc["received_at"] = int(time.mktime(hymn.received_at.timetuple()))
 
+    return doc
+
+
+def index_hymn(hymn):
+    """Index a single hymn in TypeSense."""
+    client = get_typesense_client()
+
     # Upsert document
-    return client.collections["hymns"].documents.upsert(doc)
+    return client.collections["hymns"].documents.upsert(build_hymn_document(hymn))
+
+
+def index_hymns(hymns, batch_size=500):
+    """
+    Index many hymns in TypeSense using the bulk import endpoint.
+
+    Args:
+        hymns: Iterable of hymns (with hymn_book loaded)
+        batch_size: Documents sent per import request
+
+    Returns:
+        Number of documents successfully indexed
+    """
+    client = get_typesense_client()
+    documents = client.collections["hymns"].documents
+
+    indexed = 0
+    batch = []
+
+    def flush():
+        results = documents.import_(batch, {"action": "upsert"})
+        return sum(1 for result in results if result.get("success"))
+
+    for hymn in hymns:
+        batch.append(build_hymn_document(hymn))
+        if len(batch) >= batch_size:
+            indexed += flush()
+            batch = []
+
+    if batch:
+        indexed += flush()
+
+    return indexed
 
 
 def delete_hymn(hymn_id):
@@ -25,7 +25,7 @@ class UserFollowAdmin(admin.ModelAdmin):
 class NotificationAdmin(admin.ModelAdmin):
     """Admin para notificações."""
 
-    list_display = ["recipient", "notification_type", "title", "is_read", "sender", "created_at"]
+    list_display = ["recipient", "notification_type", "title", "actor_count", "is_read", "sender", "created_at"]
     list_filter = ["notification_type", "is_read", "created_at"]
     search_fields = ["recipient__username", "title", "message"]
     readonly_fields = ["id", "created_at"]
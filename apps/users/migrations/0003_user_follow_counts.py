@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:59
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_follow_counts(apps, schema_editor):
+    User = apps.get_model("users", "User")
+    UserFollow = apps.get_model("users", "UserFollow")
+
+    def count(field):
+        counts = UserFollow.objects.filter(**{field: OuterRef("pk")}).order_by().values(field).annotate(total=Count("pk"))
+        return Coalesce(Subquery(counts.values("total")), 0)
+
+    User.objects.update(followers_count=count("followed"), following_count=count("follower"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_notification_userfollow"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Seguidores"),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name="Seguindo"),
+        ),
+        migrations.RunPython(populate_follow_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_follow_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="actor_count",
+            field=models.PositiveIntegerField(default=1, verbose_name="Quantidade de autores"),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="actors",
+            field=models.JSONField(
+                blank=True, default=list, help_text="Usernames, mais recente primeiro", verbose_name="Autores recentes"
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="target_key",
+            field=models.CharField(
+                blank=True, help_text="Ex.: hymn:<id>, user:<id>", max_length=100, verbose_name="Alvo"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["recipient", "notification_type", "target_key", "-created_at"], name="notification_group_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_notification_grouping"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="notification",
+            name="notification_type",
+            field=models.CharField(
+                choices=[
+                    ("comment", "Comentário"),
+                    ("follow", "Novo seguidor"),
+                    ("favorite", "Favorito"),
+                    ("upload_approved", "Upload aprovado"),
+                    ("audio_approved", "Áudio aprovado"),
+                    ("new_hymnbook", "Novo hinário"),
+                ],
+                default="comment",
+                max_length=20,
+                verbose_name="Tipo",
+            ),
+        ),
+    ]
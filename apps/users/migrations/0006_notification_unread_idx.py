@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_notification_new_hymnbook"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("is_read", False)), fields=["recipient"], name="notification_unread_idx"
+            ),
+        ),
+    ]
@@ -13,6 +13,10 @@ class User(AbstractUser):
     bio = models.TextField(blank=True, help_text="Biografia do usuário")
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
 
+    # Contadores denormalizados (toggle_follow mantém com F(); reconcile_social_counts corrige)
+    followers_count = models.PositiveIntegerField("Seguidores", default=0, editable=False)
+    following_count = models.PositiveIntegerField("Seguindo", default=0, editable=False)
+
     class Meta:
         verbose_name = "Usuário"
         verbose_name_plural = "Usuários"
@@ -54,6 +58,7 @@ class Notification(models.Model):
     TYPE_FAVORITE = "favorite"
     TYPE_UPLOAD_APPROVED = "upload_approved"
     TYPE_AUDIO_APPROVED = "audio_approved"
+    TYPE_NEW_HYMNBOOK = "new_hymnbook"
 
     NOTIFICATION_TYPES = [
         (TYPE_COMMENT, "Comentário"),
@@ -61,6 +66,7 @@ class Notification(models.Model):
         (TYPE_FAVORITE, "Favorito"),
         (TYPE_UPLOAD_APPROVED, "Upload aprovado"),
         (TYPE_AUDIO_APPROVED, "Áudio aprovado"),
+        (TYPE_NEW_HYMNBOOK, "Novo hinário"),
     ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -84,6 +90,13 @@ class Notification(models.Model):
     message = models.TextField("Mensagem", max_length=500)
     link = models.CharField("Link", max_length=500, blank=True, help_text="URL para onde a notificação leva")
 
+    # Agrupamento (ver notifications.py): ações do mesmo tipo sobre o mesmo alvo viram uma linha
+    target_key = models.CharField("Alvo", max_length=100, blank=True, help_text="Ex.: hymn:<id>, user:<id>")
+    actor_count = models.PositiveIntegerField("Quantidade de autores", default=1)
+    actors = models.JSONField(
+        "Autores recentes", default=list, blank=True, help_text="Usernames, mais recente primeiro"
+    )
+
     # Estado
     is_read = models.BooleanField("Lida", default=False)
 
@@ -97,6 +110,11 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=["recipient", "-created_at"]),
             models.Index(fields=["is_read"]),
+            # Só as não lidas: mantém pequeno o índice usado pelo total de não lidas
+            models.Index(fields=["recipient"], condition=models.Q(is_read=False), name="notification_unread_idx"),
+            models.Index(
+                fields=["recipient", "notification_type", "target_key", "-created_at"], name="notification_group_idx"
+            ),
         ]
 
     def __str__(self):
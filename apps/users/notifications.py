@@ -0,0 +1,196 @@
+"""
+Envio de notificações, sempre fora da requisição (tasks do Celery).
+
+- notify(): uma ação para um destinatário. Ações do mesmo tipo sobre o mesmo alvo
+  (hino, perfil), dentro de NOTIFICATION_GROUP_WINDOW_HOURS e enquanto a notificação
+  não foi lida, atualizam uma única linha: contador de autores, amostra dos mais
+  recentes e mensagem ("ana, bruno e mais 12 pessoas favoritaram o hino X").
+- notify_followers(): uma ação para todos os seguidores do autor. Os seguidores são
+  lidos em lotes de NOTIFICATION_FANOUT_BATCH_SIZE por keyset e cada lote é gravado
+  com um bulk_create, pulando quem já recebeu a notificação do mesmo alvo.
+
+O total de não lidas de cada usuário (consultado pelo badge de todas as abas abertas)
+fica em cache e é descartado após o commit de qualquer mudança (ver signals.py).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.pagination import keyset_page
+
+from .models import Notification, User, UserFollow
+
+# Autores guardados na amostra (usernames); os nomes exibidos são os dois primeiros
+ACTOR_SAMPLE_SIZE = 5
+
+TITLES = {
+    Notification.TYPE_FAVORITE: "Novo favorito",
+    Notification.TYPE_COMMENT: "Novo comentário",
+    Notification.TYPE_FOLLOW: "Novo seguidor",
+    Notification.TYPE_NEW_HYMNBOOK: "Novo hinário",
+}
+
+# Verbo no singular e no plural, seguido do alvo
+MESSAGES = {
+    Notification.TYPE_FAVORITE: ("favoritou o hino {target}", "favoritaram o hino {target}"),
+    Notification.TYPE_COMMENT: ("comentou em {target}", "comentaram em {target}"),
+    Notification.TYPE_FOLLOW: ("começou a seguir você", "começaram a seguir você"),
+    Notification.TYPE_NEW_HYMNBOOK: ("publicou o hinário {target}", "publicaram o hinário {target}"),
+}
+
+# Ordem (e chave do keyset) dos seguidores no envio em massa; coberta pelo índice (followed, -created_at)
+FOLLOWERS_ORDERING = ["-created_at", "-id"]
+
+
+def _unread_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def unread_count(user):
+    """Notificações não lidas do usuário, do cache; no miss, COUNT pelo índice parcial de não lidas."""
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user.pk, is_read=False).count()
+        # Timeout curto: limita o tempo de um total calculado durante uma mudança ainda não confirmada
+        cache.set(key, count, settings.NOTIFICATION_UNREAD_CACHE_TIMEOUT)
+    return count
+
+
+def invalidate_unread_count(*user_ids):
+    """Descarta o total em cache dos usuários após o commit."""
+    keys = [_unread_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def describe_actors(actors, actor_count):
+    """Ex.: "ana", "ana e bruno", "ana, bruno e mais 12 pessoas"."""
+    names = actors[:2]
+    others = actor_count - len(names)
+    if others <= 0:
+        return " e ".join(names)
+    return f"{', '.join(names)} e mais {others} pessoa{'s' if others > 1 else ''}"
+
+
+def build_message(notification_type, actors, actor_count, target_label=""):
+    singular, plural = MESSAGES[notification_type]
+    verb = singular if actor_count == 1 else plural
+    return f"{describe_actors(actors, actor_count)} {verb.format(target=target_label)}"
+
+
+def notify(recipient, actor, notification_type, target_key, target_label="", link=""):
+    """Agenda a notificação após o commit da ação que a gerou (nunca para o próprio autor)."""
+    from .tasks import record_notification_task
+
+    if recipient is None or recipient.pk == actor.pk:
+        return
+    args = (recipient.pk, actor.pk, notification_type, target_key, target_label, link)
+    # Se o broker falhar, a ação continua valendo (a notificação não é crítica)
+    transaction.on_commit(lambda: record_notification_task.delay(*args), robust=True)
+
+
+def notify_followers(actor, notification_type, target_key, target_label="", link=""):
+    """Agenda a notificação de todos os seguidores do autor após o commit. Não consulta o banco."""
+    from .tasks import fan_out_notification_task
+
+    args = (actor.pk, notification_type, target_key, target_label, link)
+    transaction.on_commit(lambda: fan_out_notification_task.delay(*args), robust=True)
+
+
+def fan_out_to_followers(actor_id, notification_type, target_key, target_label="", link="", cursor=None):
+    """
+    Notifica um lote de seguidores do autor a partir do cursor.
+
+    Returns:
+        Tupla (notificações criadas, cursor do próximo lote ou None se acabou)
+    """
+    actor = User.objects.only("id", "username").get(pk=actor_id)
+    followers = UserFollow.objects.filter(followed_id=actor_id).values("id", "created_at", "follower_id")
+    rows, next_cursor = keyset_page(followers, FOLLOWERS_ORDERING, settings.NOTIFICATION_FANOUT_BATCH_SIZE, cursor)
+
+    recipient_ids = {row["follower_id"] for row in rows}
+    # Reexecuções da task (retry, evento duplicado) não notificam ninguém duas vezes
+    recipient_ids -= set(
+        Notification.objects.filter(
+            recipient_id__in=recipient_ids, notification_type=notification_type, target_key=target_key
+        ).values_list("recipient_id", flat=True)
+    )
+    recipient_ids.discard(actor.pk)
+
+    message = build_message(notification_type, [actor.username], 1, target_label)
+    notifications = Notification.objects.bulk_create(
+        [
+            Notification(
+                recipient_id=recipient_id,
+                sender=actor,
+                notification_type=notification_type,
+                target_key=target_key,
+                actors=[actor.username],
+                title=TITLES[notification_type],
+                message=message,
+                link=link,
+            )
+            for recipient_id in sorted(recipient_ids)
+        ]
+    )
+    # bulk_create não dispara post_save
+    invalidate_unread_count(*recipient_ids)
+    return len(notifications), next_cursor
+
+
+def record_notification(recipient_id, actor_id, notification_type, target_key, target_label="", link=""):
+    """
+    Agrupa a ação na notificação não lida do mesmo destinatário, tipo e alvo dentro da
+    janela, ou cria uma nova. Retorna a notificação.
+    """
+    actor = User.objects.only("id", "username").get(pk=actor_id)
+    since = timezone.now() - timedelta(hours=settings.NOTIFICATION_GROUP_WINDOW_HOURS)
+
+    with transaction.atomic():
+        # Trava a linha: duas ações simultâneas não perdem um autor. Duas primeiras ações
+        # simultâneas ainda podem criar duas linhas, o que só desfaz o agrupamento
+        notification = (
+            Notification.objects.select_for_update()
+            .filter(
+                recipient_id=recipient_id,
+                notification_type=notification_type,
+                target_key=target_key,
+                is_read=False,
+                created_at__gte=since,
+            )
+            .order_by("-created_at")
+            .first()
+        )
+        if notification is None:
+            actors = [actor.username]
+            return Notification.objects.create(
+                recipient_id=recipient_id,
+                sender=actor,
+                notification_type=notification_type,
+                target_key=target_key,
+                actors=actors,
+                actor_count=1,
+                title=TITLES[notification_type],
+                message=build_message(notification_type, actors, 1, target_label),
+                link=link,
+            )
+
+        # Quem já está na amostra (ex.: desfavoritou e favoritou de novo) não conta duas vezes
+        if actor.username in notification.actors:
+            notification.actors.remove(actor.username)
+        else:
+            notification.actor_count += 1
+        notification.actors = [actor.username] + notification.actors[: ACTOR_SAMPLE_SIZE - 1]
+        notification.sender = actor
+        notification.message = build_message(
+            notification_type, notification.actors, notification.actor_count, target_label
+        )
+        # created_at passa a ser a última atividade: a notificação volta ao topo da lista
+        notification.created_at = timezone.now()
+        notification.save(update_fields=["actors", "actor_count", "sender", "message", "created_at"])
+        return notification
@@ -0,0 +1,22 @@
+"""
+Invalidação do total de notificações não lidas em cache (notifications.unread_count).
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Notification
+from .notifications import invalidate_unread_count
+
+
+@receiver(post_save, sender=Notification)
+def notification_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    # Agrupar ações numa notificação existente não muda o total de não lidas
+    if created or update_fields is None or "is_read" in update_fields:
+        invalidate_unread_count(instance.recipient_id)
+
+
+@receiver(post_delete, sender=Notification)
+def notification_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        invalidate_unread_count(instance.recipient_id)
@@ -0,0 +1,26 @@
+"""
+Celery tasks for the users app.
+"""
+
+from celery import shared_task
+
+from .notifications import fan_out_to_followers, record_notification
+
+
+@shared_task
+def record_notification_task(recipient_id, actor_id, notification_type, target_key, target_label="", link=""):
+    """Grava (agrupando) uma notificação social. Retorna o id da notificação."""
+    return str(record_notification(recipient_id, actor_id, notification_type, target_key, target_label, link).pk)
+
+
+@shared_task
+def fan_out_notification_task(actor_id, notification_type, target_key, target_label="", link="", cursor=None):
+    """
+    Notifica os seguidores do autor, um lote por execução: cada execução agenda a do
+    próximo lote, então nenhuma task fica presa a milhares de seguidores.
+    Retorna quantas notificações este lote criou.
+    """
+    created, next_cursor = fan_out_to_followers(actor_id, notification_type, target_key, target_label, link, cursor)
+    if next_cursor:
+        fan_out_notification_task.delay(actor_id, notification_type, target_key, target_label, link, next_cursor)
+    return created
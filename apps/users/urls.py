@@ -13,6 +13,8 @@ urlpatterns = [
     path("perfil/<str:username>/editar/", views.profile_edit_view, name="profile_edit"),
     # Upload flow
     path("contribuir/", views.upload_view, name="upload"),
+    path("contribuir/analise/", views.upload_status_view, name="upload_status"),
+    path("contribuir/analise/progresso/", views.upload_progress_view, name="upload_progress"),
     path("contribuir/desambiguar/", views.upload_disambiguate_view, name="upload_disambiguate"),
     path("contribuir/preview/", views.upload_preview_view, name="upload_preview"),
     path("contribuir/confirmar/", views.upload_confirm_view, name="upload_confirm"),
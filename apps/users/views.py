@@ -3,12 +3,14 @@ Views for the users app.
 """
 
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
 from apps.hymns.models import HymnBook
 
 from .forms import ProfileEditForm
-from .models import User
+from .models import Notification, User
+from .notifications import notify_followers
 
 
 def profile_view(request, username):
@@ -23,10 +25,6 @@ def profile_view(request, username):
     # Get hymnbooks owned by this user
     hymnbooks = HymnBook.objects.filter(owner_user=profile_user).order_by("-created_at")
 
-    # Social counts
-    followers_count = UserFollow.objects.filter(followed=profile_user).count()
-    following_count = UserFollow.objects.filter(follower=profile_user).count()
-
     # Check if current user follows this profile
     is_following = False
     if request.user.is_authenticated and request.user != profile_user:
@@ -45,8 +43,9 @@ def profile_view(request, username):
         "profile_user": profile_user,
         "hymnbooks": hymnbooks,
         "is_own_profile": request.user.is_authenticated and request.user == profile_user,
-        "followers_count": followers_count,
-        "following_count": following_count,
+        # Contadores denormalizados, sem consultas extras
+        "followers_count": profile_user.followers_count,
+        "following_count": profile_user.following_count,
         "is_following": is_following,
         "favorites": favorites,
     }
@@ -86,14 +85,15 @@ def profile_edit_view(request, username):
 def upload_view(request):
     """
     Upload hymnbook with YAML file.
-    Step 1: Upload and detect duplicates.
+    Step 1: Upload and start duplicate detection in background.
     """
-    import tempfile
-
     import yaml
+    from django.db import transaction
 
-    from apps.hymns.disambiguation import find_duplicates_with_content
     from apps.hymns.forms import HymnBookUploadForm
+    from apps.hymns.ingestion import IngestionError, load_yaml, parse_hymnbook
+    from apps.hymns.models import StagedUpload
+    from apps.hymns.tasks import detect_upload_duplicates
 
     if request.method == "POST":
         form = HymnBookUploadForm(request.POST, request.FILES)
@@ -101,70 +101,40 @@ def upload_view(request):
             yaml_file = request.FILES["yaml_file"]
             # cover_image handled in preview step
 
-            # Salva arquivo temporário para parsing
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".yaml") as tmp_file:
-                for chunk in yaml_file.chunks():
-                    tmp_file.write(chunk)
-                tmp_path = tmp_file.name
-
             try:
-                # Parse YAML para extrair dados
-                with open(tmp_path, "r", encoding="utf-8") as f:
-                    data = yaml.safe_load(f)
-
+                # Parse direto do upload (sem arquivo temporário) e validação em uma passada.
                 # Aceita ambos formatos: com "hymn_book" como raiz ou campos diretos na raiz
-                hymn_book_data = data.get("hymn_book") if "hymn_book" in data else data
-                name = hymn_book_data.get("name") if hymn_book_data else None
-                hymns_data = hymn_book_data.get("hymns", []) if hymn_book_data else []
-
-                # Validação: nome é obrigatório
-                if not name:
+                hymn_book_data, _warnings = parse_hymnbook(load_yaml(yaml_file), strict=False)
+            except IngestionError as e:
+                if e.code == "missing_name":
                     form.add_error("yaml_file", "O arquivo YAML deve conter o campo 'name' com o nome do hinário.")
-                    return render(request, "users/upload.html", {"form": form})
-
-                # Converte dados de hinos para formato esperado
-                hymns_list = [
-                    {
-                        "number": h.get("number"),
-                        "title": h.get("title", ""),
-                        "text": h.get("text", ""),
-                    }
-                    for h in hymns_data
-                ]
-
-                # Detecta duplicatas
-                duplicates = find_duplicates_with_content(
-                    name=name,
-                    hymns=hymns_list,
-                    name_threshold=0.7,
-                    content_threshold=0.8,
-                )
-
-                # Armazena dados na sessão para próxima etapa
-                request.session["upload_data"] = {
-                    "yaml_content": str(data),  # Serializa para JSON
-                    "yaml_filename": yaml_file.name,
-                    "name": name,
-                    "hymns_count": len(hymns_data),
-                }
-
-                # Se encontrou match exato ou alta confiança, mostra página de desambiguação
-                if duplicates["exact_match"] or duplicates["high_confidence"]:
-                    request.session["duplicates"] = {
-                        "exact_match": str(duplicates["exact_match"].id) if duplicates["exact_match"] else None,
-                        "high_confidence": [
-                            (str(hb.id), name_score, content_score)
-                            for hb, name_score, content_score in duplicates["high_confidence"]
-                        ],
-                    }
-
-                    return redirect("users:upload_disambiguate")
-
-                # Se não há duplicatas, prossegue com preview
-                return redirect("users:upload_preview")
-
-            except Exception as e:
+                else:
+                    form.add_error("yaml_file", f"Erro ao processar YAML: {str(e)}")
+                return render(request, "users/upload.html", {"form": form})
+            except (yaml.YAMLError, ValueError) as e:
+                # ValueError: valores que o loader converte ao ler (ex.: received_at: 2020-13-45)
                 form.add_error("yaml_file", f"Erro ao processar YAML: {str(e)}")
+                return render(request, "users/upload.html", {"form": form})
+
+            # Guarda os dados uma única vez (comprimidos); a sessão leva apenas o ID
+            staged_upload = StagedUpload(
+                user=request.user,
+                filename=yaml_file.name,
+                name=hymn_book_data["name"],
+                hymns_count=len(hymn_book_data["hymns"]),
+            )
+            staged_upload.set_payload(hymn_book_data)
+            staged_upload.save()
+
+            _clear_upload_session(request)
+            request.session["staged_upload_id"] = str(staged_upload.id)
+
+            # Detecção de duplicatas roda em background após o commit; o navegador acompanha o progresso.
+            # Se o broker falhar, o upload continua pendente e expira com os demais
+            staged_upload_id = str(staged_upload.id)
+            transaction.on_commit(lambda: detect_upload_duplicates.delay(staged_upload_id), robust=True)
+
+            return redirect("users:upload_status")
     else:
         form = HymnBookUploadForm()
 
@@ -176,6 +146,79 @@ def upload_view(request):
     return render(request, "users/upload.html", context)
 
 
+def _get_staged_upload(request, with_payload=True):
+    """Return the non-expired StagedUpload referenced by the session, or None."""
+    from django.utils import timezone
+
+    from apps.hymns.models import StagedUpload
+
+    staged_upload_id = request.session.get("staged_upload_id")
+    if not staged_upload_id:
+        return None
+
+    queryset = StagedUpload.objects.filter(id=staged_upload_id, user=request.user, expires_at__gt=timezone.now())
+    if not with_payload:
+        queryset = queryset.defer("payload")
+
+    return queryset.first()
+
+
+def _clear_upload_session(request):
+    """Remove upload flow keys from the session."""
+    request.session.pop("staged_upload_id", None)
+    request.session.pop("version_info", None)
+
+
+def _has_strong_duplicates(staged_upload):
+    """True if duplicate detection found an exact match or high-confidence candidates."""
+    duplicates = staged_upload.duplicates
+    return bool(duplicates.get("exact_match") or duplicates.get("high_confidence"))
+
+
+@login_required
+def upload_status_view(request):
+    """
+    Step 1b: Wait for duplicate detection to finish.
+    Redirects to disambiguation or preview once the background job is done.
+    """
+    staged_upload = _get_staged_upload(request, with_payload=False)
+
+    if not staged_upload:
+        return redirect("users:upload")
+
+    if staged_upload.status == staged_upload.STATUS_DONE:
+        # Se encontrou match exato ou alta confiança, mostra página de desambiguação
+        if _has_strong_duplicates(staged_upload):
+            return redirect("users:upload_disambiguate")
+
+        # Se não há duplicatas, prossegue com preview
+        return redirect("users:upload_preview")
+
+    context = {
+        "staged_upload": staged_upload,
+    }
+
+    return render(request, "users/upload_status.html", context)
+
+
+@login_required
+def upload_progress_view(request):
+    """Retorna progresso e classificação da detecção de duplicatas (AJAX polling)."""
+    staged_upload = _get_staged_upload(request, with_payload=False)
+
+    if not staged_upload:
+        return JsonResponse({"error": "Nenhum upload em andamento"}, status=404)
+
+    return JsonResponse(
+        {
+            "status": staged_upload.status,
+            "progress": staged_upload.progress,
+            "duplicates": staged_upload.duplicates if staged_upload.status == staged_upload.STATUS_DONE else None,
+            "error": staged_upload.error,
+        }
+    )
+
+
 @login_required
 def upload_disambiguate_view(request):
     """
@@ -183,16 +226,18 @@ def upload_disambiguate_view(request):
     """
     from apps.hymns.forms import DisambiguationChoiceForm
 
-    # Recupera dados da sessão
-    upload_data = request.session.get("upload_data")
-    duplicates_data = request.session.get("duplicates")
+    staged_upload = _get_staged_upload(request, with_payload=False)
 
-    if not upload_data or not duplicates_data:
+    if (
+        not staged_upload
+        or staged_upload.status != staged_upload.STATUS_DONE
+        or not _has_strong_duplicates(staged_upload)
+    ):
         return redirect("users:upload")
 
     # Busca hinários similares no banco
-    exact_match_id = duplicates_data.get("exact_match")
-    high_confidence = duplicates_data.get("high_confidence", [])
+    exact_match_id = staged_upload.duplicates.get("exact_match")
+    high_confidence = staged_upload.duplicates.get("high_confidence", [])
 
     exact_match = None
     similar_hymnbooks = []
@@ -216,9 +261,9 @@ def upload_disambiguate_view(request):
             choice = form.cleaned_data["choice"]
 
             if choice == DisambiguationChoiceForm.CHOICE_CANCEL:
-                # Limpa sessão e volta
-                request.session.pop("upload_data", None)
-                request.session.pop("duplicates", None)
+                # Descarta upload e volta
+                staged_upload.delete()
+                _clear_upload_session(request)
                 return redirect("users:upload")
 
             elif choice == DisambiguationChoiceForm.CHOICE_CREATE_NEW:
@@ -243,7 +288,7 @@ def upload_disambiguate_view(request):
         "form": form,
         "exact_match": exact_match,
         "similar_hymnbooks": similar_hymnbooks,
-        "upload_data": upload_data,
+        "staged_upload": staged_upload,
     }
 
     return render(request, "users/upload_disambiguate.html", context)
@@ -254,21 +299,18 @@ def upload_preview_view(request):
     """
     Step 3: Preview hymnbook data before creating.
     """
-    import ast
-
     from django.db import transaction
 
-    from apps.hymns.models import Hymn, HymnBook
-    from apps.search.typesense_client import index_hymn
+    from apps.hymns.ingestion import bulk_create_hymns
+    from apps.hymns.models import HymnBook
+    from apps.search.tasks import index_hymns_task
 
-    upload_data = request.session.get("upload_data")
+    staged_upload = _get_staged_upload(request)
 
-    if not upload_data:
+    if not staged_upload:
         return redirect("users:upload")
 
-    # Parse YAML content de volta
-    yaml_content = ast.literal_eval(upload_data["yaml_content"])
-    hymn_book_data = yaml_content.get("hymn_book", {})
+    hymn_book_data = staged_upload.payload_data
 
     if request.method == "POST":
         # Usuário confirmou criação
@@ -283,45 +325,41 @@ def upload_preview_view(request):
                     description=hymn_book_data.get("description", ""),
                 )
 
-                # Cria hinos
-                hymns_data = hymn_book_data.get("hymns", [])
-                for hymn_data in hymns_data:
-                    hymn = Hymn.objects.create(
-                        hymn_book=hymnbook,
-                        number=hymn_data.get("number"),
-                        title=hymn_data.get("title", ""),
-                        text=hymn_data.get("text", ""),
-                        received_at=hymn_data.get("received_at"),
-                        offered_to=hymn_data.get("offered_to", ""),
-                        style=hymn_data.get("style", ""),
-                        extra_instructions=hymn_data.get("extra_instructions", ""),
-                        repetitions=hymn_data.get("repetitions", ""),
-                    )
-
-                    # Indexa no TypeSense
-                    try:
-                        index_hymn(hymn)
-                    except Exception:
-                        # Se falhar indexação, continua (não crítico)
-                        pass
+                # Cria hinos em lote
+                hymns = bulk_create_hymns(hymnbook, hymn_book_data["hymns"])
+
+                staged_upload.delete()
+
+                # Indexa no TypeSense em background, com um único import, depois do commit.
+                # Se o broker falhar, o hinário continua criado (indexação não é crítica).
+                hymn_ids = [str(hymn.id) for hymn in hymns]
+                transaction.on_commit(lambda: index_hymns_task.delay(hymn_ids), robust=True)
+
+                # Seguidores do usuário são notificados em background, em lotes
+                notify_followers(
+                    request.user,
+                    Notification.TYPE_NEW_HYMNBOOK,
+                    target_key=f"hymnbook:{hymnbook.pk}",
+                    target_label=hymnbook.name,
+                    link=f"/hinarios/{hymnbook.slug}/",
+                )
 
             # Limpa sessão
-            request.session.pop("upload_data", None)
-            request.session.pop("duplicates", None)
+            _clear_upload_session(request)
 
             # Redireciona para hinário criado
             return redirect("hymns:hymnbook_detail", slug=hymnbook.slug)
 
         except Exception as e:
             context = {
-                "upload_data": upload_data,
+                "staged_upload": staged_upload,
                 "hymn_book_data": hymn_book_data,
                 "error": f"Erro ao criar hinário: {str(e)}",
             }
             return render(request, "users/upload_preview.html", context)
 
     context = {
-        "upload_data": upload_data,
+        "staged_upload": staged_upload,
         "hymn_book_data": hymn_book_data,
         "hymns_preview": hymn_book_data.get("hymns", [])[:5],  # Mostra primeiros 5
     }
@@ -334,16 +372,15 @@ def upload_confirm_view(request):
     """
     Step 3b: Confirm adding as version.
     """
-    import tempfile
-
     import yaml
+    from django.core.files.base import ContentFile
 
     from apps.hymns.models import HymnBook, HymnBookVersion
 
-    upload_data = request.session.get("upload_data")
+    staged_upload = _get_staged_upload(request)
     version_info = request.session.get("version_info")
 
-    if not upload_data or not version_info:
+    if not staged_upload or not version_info:
         return redirect("users:upload")
 
     hymnbook = HymnBook.objects.get(id=version_info["hymnbook_id"])
@@ -351,41 +388,30 @@ def upload_confirm_view(request):
     if request.method == "POST":
         # Usuário confirmou criação de versão
         try:
-            # Salva YAML content em arquivo temporário
-            yaml_content = upload_data["yaml_content"]
-
-            with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".yaml", encoding="utf-8") as tmp_file:
-                # Reconstrói YAML de string
-                import ast
-
-                data = ast.literal_eval(yaml_content)
-                yaml.dump(data, tmp_file, allow_unicode=True)
-                tmp_path = tmp_file.name
+            # Reconstrói o YAML a partir dos dados já parseados, em memória
+            yaml_content = yaml.dump({"hymn_book": staged_upload.payload_data}, allow_unicode=True)
 
             # Cria versão
-            from django.core.files import File
-
-            with open(tmp_path, "rb") as f:
-                version = HymnBookVersion.objects.create(
-                    hymn_book=hymnbook,
-                    version_name=version_info["version_name"],
-                    description=f"Enviado por {request.user.get_full_name() or request.user.username}",
-                    uploaded_by=request.user,
-                    is_primary=False,  # Não marca como primária automaticamente
-                )
-                version.yaml_file.save(upload_data["yaml_filename"], File(f))
+            version = HymnBookVersion.objects.create(
+                hymn_book=hymnbook,
+                version_name=version_info["version_name"],
+                description=f"Enviado por {request.user.get_full_name() or request.user.username}",
+                uploaded_by=request.user,
+                is_primary=False,  # Não marca como primária automaticamente
+            )
+            version.yaml_file.save(staged_upload.filename, ContentFile(yaml_content.encode("utf-8")))
+
+            staged_upload.delete()
 
             # Limpa sessão
-            request.session.pop("upload_data", None)
-            request.session.pop("duplicates", None)
-            request.session.pop("version_info", None)
+            _clear_upload_session(request)
 
             # Redireciona para hinário
             return redirect("hymns:hymnbook_detail", slug=hymnbook.slug)
 
         except Exception as e:
             context = {
-                "upload_data": upload_data,
+                "staged_upload": staged_upload,
                 "version_info": version_info,
                 "hymnbook": hymnbook,
                 "error": f"Erro ao criar versão: {str(e)}",
@@ -393,7 +419,7 @@ def upload_confirm_view(request):
             return render(request, "users/upload_confirm.html", context)
 
     context = {
-        "upload_data": upload_data,
+        "staged_upload": staged_upload,
         "version_info": version_info,
         "hymnbook": hymnbook,
     }
@@ -2,13 +2,18 @@
 Views sociais para usuários (follow, notifications).
 """
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.db.models import F
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.views.decorators.http import require_POST
 
 from .models import Notification, User, UserFollow
+from .notifications import invalidate_unread_count, notify, unread_count
 
 
 @login_required
@@ -22,11 +27,23 @@ def toggle_follow(request, username):
         messages.error(request, "Você não pode seguir a si mesmo.")
         return redirect("users:profile", username=username)
 
-    follow, created = UserFollow.objects.get_or_create(follower=request.user, followed=user_to_follow)
+    with transaction.atomic():
+        follow, created = UserFollow.objects.get_or_create(follower=request.user, followed=user_to_follow)
+
+        if created:
+            User.objects.filter(pk=user_to_follow.pk).update(followers_count=F("followers_count") + 1)
+            User.objects.filter(pk=request.user.pk).update(following_count=F("following_count") + 1)
+        else:
+            follow.delete()
+            User.objects.filter(pk=user_to_follow.pk, followers_count__gt=0).update(
+                followers_count=F("followers_count") - 1
+            )
+            User.objects.filter(pk=request.user.pk, following_count__gt=0).update(
+                following_count=F("following_count") - 1
+            )
 
     if not created:
         # Já seguia, então deixa de seguir
-        follow.delete()
         is_following = False
         message = f"Você deixou de seguir {user_to_follow.username}"
     else:
@@ -35,13 +52,13 @@ def toggle_follow(request, username):
         message = f"Você agora segue {user_to_follow.username}"
 
         # Criar notificação
-        Notification.objects.create(
-            recipient=user_to_follow,
-            sender=request.user,
-            notification_type=Notification.TYPE_FOLLOW,
-            title="Novo seguidor",
-            message=f"{request.user.username} começou a seguir você",
-            link=f"/perfil/{request.user.username}/",
+        # Agrupada com outros novos seguidores; o link leva à lista de seguidores
+        notify(
+            user_to_follow,
+            request.user,
+            Notification.TYPE_FOLLOW,
+            target_key=f"user:{user_to_follow.pk}",
+            link=f"/perfil/{user_to_follow.username}/seguidores/",
         )
 
     if request.headers.get("X-Requested-With") == "XMLHttpRequest":
@@ -54,11 +71,12 @@ def toggle_follow(request, username):
 @login_required
 def notifications_list(request):
     """Listar notificações do usuário."""
-    # Marcar não lidas como lidas
-    request.user.notifications.filter(is_read=False).update(is_read=True)
+    # Marcar não lidas como lidas (update() não dispara post_save)
+    if request.user.notifications.filter(is_read=False).update(is_read=True):
+        invalidate_unread_count(request.user.pk)
 
     # Buscar últimas 50
-    notifications = request.user.notifications.all()[:50]
+    notifications = request.user.notifications.select_related("sender")[:50]
 
     return render(request, "users/notifications.html", {"notifications": notifications})
 
@@ -80,10 +98,16 @@ def mark_notification_read(request, notification_id):
 
 @login_required
 def unread_notifications_count(request):
-    """Retorna contagem de notificações não lidas (AJAX)."""
-    count = request.user.notifications.filter(is_read=False).count()
-
-    return JsonResponse({"count": count})
+    """
+    Retorna contagem de notificações não lidas (AJAX, consultada periodicamente por cada aba).
+
+    Vem do cache na maioria das chamadas; o cabeçalho privado permite ao navegador
+    reusar a resposta entre abas por NOTIFICATION_UNREAD_MAX_AGE segundos.
+    """
+    response = JsonResponse({"count": unread_count(request.user)})
+    patch_cache_control(response, private=True, max_age=settings.NOTIFICATION_UNREAD_MAX_AGE)
+    patch_vary_headers(response, ["Cookie"])
+    return response
 
 
 @login_required
@@ -158,6 +158,10 @@ STATICFILES_DIRS = [
 ]
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Exportação estática das páginas públicas (comando build_static_site)
+STATIC_SITE_ROOT = env("STATIC_SITE_ROOT", default=str(BASE_DIR / "static_site"))
+STATIC_SITE_HOST = env("STATIC_SITE_HOST", default=ALLOWED_HOSTS[0])
+
 # Media files
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
@@ -193,6 +197,68 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULE = {
+    "cleanup-expired-staged-uploads": {
+        "task": "apps.hymns.tasks.cleanup_expired_staged_uploads",
+        "schedule": 60 * 60,  # a cada hora
+    },
+    "reconcile-social-counts": {
+        "task": "apps.hymns.tasks.reconcile_social_counts",
+        "schedule": 24 * 60 * 60,  # uma vez por dia
+    },
+    "refresh-site-stats": {
+        "task": "apps.hymns.tasks.refresh_site_stats",
+        "schedule": 15 * 60,  # a cada 15 minutos
+    },
+    "repair-hymn-counts": {
+        "task": "apps.hymns.tasks.repair_hymn_counts",
+        "schedule": 24 * 60 * 60,  # uma vez por dia
+    },
+    "prune-tombstones": {
+        "task": "apps.hymns.tasks.prune_tombstones",
+        "schedule": 24 * 60 * 60,  # uma vez por dia
+    },
+}
+
+# Cache (Redis); páginas anônimas de hinos/hinários são versionadas por objeto (apps/hymns/page_cache.py)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": env("CACHE_URL", default=REDIS_URL),
+        "KEY_PREFIX": "hinos",
+    }
+}
+PAGE_CACHE_TIMEOUT = env.int("PAGE_CACHE_TIMEOUT", default=24 * 60 * 60)
+# Tempo que navegadores/proxies podem reusar uma página anônima sem revalidar (ETag)
+PAGE_BROWSER_MAX_AGE = env.int("PAGE_BROWSER_MAX_AGE", default=60)
+# Acima deste número de linhas, os totais da home usam a estimativa do PostgreSQL (0 = sempre COUNT exato)
+SITE_STATS_ESTIMATE_THRESHOLD = env.int("SITE_STATS_ESTIMATE_THRESHOLD", default=0)
+# Hinos por página no índice do hinário; hinários maiores carregam o restante via JSON
+HYMNBOOK_TOC_PAGE_SIZE = env.int("HYMNBOOK_TOC_PAGE_SIZE", default=200)
+# Comentários por página na página do hino; os seguintes vêm pelo botão "carregar mais"
+COMMENTS_PAGE_SIZE = env.int("COMMENTS_PAGE_SIZE", default=20)
+# Versões de pacote offline mantidas por hinário (clientes com versões mais antigas baixam o pacote completo)
+HYMNBOOK_BUNDLE_HISTORY = env.int("HYMNBOOK_BUNDLE_HISTORY", default=10)
+# API JSON (apps/hymns/api.py): itens por página (?limit=) padrão e máximo
+API_PAGE_SIZE = env.int("API_PAGE_SIZE", default=100)
+API_MAX_PAGE_SIZE = env.int("API_MAX_PAGE_SIZE", default=500)
+# Feed de sincronização (apps/hymns/sync.py): atraso para transações em andamento e retenção das remoções.
+# O atraso deve superar a transação de escrita mais longa (importações com capa): ver o limite em sync.py
+SYNC_LAG_SECONDS = env.int("SYNC_LAG_SECONDS", default=60)
+SYNC_TOMBSTONE_TTL_DAYS = env.int("SYNC_TOMBSTONE_TTL_DAYS", default=90)
+# URLs por página de cada seção do sitemap (o protocolo permite até 50 mil)
+SITEMAP_PAGE_SIZE = env.int("SITEMAP_PAGE_SIZE", default=10000)
+
+# Ações sobre o mesmo alvo dentro desta janela são agrupadas em uma notificação (apps/users/notifications.py)
+NOTIFICATION_GROUP_WINDOW_HOURS = env.int("NOTIFICATION_GROUP_WINDOW_HOURS", default=24)
+# Seguidores notificados por lote (um bulk_create por lote) ao publicar um hinário
+NOTIFICATION_FANOUT_BATCH_SIZE = env.int("NOTIFICATION_FANOUT_BATCH_SIZE", default=1000)
+# Total de não lidas: validade no cache do servidor e no navegador (cabeçalho privado)
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = env.int("NOTIFICATION_UNREAD_CACHE_TIMEOUT", default=5 * 60)
+NOTIFICATION_UNREAD_MAX_AGE = env.int("NOTIFICATION_UNREAD_MAX_AGE", default=15)
+
+# Uploads de hinários em andamento expiram após este período
+STAGED_UPLOAD_TTL_HOURS = env.int("STAGED_UPLOAD_TTL_HOURS", default=24)
 
 # django-allauth settings
 ACCOUNT_LOGIN_METHODS = {"email"}
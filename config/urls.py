@@ -10,11 +10,16 @@ from wagtail import urls as wagtail_urls
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
+from apps.hymns import sitemaps
+
 urlpatterns = [
     path("django-admin/", admin.site.urls),
     path("admin/", include(wagtailadmin_urls)),
     path("documents/", include(wagtaildocs_urls)),
     path("accounts/", include("allauth.urls")),
+    # Sitemaps (antes do catch-all do Wagtail)
+    path("sitemap.xml", sitemaps.sitemap_index_view, name="sitemap_index"),
+    path("sitemap-<str:section>.xml", sitemaps.sitemap_section_view, name="sitemap_section"),
     # Users app URLs
     path("", include("apps.users.urls")),
     # Hymns app URLs (before Wagtail catch-all)
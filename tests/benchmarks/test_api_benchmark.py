@@ -0,0 +1,69 @@
+"""
+Benchmark for the JSON API against the equivalent HTML page.
+
+Compares serving all hymns of a 500-hymn book through /api/v1/hinarios/<slug>/hinos/
+(serialized from .values()) with rendering the hymn book HTML page. The page cache
+is cleared before every request, so both sides hit the database and serialize.
+
+Run with output to see the numbers:
+    pytest tests/benchmarks/ -m benchmark -s
+"""
+
+import time
+
+import pytest
+from django.core.cache import cache
+from django.urls import reverse
+
+from apps.hymns.models import Hymn, HymnBook
+
+HYMNS = 500
+
+
+@pytest.fixture
+def large_hymn_book(db, settings):
+    settings.HYMNBOOK_TOC_PAGE_SIZE = HYMNS
+    text = "\n".join(["Eu vivo na floresta", "Tenho meus ensinos", "Tenho o meu mestre", "Que me ensina"] * 6)
+    hymn_book = HymnBook.objects.create(name="Hinário de Benchmark", owner_name="Dono")
+    Hymn.objects.bulk_create(
+        [Hymn(hymn_book=hymn_book, number=n, title=f"Hino {n}", text=text, style="Valsa") for n in range(1, HYMNS + 1)]
+    )
+    return hymn_book
+
+
+def measure(func, repeat=5):
+    """Best wall-clock time of `repeat` uncached runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        cache.clear()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.benchmark
+def test_api_vs_html(client, large_hymn_book):
+    """The table-of-contents JSON (and even the full-text JSON) is cheaper than the HTML page."""
+    html_url = reverse("hymns:hymnbook_detail", kwargs={"slug": large_hymn_book.slug})
+    api_url = reverse("hymns:api_hymnbook_hymns", kwargs={"slug": large_hymn_book.slug})
+
+    def get(url, params=None):
+        response = client.get(url, {**(params or {}), "limit": HYMNS}, HTTP_ACCEPT_ENCODING="gzip")
+        assert response.status_code == 200
+        return response
+
+    elapsed_html = measure(lambda: get(html_url))
+    elapsed_api = measure(lambda: get(api_url))
+    elapsed_api_full = measure(lambda: get(api_url, {"fields": "id,number,title,text,style"}))
+
+    html_size = len(get(html_url).content)
+    api_size = len(get(api_url).content)
+
+    print(
+        f"\n{HYMNS} hymns: HTML page {elapsed_html * 1000:.1f} ms ({html_size / 1024:.0f} KB), "
+        f"API TOC {elapsed_api * 1000:.1f} ms ({api_size / 1024:.0f} KB gzip), "
+        f"API with text {elapsed_api_full * 1000:.1f} ms "
+        f"({elapsed_html / elapsed_api:.1f}x faster than HTML)"
+    )
+    assert elapsed_api < elapsed_html
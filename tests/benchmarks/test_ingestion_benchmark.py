@@ -0,0 +1,81 @@
+"""
+Benchmark for YAML hymnbook ingestion throughput.
+
+Run with output to see the numbers:
+    pytest tests/benchmarks/ -m benchmark -s
+"""
+
+import io
+import time
+
+import pytest
+import yaml
+
+from apps.hymns.ingestion import load_yaml, parse_hymnbook
+
+HYMNS = 2000
+
+
+@pytest.fixture(scope="module")
+def large_hymnbook_yaml():
+    """A hymnbook with HYMNS hymns of realistic length, as YAML bytes."""
+    text = "\n".join(["Eu vivo na floresta", "Tenho meus ensinos", "Tenho o meu mestre", "Que me ensina"] * 6)
+    data = {
+        "hymn_book": {
+            "name": "Hinário de Benchmark",
+            "owner": "Dono",
+            "hymns": [
+                {"number": n, "title": f"Hino {n}", "text": text, "received_at": "1930-07-15", "style": "Valsa"}
+                for n in range(1, HYMNS + 1)
+            ],
+        }
+    }
+    return yaml.dump(data, allow_unicode=True).encode("utf-8")
+
+
+def measure(func, repeat=3):
+    """Best wall-clock time of `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.benchmark
+def test_ingestion_throughput(large_hymnbook_yaml):
+    """Load + validate throughput, compared against the pure-Python SafeLoader."""
+    megabytes = len(large_hymnbook_yaml) / (1024 * 1024)
+
+    def ingest():
+        parse_hymnbook(load_yaml(io.BytesIO(large_hymnbook_yaml)))
+
+    def ingest_pure_python():
+        parse_hymnbook(yaml.load(io.BytesIO(large_hymnbook_yaml), Loader=yaml.SafeLoader))
+
+    elapsed = measure(ingest)
+    elapsed_python = measure(ingest_pure_python, repeat=1)
+
+    print(
+        f"\ningestion: {HYMNS / elapsed:,.0f} hymns/s ({megabytes / elapsed:.2f} MB/s); "
+        f"pure-Python SafeLoader: {HYMNS / elapsed_python:,.0f} hymns/s "
+        f"(libyaml: {yaml.__with_libyaml__})"
+    )
+
+    if yaml.__with_libyaml__:
+        assert elapsed < elapsed_python
+
+
+@pytest.mark.benchmark
+def test_validation_is_linear(large_hymnbook_yaml):
+    """Validating 10x more hymns costs roughly 10x, not 100x (duplicate check is O(n))."""
+    data = load_yaml(io.BytesIO(large_hymnbook_yaml))
+    small = {"hymn_book": {**data["hymn_book"], "hymns": data["hymn_book"]["hymns"][: HYMNS // 10]}}
+
+    elapsed_small = measure(lambda: parse_hymnbook(small))
+    elapsed_large = measure(lambda: parse_hymnbook(data))
+
+    print(f"\nvalidation: {HYMNS / elapsed_large:,.0f} hymns/s")
+
+    assert elapsed_large < elapsed_small * 30
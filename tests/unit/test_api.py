@@ -0,0 +1,171 @@
+"""
+Tests for the read-only JSON API (apps/hymns/api.py).
+"""
+
+import gzip
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.hymns.models import HymnAudio, HymnBook
+
+
+@pytest.fixture
+def hymns(hymn_book, hymn_factory):
+    return [
+        hymn_factory(hymn_book, number=number, title=f"Hino {number}", text="Lua branca " * 30, style="Valsa")
+        for number in range(1, 6)
+    ]
+
+
+def collect(client, url, **params):
+    """Follow the "next" links; return every result."""
+    data = client.get(url, params).json()
+    results = data["results"]
+    while data["next"]:
+        data = client.get(data["next"]).json()
+        results += data["results"]
+    return results
+
+
+@pytest.mark.django_db
+class TestHymnBookApi:
+    """Tests for the hymn book endpoints."""
+
+    def test_list_is_keyset_paginated(self, client):
+        """Walking the next links returns every hymn book once, by name."""
+        for name in ["Cruzeiro", "Amor", "Mar", "Sol", "Brilho"]:
+            HymnBook.objects.create(name=name, owner_name="Dono")
+
+        results = collect(client, reverse("hymns:api_hymnbook_list"), limit=2)
+
+        assert [book["name"] for book in results] == ["Amor", "Brilho", "Cruzeiro", "Mar", "Sol"]
+        assert set(results[0]) == {"id", "slug", "name", "owner_name", "hymns_total"}
+
+    def test_detail_returns_all_fields(self, client, hymn_book_factory, hymn_factory):
+        """The detail endpoint defaults to every public field."""
+        hymn_book = hymn_book_factory(description="Hinário")
+        hymn_factory(hymn_book)
+
+        data = client.get(reverse("hymns:api_hymnbook_detail", kwargs={"slug": hymn_book.slug})).json()
+
+        assert data["description"] == "Hinário"
+        assert data["hymns_total"] == 1
+
+    def test_unknown_hymn_book_is_404(self, client, db):
+        """Missing hymn books are not found."""
+        response = client.get(reverse("hymns:api_hymnbook_detail", kwargs={"slug": "nao-existe"}))
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestHymnApi:
+    """Tests for the hymn endpoints."""
+
+    def test_hymns_of_book_page_by_number(self, client, hymn_book, hymns):
+        """Hymns come in number order across pages."""
+        url = reverse("hymns:api_hymnbook_hymns", kwargs={"slug": hymn_book.slug})
+
+        results = collect(client, url, limit=2)
+
+        assert [hymn["number"] for hymn in results] == [1, 2, 3, 4, 5]
+        assert "text" not in results[0]
+
+    def test_sparse_fieldsets(self, client, hymn_book, hymns):
+        """?fields= selects exactly the requested fields."""
+        url = reverse("hymns:api_hymnbook_hymns", kwargs={"slug": hymn_book.slug})
+
+        data = client.get(url, {"fields": "title,text", "limit": 2}).json()
+
+        assert set(data["results"][0]) == {"title", "text"}
+        assert "fields=title%2Ctext" in data["next"]
+
+    def test_unknown_field_is_bad_request(self, client, hymn_book):
+        """Unknown fields are rejected with the list of available ones."""
+        url = reverse("hymns:api_hymnbook_hymns", kwargs={"slug": hymn_book.slug})
+
+        response = client.get(url, {"fields": "title,senha"})
+
+        assert response.status_code == 400
+        assert "senha" in response.json()["error"]
+
+    def test_invalid_cursor_is_bad_request(self, client, hymn_book):
+        """Tampered cursors are rejected."""
+        url = reverse("hymns:api_hymnbook_hymns", kwargs={"slug": hymn_book.slug})
+
+        assert client.get(url, {"cursor": "xyz"}).status_code == 400
+
+    def test_hymn_detail_includes_hymn_book(self, client, hymn_book, hymns):
+        """A hymn carries the slug and name of its hymn book."""
+        hymn = hymns[0]
+
+        data = client.get(reverse("hymns:api_hymn_detail", kwargs={"pk": hymn.pk}), {"fields": "title"}).json()
+
+        assert data == {"title": "Hino 1", "hymn_book": {"slug": hymn_book.slug, "name": "O Cruzeiro"}}
+
+    def test_audios_list_only_approved_with_urls(self, client, hymns):
+        """Only approved audios are listed, with the file URL."""
+        hymn = hymns[0]
+        HymnAudio.objects.create(hymn=hymn, audio_file="hymns/audio/a.mp3", title="Coro", is_approved=True)
+        HymnAudio.objects.create(hymn=hymn, audio_file="hymns/audio/b.mp3", is_approved=False)
+
+        data = client.get(reverse("hymns:api_hymn_audios", kwargs={"pk": hymn.pk})).json()
+
+        assert [audio["title"] for audio in data["results"]] == ["Coro"]
+        assert data["results"][0]["audio_file"].endswith("hymns/audio/a.mp3")
+
+
+@pytest.mark.django_db
+class TestSearchApi:
+    """Tests for the search endpoint."""
+
+    def test_falls_back_to_database(self, client, hymns):
+        """Without TypeSense the database is searched."""
+        with patch("apps.hymns.api.search_hymns", side_effect=Exception("offline")):
+            data = client.get(reverse("hymns:api_search"), {"q": "Hino 3"}).json()
+
+        assert data["total"] == 1
+        assert data["results"][0]["title"] == "Hino 3"
+
+    def test_uses_typesense_order(self, client, hymns):
+        """TypeSense hits are returned in relevance order."""
+        ids = [str(hymns[n - 1].pk) for n in (4, 2)]
+        hits = {"found": 2, "hits": [{"document": {"id": hymn_id}} for hymn_id in ids]}
+        with patch("apps.hymns.api.search_hymns", return_value=hits):
+            data = client.get(reverse("hymns:api_search"), {"q": "hino", "fields": "number"}).json()
+
+        assert [hymn["number"] for hymn in data["results"]] == [4, 2]
+
+    def test_query_is_required(self, client, db):
+        """An empty query is a bad request."""
+        assert client.get(reverse("hymns:api_search")).status_code == 400
+
+
+@pytest.mark.django_db
+class TestApiHttp:
+    """Compression and conditional GET."""
+
+    def test_gzip_when_accepted(self, client, hymn_book, hymns):
+        """Responses are gzip-compressed when the client accepts it."""
+        url = reverse("hymns:api_hymnbook_hymns", kwargs={"slug": hymn_book.slug})
+
+        response = client.get(url, {"fields": "text"}, HTTP_ACCEPT_ENCODING="gzip")
+
+        assert response["Content-Encoding"] == "gzip"
+        assert b"Lua branca" in gzip.decompress(response.content)
+        assert "Accept-Encoding" in response["Vary"]
+
+    def test_etag_answers_304_without_queries(self, client, hymn_book, hymns):
+        """A known ETag is answered from the object version alone."""
+        url = reverse("hymns:api_hymnbook_hymns", kwargs={"slug": hymn_book.slug})
+        etag = client.get(url, HTTP_ACCEPT_ENCODING="gzip")["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING="gzip")
+
+        assert response.status_code == 304
+        assert len(queries) == 0
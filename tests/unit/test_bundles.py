@@ -0,0 +1,160 @@
+"""
+Tests for offline hymn book bundles (bundles.py, build task, views and build_hymnbook_bundles command).
+"""
+
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from apps.hymns import bundles
+from apps.hymns.models import Hymn, HymnBookBundle
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def hymns(hymn_book, hymn_factory):
+    return [
+        hymn_factory(hymn_book, number=1, title="Lua Branca", text="Lua branca\nDa luz serena"),
+        hymn_factory(hymn_book, number=2, title="Tuperci", text="Tuperci", style="Marcha"),
+    ]
+
+
+@pytest.mark.django_db
+class TestBuildBundle:
+    """Tests for building bundles."""
+
+    def test_bundle_is_gzipped_canonical_json(self, hymn_book, hymns):
+        """The stored file is the whole hymn book, compressed."""
+        bundle = bundles.build_bundle(hymn_book)
+
+        data = bundles.read_bundle(bundle)
+        assert data["hymn_book"]["name"] == "O Cruzeiro"
+        assert [hymn["title"] for hymn in data["hymns"]] == ["Lua Branca", "Tuperci"]
+        assert data["hymns"][1]["style"] == "Marcha"
+        assert bundle.size == bundle.file.size
+        assert len(bundle.hymn_hashes) == 2
+
+    def test_unchanged_content_reuses_version(self, hymn_book, hymns):
+        """The version is a content hash: rebuilding unchanged content creates nothing."""
+        first = bundles.build_bundle(hymn_book)
+
+        assert bundles.build_bundle(hymn_book) == first
+        assert HymnBookBundle.objects.count() == 1
+
+    def test_change_creates_new_version_and_prunes_history(self, hymn_book, hymns, settings):
+        """Old versions beyond HYMNBOOK_BUNDLE_HISTORY are removed with their files."""
+        settings.HYMNBOOK_BUNDLE_HISTORY = 2
+        oldest = bundles.build_bundle(hymn_book)
+        for title in ["Lua Branca 2", "Lua Branca 3"]:
+            Hymn.objects.filter(number=1).update(title=title)
+            bundles.build_bundle(hymn_book)
+
+        assert HymnBookBundle.objects.count() == 2
+        assert not HymnBookBundle.objects.filter(pk=oldest.pk).exists()
+        assert not oldest.file.storage.exists(oldest.file.name)
+
+    def test_hymn_change_builds_bundle_after_commit(
+        self, hymn_book, hymns, hymn_factory, django_capture_on_commit_callbacks
+    ):
+        """Bundles are built in the background when a hymn changes, not on request."""
+        with django_capture_on_commit_callbacks(execute=True):
+            hymn_factory(hymn_book, number=3, title="Sol, Lua, Estrela", text="...")
+
+        bundle = bundles.latest_bundle(hymn_book)
+        assert len(bundles.read_bundle(bundle)["hymns"]) == 3
+
+
+@pytest.mark.django_db
+class TestBundleViews:
+    """Tests for the manifest, file and delta endpoints."""
+
+    def test_manifest_points_to_immutable_file(self, client, hymn_book, hymns):
+        """The manifest revalidates; the versioned file is cached forever and served pre-compressed."""
+        bundle = bundles.build_bundle(hymn_book)
+
+        manifest = client.get(reverse("hymns:hymnbook_bundle", kwargs={"slug": hymn_book.slug}))
+        assert manifest.json()["version"] == bundle.version
+        assert "no-cache" in manifest["Cache-Control"]
+
+        response = client.get(manifest.json()["url"], HTTP_ACCEPT_ENCODING="gzip, br")
+        assert response["Content-Encoding"] == "gzip"
+        assert "immutable" in response["Cache-Control"]
+        assert json.loads(gzip.decompress(response.content))["hymn_book"]["slug"] == hymn_book.slug
+
+    def test_file_without_gzip_support_is_decompressed(self, client, hymn_book, hymns):
+        """Clients that do not accept gzip get plain JSON."""
+        bundle = bundles.build_bundle(hymn_book)
+
+        response = client.get(
+            reverse("hymns:hymnbook_bundle_file", kwargs={"slug": hymn_book.slug, "version": bundle.version})
+        )
+
+        assert not response.has_header("Content-Encoding")
+        assert len(response.json()["hymns"]) == 2
+
+    def test_manifest_answers_if_none_match(self, client, hymn_book, hymns):
+        """An up-to-date client gets a 304."""
+        bundle = bundles.build_bundle(hymn_book)
+
+        response = client.get(
+            reverse("hymns:hymnbook_bundle", kwargs={"slug": hymn_book.slug}), HTTP_IF_NONE_MATCH=f'"{bundle.version}"'
+        )
+
+        assert response.status_code == 304
+
+    def test_manifest_before_first_build_is_503(self, client, hymn_book, monkeypatch):
+        """Bundles are never built inline; the client is asked to retry."""
+        monkeypatch.setattr(bundles, "latest_bundle", lambda hymn_book: None)
+
+        response = client.get(reverse("hymns:hymnbook_bundle", kwargs={"slug": hymn_book.slug}))
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == "30"
+
+    def test_delta_returns_only_changed_and_removed_hymns(self, client, hymn_book, hymns, hymn_factory):
+        """The delta carries changed hymns in full and the ids of removed ones."""
+        old = bundles.build_bundle(hymn_book)
+        Hymn.objects.filter(number=1).update(title="Lua Branca Revisada")
+        removed = hymns[1]
+        Hymn.objects.filter(pk=removed.pk).delete()
+        hymn_factory(hymn_book, number=3, title="Sol, Lua, Estrela", text="...")
+        current = bundles.build_bundle(hymn_book)
+
+        delta = client.get(
+            reverse("hymns:hymnbook_bundle_delta", kwargs={"slug": hymn_book.slug}), {"since": old.version}
+        ).json()
+
+        assert delta["version"] == current.version
+        assert sorted(hymn["title"] for hymn in delta["hymns"]) == ["Lua Branca Revisada", "Sol, Lua, Estrela"]
+        assert delta["removed"] == [str(removed.pk)]
+
+    def test_delta_from_unknown_version_is_gone(self, client, hymn_book, hymns):
+        """Clients too far behind are sent to the full bundle."""
+        bundles.build_bundle(hymn_book)
+
+        response = client.get(
+            reverse("hymns:hymnbook_bundle_delta", kwargs={"slug": hymn_book.slug}), {"since": "desconhecida"}
+        )
+
+        assert response.status_code == 410
+        assert "url" in response.json()
+
+
+@pytest.mark.django_db
+class TestBuildHymnbookBundlesCommand:
+    """Tests for the backfill command."""
+
+    def test_builds_missing_bundles(self, hymn_book, hymns, capsys):
+        """Every hymn book without an up-to-date bundle gets one."""
+        call_command("build_hymnbook_bundles")
+        call_command("build_hymnbook_bundles")
+
+        assert HymnBookBundle.objects.filter(hymn_book=hymn_book).count() == 1
+        assert "built 0 new bundles" in capsys.readouterr().out
@@ -0,0 +1,175 @@
+"""
+Tests for the catalogue export (export module, export_hymnbooks command and export view).
+"""
+
+import gzip
+import json
+from datetime import date
+
+import pytest
+import yaml
+from django.core.management import call_command
+from django.urls import reverse
+
+from apps.hymns.export import gzip_stream, iter_export
+from apps.hymns.ingestion import parse_hymnbook
+from apps.hymns.models import Hymn, HymnBook
+
+
+@pytest.fixture
+def catalogue(db):
+    """Two hymn books, one with optional fields filled in."""
+    cruzeiro = HymnBook.objects.create(
+        name="O Cruzeiro",
+        owner_name="Mestre Irineu",
+        intro_name="Cruzeiro",
+        description="Hinário do Mestre Irineu",
+    )
+    Hymn.objects.create(
+        hymn_book=cruzeiro,
+        number=1,
+        title="Lua Branca",
+        text="Lua branca\nDa luz serena",
+        received_at=date(1930, 7, 15),
+        style="Valsa",
+    )
+    Hymn.objects.create(hymn_book=cruzeiro, number=2, title="Tuperci", text="Tuperci é um anjo")
+    padrinho = HymnBook.objects.create(name="Hinário do Padrinho", owner_name="Padrinho Sebastião")
+    Hymn.objects.create(hymn_book=padrinho, number=1, title="Sol, Lua, Estrela", text="Sol, lua, estrela")
+    return [cruzeiro, padrinho]
+
+
+class TestIterExport:
+    """Tests for the export generators."""
+
+    def test_yaml_documents_round_trip_through_import_parser(self, catalogue):
+        """Each YAML document is in the import_yaml format."""
+        documents = list(yaml.safe_load_all("".join(iter_export("yaml"))))
+
+        assert [doc["hymn_book"]["name"] for doc in documents] == ["Hinário do Padrinho", "O Cruzeiro"]
+        hymn_book, warnings = parse_hymnbook(documents[1])
+        assert warnings == []
+        assert hymn_book["owner"] == "Mestre Irineu"
+        assert hymn_book["hymns"][0]["received_at"] == date(1930, 7, 15)
+        assert hymn_book["hymns"][0]["text"] == "Lua branca\nDa luz serena"
+        assert hymn_book["hymns"][0]["style"] == "Valsa"
+
+    def test_yaml_uses_literal_blocks_for_multiline_text(self, catalogue):
+        """Multi-line texts are written as literal blocks, like hand-written files."""
+        assert "text: |" in "".join(iter_export("yaml"))
+
+    def test_jsonl_has_one_hymn_book_per_line(self, catalogue):
+        """JSONL output is one JSON object per hymn book."""
+        lines = "".join(iter_export("jsonl")).splitlines()
+
+        assert len(lines) == 2
+        record = json.loads(lines[1])
+        assert record["hymn_book"]["name"] == "O Cruzeiro"
+        assert record["hymn_book"]["hymns"][0]["received_at"] == "1930-07-15"
+        assert "offered_to" not in record["hymn_book"]["hymns"][0]
+
+    def test_unknown_format_raises(self, db):
+        """Only yaml and jsonl are supported."""
+        with pytest.raises(ValueError):
+            list(iter_export("xml"))
+
+    def test_gzip_stream_decompresses_to_input(self):
+        """gzip_stream produces a valid gzip stream."""
+        assert gzip.decompress(b"".join(gzip_stream(["a" * 1000, "b\n", "ç"]))).decode() == "a" * 1000 + "b\nç"
+
+
+class TestExportHymnbooksCommand:
+    """Tests for the export_hymnbooks command."""
+
+    def test_writes_yaml_to_stdout(self, catalogue, capsys):
+        """Default output is YAML on stdout."""
+        call_command("export_hymnbooks")
+
+        documents = list(yaml.safe_load_all(capsys.readouterr().out))
+        assert len(documents) == 2
+
+    def test_writes_gzipped_jsonl_file(self, catalogue, tmp_path):
+        """A .gz output is compressed."""
+        output = tmp_path / "catalogue.jsonl.gz"
+
+        call_command("export_hymnbooks", "--format", "jsonl", "--output", str(output))
+
+        lines = gzip.decompress(output.read_bytes()).decode().splitlines()
+        assert [json.loads(line)["hymn_book"]["name"] for line in lines] == ["Hinário do Padrinho", "O Cruzeiro"]
+
+    def test_yaml_stream_round_trips_through_import(self, catalogue, tmp_path):
+        """The multi-document YAML export is re-importable as a single file, including empty owners."""
+        HymnBook.objects.filter(name="Hinário do Padrinho").update(owner_name="")
+        call_command("export_hymnbooks", "--output", str(tmp_path / "catalogo.yaml"))
+
+        HymnBook.objects.all().delete()
+        call_command("import_yaml", str(tmp_path / "catalogo.yaml"))
+
+        assert dict(HymnBook.objects.values_list("name", "owner_name")) == {
+            "Hinário do Padrinho": "",
+            "O Cruzeiro": "Mestre Irineu",
+        }
+        assert dict(HymnBook.objects.values_list("name", "description")) == {
+            "Hinário do Padrinho": "",
+            "O Cruzeiro": "Hinário do Mestre Irineu",
+        }
+        assert HymnBook.objects.get(name="O Cruzeiro").hymns.get(number=1).received_at == date(1930, 7, 15)
+        assert Hymn.objects.count() == 3
+
+    def test_output_dir_round_trips_through_import(self, catalogue, tmp_path):
+        """One file per hymn book, re-importable with import_yaml --dir."""
+        call_command("export_hymnbooks", "--output-dir", str(tmp_path / "backup"))
+        assert sorted(p.name for p in (tmp_path / "backup").iterdir()) == [
+            "hinario-do-padrinho.yaml",
+            "o-cruzeiro.yaml",
+        ]
+
+        HymnBook.objects.all().delete()
+        call_command("import_yaml", "--dir", str(tmp_path / "backup"), "--workers", "1")
+
+        cruzeiro = HymnBook.objects.get(name="O Cruzeiro")
+        assert cruzeiro.intro_name == "Cruzeiro"
+        assert cruzeiro.description == "Hinário do Mestre Irineu"
+        assert cruzeiro.hymns.get(number=1).received_at == date(1930, 7, 15)
+        assert Hymn.objects.count() == 3
+
+
+@pytest.mark.django_db
+class TestExportView:
+    """Tests for the streaming export endpoint."""
+
+    def test_requires_login(self, client):
+        """Anonymous users are redirected to login."""
+        response = client.get(reverse("hymns:export"))
+
+        assert response.status_code == 302
+
+    def test_streams_gzipped_yaml(self, client, catalogue, django_user_model):
+        """The response is a streamed gzip attachment."""
+        client.force_login(django_user_model.objects.create_user(username="u", email="u@example.com", password="p"))
+
+        response = client.get(reverse("hymns:export"))
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Type"] == "application/gzip"
+        assert 'filename="hinarios.yaml.gz"' in response["Content-Disposition"]
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        assert len(list(yaml.safe_load_all(content))) == 2
+
+    def test_streams_jsonl(self, client, catalogue, django_user_model):
+        """?format=jsonl streams JSON lines."""
+        client.force_login(django_user_model.objects.create_user(username="u", email="u@example.com", password="p"))
+
+        response = client.get(reverse("hymns:export"), {"format": "jsonl"})
+
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        assert len(content.splitlines()) == 2
+
+    def test_rejects_unknown_format(self, client, django_user_model):
+        """Unknown formats are a bad request."""
+        client.force_login(django_user_model.objects.create_user(username="u", email="u@example.com", password="p"))
+
+        response = client.get(reverse("hymns:export"), {"format": "xml"})
+
+        assert response.status_code == 400
@@ -19,7 +19,7 @@ class TestHymnBookAdmin:
 
     def test_list_display_fields(self):
         """Test correct list_display configuration."""
-        expected = ["name", "intro_name", "owner_name", "owner_user", "hymn_count", "created_at"]
+        expected = ["name", "intro_name", "owner_name", "owner_user", "hymns_total", "created_at"]
         assert HymnBookAdmin.list_display == expected
 
     def test_search_fields(self):
@@ -34,7 +34,7 @@ class TestHymnBookAdmin:
 
     def test_readonly_fields(self):
         """Test readonly_fields configuration."""
-        expected = ["id", "created_at", "updated_at", "hymn_count"]
+        expected = ["id", "created_at", "updated_at", "hymns_total"]
         assert HymnBookAdmin.readonly_fields == expected
 
     def test_prepopulated_fields(self):
@@ -55,6 +55,91 @@ class TestHymnBookModel:
         assert hymn_book in user.owned_hymnbooks.all()
 
 
+@pytest.mark.django_db
+class TestHymnBookHymnsTotal:
+    """Tests for the denormalized hymns_total counter."""
+
+    def test_create_and_delete_adjust_counter(self):
+        """Creating and deleting hymns keeps the stored counter in sync."""
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        hymn = Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="Lua branca...")
+        Hymn.objects.create(hymn_book=hymn_book, number=2, title="Tuperci", text="Tuperci...")
+        assert HymnBook.objects.get(pk=hymn_book.pk).hymns_total == 2
+
+        hymn.delete()
+
+        assert HymnBook.objects.get(pk=hymn_book.pk).hymns_total == 1
+
+    def test_updating_hymn_does_not_change_counter(self):
+        """Saving an existing hymn is not an insert."""
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        hymn = Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="Lua branca...")
+
+        hymn.title = "Lua Branca (revisado)"
+        hymn.save()
+
+        assert HymnBook.objects.get(pk=hymn_book.pk).hymns_total == 1
+
+    def test_queryset_delete_adjusts_counter(self):
+        """Queryset deletes (admin bulk action, related manager) decrement per deleted hymn."""
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        for number in range(1, 4):
+            Hymn.objects.create(hymn_book=hymn_book, number=number, title=f"Hino {number}", text="Lua branca...")
+
+        Hymn.objects.filter(hymn_book=hymn_book, number__gt=1).delete()
+        assert HymnBook.objects.get(pk=hymn_book.pk).hymns_total == 1
+
+        hymn_book.hymns.all().delete()
+        assert HymnBook.objects.get(pk=hymn_book.pk).hymns_total == 0
+
+    def test_moving_hymn_adjusts_both_counters(self):
+        """Changing hymn_book moves one unit from the old counter to the new one."""
+        source = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        target = HymnBook.objects.create(name="O Justiceiro", owner_name="Sebastião Mota")
+        Hymn.objects.create(hymn_book=source, number=1, title="Lua Branca", text="Lua branca...")
+        hymn = Hymn.objects.get(hymn_book=source, number=1)
+
+        hymn.hymn_book = target
+        hymn.save()
+        hymn.title = "Lua Branca (revisado)"
+        hymn.save()
+
+        assert HymnBook.objects.get(pk=source.pk).hymns_total == 0
+        assert HymnBook.objects.get(pk=target.pk).hymns_total == 1
+
+    def test_save_without_hymn_book_field_skips_lookup(self, django_assert_num_queries):
+        """Saving other fields of an existing hymn does not read its previous hymn book."""
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        hymn = Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="Lua branca...")
+        hymn.title = "Lua Branca (revisado)"
+
+        # SAVEPOINT, UPDATE do hino e RELEASE SAVEPOINT
+        with django_assert_num_queries(3):
+            hymn.save(update_fields=["title"])
+
+        assert HymnBook.objects.get(pk=hymn_book.pk).hymns_total == 1
+
+    def test_full_hymnbook_save_writes_all_fields(self):
+        """HymnBook.save honors what the caller asked to save (drift is fixed by repair_hymn_counts)."""
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        hymn_book.description = "Hinário do Mestre Irineu"
+        hymn_book.hymns_total = 7
+
+        hymn_book.save(update_fields=["description"])
+
+        refreshed = HymnBook.objects.get(pk=hymn_book.pk)
+        assert (refreshed.description, refreshed.hymns_total) == ("Hinário do Mestre Irineu", 0)
+
+    def test_hymn_count_does_not_query(self, django_assert_num_queries):
+        """hymn_count reads the stored counter."""
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="Lua branca...")
+        hymn_book = HymnBook.objects.get(pk=hymn_book.pk)
+
+        with django_assert_num_queries(0):
+            assert hymn_book.hymn_count == 1
+
+
 @pytest.mark.django_db
 class TestHymnModel:
     """Tests for Hymn model."""
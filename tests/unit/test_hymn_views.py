@@ -103,6 +103,30 @@ class TestHymnBookListView:
         assert "hymnbooks" in response.context
         assert "page_obj" in response.context
 
+    def test_list_view_query_count_is_fixed(self, client, django_capture_on_commit_callbacks):
+        """Hymn counts come from the stored counter, not one COUNT per card."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def create_books(start, count):
+            for i in range(start, start + count):
+                book = HymnBook.objects.create(name=f"Hinário {i:02d}", owner_name="Owner")
+                Hymn.objects.create(hymn_book=book, number=1, title="Hino", text="Texto")
+
+        url = reverse("hymns:hymnbook_list")
+        create_books(0, 2)
+        with CaptureQueriesContext(connection) as few:
+            client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            # Runs the page cache invalidation, so the second request renders again
+            create_books(2, 15)
+        with CaptureQueriesContext(connection) as many:
+            response = client.get(url)
+
+        assert len(many) == len(few)
+        assert b"<strong>Hinos:</strong> 1" in response.content
+
 
 @pytest.mark.django_db
 class TestHymnBookDetailView:
@@ -188,6 +212,85 @@ class TestHymnBookDetailView:
         assert response.context["hymnbook"] == hymn_book
 
 
+@pytest.mark.django_db
+class TestHymnBookToc:
+    """Tests for the hymn book table of contents (projection, paging and fragment cache)."""
+
+    @pytest.fixture
+    def hymn_book(self, settings):
+        settings.HYMNBOOK_TOC_PAGE_SIZE = 2
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        for number in range(1, 4):
+            Hymn.objects.create(hymn_book=hymn_book, number=number, title=f"Hino {number}", text="Letra longa " * 100)
+        return hymn_book
+
+    def test_toc_query_skips_large_fields(self, client, hymn_book):
+        """Only id/number/title/style are selected for the table of contents."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("hymns:hymnbook_detail", kwargs={"slug": hymn_book.slug}))
+
+        toc_sql = [q["sql"] for q in queries if 'FROM "hymns_hymn"' in q["sql"]]
+        assert toc_sql
+        assert all('"hymns_hymn"."text"' not in sql for sql in toc_sql)
+
+    def test_large_book_renders_first_page_and_load_more(self, client, hymn_book):
+        """Books above the page size render one page and a load-more button."""
+        response = client.get(reverse("hymns:hymnbook_detail", kwargs={"slug": hymn_book.slug}))
+
+        assert [hymn.number for hymn in response.context["hymns"]] == [1, 2]
+        assert reverse("hymns:hymnbook_toc", kwargs={"slug": hymn_book.slug}).encode() in response.content
+
+    def test_json_pages_by_number(self, client, hymn_book):
+        """The JSON endpoint pages with ?after=<last number>."""
+        url = reverse("hymns:hymnbook_toc", kwargs={"slug": hymn_book.slug})
+
+        first = client.get(url).json()
+        second = client.get(url, {"after": first["next_after"]}).json()
+
+        assert [hymn["number"] for hymn in first["hymns"]] == [1, 2]
+        assert first["next_after"] == 2
+        assert [hymn["title"] for hymn in second["hymns"]] == ["Hino 3"]
+        assert second["hymns"][0]["url"].startswith("/hinos/")
+        assert second["next_after"] is None
+
+    def test_json_rejects_bad_after(self, client, hymn_book):
+        """A non-numeric cursor is a bad request."""
+        response = client.get(reverse("hymns:hymnbook_toc", kwargs={"slug": hymn_book.slug}), {"after": "x"})
+
+        assert response.status_code == 400
+
+    def test_json_unknown_book_404(self, client, db):
+        """Unknown slugs are not found."""
+        response = client.get(reverse("hymns:hymnbook_toc", kwargs={"slug": "nao-existe"}))
+
+        assert response.status_code == 404
+
+    def test_toc_fragment_is_cached_per_book_version(
+        self, client, hymn_book, django_user_model, django_capture_on_commit_callbacks
+    ):
+        """Logged-in users skip the TOC query until the hymn book changes."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        client.force_login(django_user_model.objects.create_user(username="u", email="u@example.com", password="p"))
+        url = reverse("hymns:hymnbook_detail", kwargs={"slug": hymn_book.slug})
+        client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        assert not [q for q in queries if 'FROM "hymns_hymn"' in q["sql"]]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            hymn = Hymn.objects.get(hymn_book=hymn_book, number=1)
+            hymn.title = "Lua Branca"
+            hymn.save()
+
+        assert b"Lua Branca" in client.get(url).content
+
+
 @pytest.mark.django_db
 class TestHymnDetailView:
     """Tests for Hymn detail view."""
@@ -264,6 +367,93 @@ class TestHymnDetailView:
         assert "hymn" in response.context
         assert response.context["hymn"] == hymn
 
+    @pytest.mark.parametrize("comment_count", [0, 10, 500])
+    def test_hymn_detail_query_count_is_fixed(
+        self, client, django_user_model, django_assert_num_queries, settings, comment_count
+    ):
+        """Session, user, hymn (with favorite state), audios and comments: 5 queries for any comment count."""
+        from apps.hymns.models import Comment, Favorite, HymnAudio
+
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        hymn = Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="...")
+        HymnAudio.objects.create(hymn=hymn, audio_file="a.mp3", is_approved=True, allow_download=True)
+        HymnAudio.objects.create(hymn=hymn, audio_file="b.mp3", is_approved=True)
+        authors = django_user_model.objects.bulk_create(
+            [django_user_model(username=f"autor{i}", email=f"autor{i}@example.com") for i in range(10)]
+        )
+        Comment.objects.bulk_create(
+            [Comment(hymn=hymn, user=authors[i % len(authors)], text=f"Comentario {i}") for i in range(comment_count)]
+        )
+        viewer = django_user_model.objects.create_user(username="u", email="u@example.com", password="p")
+        Favorite.objects.create(user=viewer, hymn=hymn)
+        client.force_login(viewer)
+
+        with django_assert_num_queries(5):
+            response = client.get(reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}))
+
+        assert response.context["is_favorited"] is True
+        assert len(response.context["comments"]) == min(comment_count, settings.COMMENTS_PAGE_SIZE)
+        assert len(response.context["audios"]) == 2
+
+
+@pytest.mark.django_db
+class TestHymnComments:
+    """Tests for keyset-paginated comments on the hymn page and the load-more endpoint."""
+
+    @pytest.fixture
+    def hymn(self, settings, django_user_model):
+        from apps.hymns.models import Comment
+
+        settings.COMMENTS_PAGE_SIZE = 3
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        hymn = Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="...")
+        author = django_user_model.objects.create_user(username="autor", email="autor@example.com", password="p")
+        Comment.objects.bulk_create([Comment(hymn=hymn, user=author, text=f"Comentario {i}") for i in range(8)])
+        Comment.objects.create(hymn=hymn, user=author, text="Escondido", is_flagged=True)
+        return hymn
+
+    def collect(self, client, hymn, response):
+        """Follow the load-more cursors from the hymn page; return every comment text in order."""
+        import re
+
+        texts = [comment.text for comment in response.context["comments"]]
+        cursor = response.context["comments_cursor"]
+        while cursor:
+            data = client.get(reverse("hymns:hymn_comments", kwargs={"hymn_id": hymn.pk}), {"cursor": cursor}).json()
+            texts += re.findall(r"Comentario \d+", data["html"])
+            cursor = data["next_cursor"]
+        return texts
+
+    def test_pages_cover_every_visible_comment_once(self, client, hymn):
+        """Walking the cursors returns each visible comment exactly once, oldest first."""
+        response = client.get(reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}))
+
+        assert len(response.context["comments"]) == 3
+        assert b"Carregar mais coment" in response.content
+        assert self.collect(client, hymn, response) == [f"Comentario {i}" for i in range(8)]
+
+    def test_ties_on_created_at_are_broken_by_id(self, client, hymn):
+        """Comments with the same timestamp are neither skipped nor repeated."""
+        from django.utils import timezone
+
+        hymn.comments.update(created_at=timezone.now())
+        response = client.get(reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}))
+
+        assert sorted(self.collect(client, hymn, response)) == sorted(f"Comentario {i}" for i in range(8))
+
+    def test_invalid_cursor_is_bad_request(self, client, hymn):
+        """Tampered cursors are rejected."""
+        url = reverse("hymns:hymn_comments", kwargs={"hymn_id": hymn.pk})
+
+        assert client.get(url, {"cursor": "nao-e-um-cursor"}).status_code == 400
+        assert client.get(url, {"cursor": "WyJ4IiwieSJd"}).status_code == 400
+
+    def test_unknown_hymn_404(self, client, db):
+        """Comments of a missing hymn are not found."""
+        response = client.get(reverse("hymns:hymn_comments", kwargs={"hymn_id": uuid4()}))
+
+        assert response.status_code == 404
+
 
 @pytest.mark.django_db
 class TestSearchView:
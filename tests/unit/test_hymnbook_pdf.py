@@ -0,0 +1,107 @@
+"""
+Tests for the printable hymn book PDF (pdfs.py, build task and view).
+"""
+
+from unittest.mock import patch
+
+import pytest
+from django.core.files.storage import default_storage
+from django.urls import reverse
+
+from apps.hymns import bundles, pdfs
+from apps.hymns.models import HymnBookVersion
+from apps.hymns.tasks import build_hymn_book_pdf
+
+FAKE_PDF = b"%PDF-1.7 hinario"
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture(autouse=True)
+def fake_renderer():
+    # O WeasyPrint é exercitado só em produção; aqui basta o HTML (ver test_html_has_cover_toc_and_hymns)
+    with patch("apps.hymns.pdfs.render_pdf", return_value=FAKE_PDF) as render_pdf:
+        yield render_pdf
+
+
+@pytest.fixture
+def hymns(hymn_book, hymn_factory):
+    return [
+        hymn_factory(hymn_book, number=1, title="Lua Branca", text="Lua branca\nDa luz serena"),
+        hymn_factory(hymn_book, number=2, title="Tuperci", text="Tuperci", style="Marcha"),
+    ]
+
+
+@pytest.mark.django_db
+class TestBuildPdf:
+    """Tests for building the PDF."""
+
+    def test_html_has_cover_toc_and_hymns(self, hymn_book, hymns):
+        """The print HTML carries the cover, a TOC entry per hymn and the metadata."""
+        html = pdfs.render_html(hymn_book, bundles.build_bundle(hymn_book))
+
+        assert "<h1>O Cruzeiro</h1>" in html
+        assert 'href="#hino-2">2. Tuperci</a>' in html
+        assert "Marcha" in html
+
+    def test_stored_by_content_hash(self, hymn_book, hymns, hymn_factory, fake_renderer):
+        """The same content is rendered once; new content gets a new file and the old one goes."""
+        name = build_hymn_book_pdf(str(hymn_book.pk))
+        assert build_hymn_book_pdf(str(hymn_book.pk)) == name
+        assert fake_renderer.call_count == 1
+        assert default_storage.open(name).read() == FAKE_PDF
+
+        hymn_factory(hymn_book, number=3, title="Sol, Lua, Estrela", text="Sol")
+        bundles.build_bundle(hymn_book)
+        new_name = build_hymn_book_pdf(str(hymn_book.pk))
+
+        assert new_name != name
+        assert not default_storage.exists(name)
+
+    def test_offered_as_version_when_no_pdf_uploaded(self, hymn_book, hymns):
+        """Hymn books without an uploaded PDF get an automatic version."""
+        name = build_hymn_book_pdf(str(hymn_book.pk))
+
+        version = hymn_book.versions.get()
+        assert version.version_name == pdfs.AUTO_VERSION_NAME
+        assert version.pdf_file.name == name
+
+    def test_uploaded_pdf_is_kept(self, hymn_book, hymns):
+        """An uploaded PDF is never replaced by the generated one."""
+        HymnBookVersion.objects.create(hymn_book=hymn_book, version_name="Edição 2010", pdf_file="hymnbooks/pdfs/x.pdf")
+
+        build_hymn_book_pdf(str(hymn_book.pk))
+
+        assert list(hymn_book.versions.values_list("pdf_file", flat=True)) == ["hymnbooks/pdfs/x.pdf"]
+
+
+@pytest.mark.django_db
+class TestPdfView:
+    """Tests for the PDF endpoint."""
+
+    def test_pending_then_redirects(self, client, hymn_book, hymns, django_capture_on_commit_callbacks):
+        """The first hit schedules the render; later hits go to the stored file."""
+        url = reverse("hymns:hymnbook_pdf", kwargs={"slug": hymn_book.slug})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.get(url)
+
+        assert response.status_code == 202
+        assert "sendo gerado" in response.content.decode()
+        response = client.get(url)
+        assert response.status_code == 302
+        assert response["Location"].endswith(".pdf")
+
+    def test_pending_render_is_scheduled_once(self, client, hymn_book, hymns, django_capture_on_commit_callbacks):
+        """Repeated hits while rendering do not queue more tasks."""
+        url = reverse("hymns:hymnbook_pdf", kwargs={"slug": hymn_book.slug})
+
+        with patch("apps.hymns.tasks.build_hymn_book_pdf.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                client.get(url)
+                client.get(url)
+
+        assert delay.call_count == 1
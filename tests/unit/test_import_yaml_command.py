@@ -317,3 +317,445 @@ class TestImportYamlCommand:
 
         assert Hymn.objects.count() == 5
         assert list(Hymn.objects.values_list("number", flat=True)) == [1, 2, 3, 4, 5]
+
+
+BASE_YAML = """hymn_book:
+  name: O Cruzeiro
+  owner: Mestre Irineu
+  hymns:
+    - number: 1
+      title: Lua Branca
+      text: Lua branca
+    - number: 2
+      title: Tuperci
+      text: Tuperci é um anjo
+    - number: 3
+      title: Eu Peço Licença
+      text: Eu peço licença
+"""
+
+
+class TestImportYamlUpdateDiff:
+    """Test suite for diff-based --update."""
+
+    @pytest.fixture
+    def imported(self, db, tmp_path):
+        yaml_file = tmp_path / "base.yaml"
+        yaml_file.write_text(BASE_YAML)
+        call_command("import_yaml", str(yaml_file))
+        return HymnBook.objects.get(name="O Cruzeiro")
+
+    def write(self, tmp_path, content):
+        yaml_file = tmp_path / "update.yaml"
+        yaml_file.write_text(content)
+        return str(yaml_file)
+
+    def test_unchanged_reimport_keeps_rows(self, imported, tmp_path, capsys):
+        """Re-importing the same file keeps ids and timestamps."""
+        before = {h.number: (h.id, h.updated_at) for h in imported.hymns.all()}
+
+        call_command("import_yaml", self.write(tmp_path, BASE_YAML), "--update")
+
+        after = {h.number: (h.id, h.updated_at) for h in imported.hymns.all()}
+        assert after == before
+        assert "0 created, 0 updated, 0 deleted, 3 unchanged" in capsys.readouterr().out
+
+    def test_unchanged_reimport_issues_no_writes(self, imported, tmp_path):
+        """An unchanged file only reads: hymn book lookup and its hymns."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        path = self.write(tmp_path, BASE_YAML)
+
+        with CaptureQueriesContext(connection) as queries:
+            call_command("import_yaml", path, "--update")
+
+        statements = [q["sql"].split()[0].upper() for q in queries]
+        assert not {"INSERT", "UPDATE", "DELETE"} & set(statements)
+
+    def test_update_changes_description(self, imported, tmp_path):
+        """A new description is stored on --update."""
+        content = BASE_YAML.replace(
+            "  owner: Mestre Irineu\n", "  owner: Mestre Irineu\n  description: Hinário oficial\n"
+        )
+
+        call_command("import_yaml", self.write(tmp_path, content), "--update")
+
+        imported.refresh_from_db()
+        assert imported.description == "Hinário oficial"
+
+    def test_diff_applies_inserts_updates_and_deletes(self, imported, tmp_path, capsys):
+        """Changed hymns are updated in place, missing ones deleted, new ones created."""
+        hymn_1 = imported.hymns.get(number=1)
+        hymn_2 = imported.hymns.get(number=2)
+
+        content = BASE_YAML.replace("Tuperci é um anjo", "Tuperci é um anjo divino").replace(
+            """    - number: 3
+      title: Eu Peço Licença
+      text: Eu peço licença
+""",
+            """    - number: 4
+      title: Novo
+      text: Hino novo
+      style: Marcha
+""",
+        )
+        call_command("import_yaml", self.write(tmp_path, content), "--update")
+
+        assert "1 created, 1 updated, 1 deleted, 1 unchanged" in capsys.readouterr().out
+        assert list(imported.hymns.values_list("number", flat=True)) == [1, 2, 4]
+
+        updated = imported.hymns.get(number=2)
+        assert updated.id == hymn_2.id
+        assert updated.text == "Tuperci é um anjo divino"
+        assert updated.updated_at > hymn_2.updated_at
+        assert imported.hymns.get(number=1).updated_at == hymn_1.updated_at
+        assert imported.hymns.get(number=4).style == "Marcha"
+        imported.refresh_from_db()
+        assert imported.hymns_total == 3
+
+    def test_update_preserves_related_rows(self, imported, tmp_path, django_user_model):
+        """Favorites and comments on kept hymns survive an update."""
+        from apps.hymns.models import Comment, Favorite
+
+        user = django_user_model.objects.create_user(username="fan", email="fan@example.com", password="pass")
+        hymn = imported.hymns.get(number=1)
+        Favorite.objects.create(user=user, hymn=hymn)
+        Comment.objects.create(user=user, hymn=hymn, text="Lindo hino")
+
+        call_command(
+            "import_yaml", self.write(tmp_path, BASE_YAML.replace("Lua branca\n", "Lua branca!\n")), "--update"
+        )
+
+        assert Favorite.objects.filter(hymn=hymn).exists()
+        assert Comment.objects.filter(hymn=hymn).exists()
+
+    def test_only_changed_ids_are_indexed(self, imported, tmp_path, django_capture_on_commit_callbacks):
+        """Only created/updated hymns are sent to the indexer; deleted ones are removed."""
+        from unittest.mock import patch
+
+        hymn_2 = imported.hymns.get(number=2)
+        hymn_3 = imported.hymns.get(number=3)
+        content = BASE_YAML.replace("Tuperci é um anjo", "Outro texto").replace(
+            """    - number: 3
+      title: Eu Peço Licença
+      text: Eu peço licença
+""",
+            "",
+        )
+
+        with (
+            patch("apps.hymns.management.commands.import_yaml.index_hymns_task.delay") as mock_index,
+            patch("apps.hymns.management.commands.import_yaml.delete_hymns_task.delay") as mock_delete,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            call_command("import_yaml", self.write(tmp_path, content), "--update")
+
+        mock_index.assert_called_once_with([str(hymn_2.id)])
+        mock_delete.assert_called_once_with([str(hymn_3.id)])
+
+    def test_owner_change_reindexes_all_hymns(self, imported, tmp_path, django_capture_on_commit_callbacks):
+        """owner_name is in every search document, so changing it reindexes the whole book."""
+        from unittest.mock import patch
+
+        content = BASE_YAML.replace("owner: Mestre Irineu", "owner: Raimundo Irineu Serra")
+
+        with (
+            patch("apps.hymns.management.commands.import_yaml.index_hymns_task.delay") as mock_index,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            call_command("import_yaml", self.write(tmp_path, content), "--update")
+
+        imported.refresh_from_db()
+        assert imported.owner_name == "Raimundo Irineu Serra"
+        assert len(mock_index.call_args[0][0]) == 3
+
+
+def book_yaml(name, hymns=2):
+    """Build a minimal hymn book YAML with numbered hymns."""
+    lines = [f"hymn_book:\n  name: {name}\n  owner: Owner\n  hymns:\n"]
+    for number in range(1, hymns + 1):
+        lines.append(f"    - number: {number}\n      title: Hino {number}\n      text: Texto {number}\n")
+    return "".join(lines)
+
+
+class TestImportYamlDirectory:
+    """Test suite for --dir batch import."""
+
+    @pytest.fixture
+    def archive(self, tmp_path):
+        (tmp_path / "a.yaml").write_text(book_yaml("Hinário A", hymns=3))
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b.yml").write_text(book_yaml("Hinário B", hymns=2))
+        (tmp_path / "notes.txt").write_text("not a hymn book")
+        return tmp_path
+
+    def test_imports_every_yaml_in_directory(self, db, archive, capsys):
+        """Directory mode finds .yaml/.yml files recursively and imports each one."""
+        call_command("import_yaml", "--dir", str(archive), "--workers", "1")
+
+        assert set(HymnBook.objects.values_list("name", flat=True)) == {"Hinário A", "Hinário B"}
+        assert Hymn.objects.count() == 5
+        out = capsys.readouterr().out
+        assert "Imported 2 of 2 files (5 hymns)" in out
+        assert "files/s" in out and "hymns/s" in out
+
+    def test_accepts_glob_pattern(self, db, archive):
+        """A glob pattern restricts which files are imported."""
+        call_command("import_yaml", "--dir", str(archive / "*.yaml"), "--workers", "1")
+
+        assert list(HymnBook.objects.values_list("name", flat=True)) == ["Hinário A"]
+
+    def test_parses_in_process_pool(self, db, archive):
+        """Files parsed by worker processes are committed by the main process."""
+        call_command("import_yaml", "--dir", str(archive), "--workers", "2")
+
+        assert HymnBook.objects.count() == 2
+        assert Hymn.objects.count() == 5
+
+    def test_rerun_skips_already_imported_files(self, db, archive, capsys):
+        """Files are recorded by content hash, so a second run imports nothing."""
+        from apps.hymns.models import ImportedFile
+
+        call_command("import_yaml", "--dir", str(archive), "--workers", "1")
+        assert ImportedFile.objects.count() == 2
+        capsys.readouterr()
+
+        call_command("import_yaml", "--dir", str(archive), "--workers", "1")
+
+        out = capsys.readouterr().out
+        assert "2 already imported" in out
+        assert "Imported 0 of 2 files" in out
+        assert HymnBook.objects.count() == 2
+
+    def test_changed_file_is_imported_again(self, db, archive):
+        """A file whose content changed is not skipped."""
+        call_command("import_yaml", "--dir", str(archive), "--workers", "1")
+        (archive / "a.yaml").write_text(book_yaml("Hinário A", hymns=4))
+
+        call_command("import_yaml", "--dir", str(archive), "--workers", "1", "--update")
+
+        assert HymnBook.objects.get(name="Hinário A").hymns.count() == 4
+
+    def test_failures_are_reported_and_do_not_stop_the_batch(self, db, archive, capsys):
+        """Invalid files are listed with their reason; valid files are still committed."""
+        (archive / "broken.yaml").write_text("hymn_book:\n  name: Sem Dono\n")
+
+        with pytest.raises(CommandError, match="1 file\\(s\\) failed"):
+            call_command("import_yaml", "--dir", str(archive), "--workers", "1")
+
+        assert HymnBook.objects.count() == 2
+        out = capsys.readouterr().out
+        assert "broken.yaml: hymn_book.owner is required" in out
+
+    def test_malformed_hymns_do_not_stop_the_batch(self, db, archive, capsys):
+        """A file whose hymns are not mappings is reported like any other invalid file."""
+        (archive / "malformed.yaml").write_text("hymn_book:\n  name: Malformado\n  owner: Dono\n  hymns: [1, 2]\n")
+
+        with pytest.raises(CommandError, match="1 file\\(s\\) failed"):
+            call_command("import_yaml", "--dir", str(archive), "--workers", "1")
+
+        assert HymnBook.objects.count() == 2
+        assert "malformed.yaml: Hymn #1 must be a mapping" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("workers", ["1", "3"])
+    def test_invalid_date_does_not_stop_the_batch(self, db, archive, capsys, workers):
+        """A date the YAML loader cannot build fails only its own file."""
+        (archive / "bad-date.yaml").write_text(
+            book_yaml("Data Ruim").replace("title:", "received_at: 2020-13-45\n      title:", 1)
+        )
+
+        with pytest.raises(CommandError, match="1 file\\(s\\) failed"):
+            call_command("import_yaml", "--dir", str(archive), "--workers", workers)
+
+        assert HymnBook.objects.count() == 2
+        assert "bad-date.yaml: Invalid value in YAML file" in capsys.readouterr().out
+
+    def test_failed_file_is_retried_on_rerun(self, db, archive):
+        """Failed files are not recorded, so fixing them and rerunning imports them."""
+        broken = archive / "broken.yaml"
+        broken.write_text("hymn_book:\n  name: Sem Dono\n")
+        with pytest.raises(CommandError):
+            call_command("import_yaml", "--dir", str(archive), "--workers", "1")
+
+        broken.write_text(book_yaml("Hinário C"))
+        call_command("import_yaml", "--dir", str(archive), "--workers", "1")
+
+        assert HymnBook.objects.filter(name="Hinário C").exists()
+
+    def test_dry_run_saves_nothing(self, db, archive, capsys):
+        """Dry run validates every file without touching the database."""
+        call_command("import_yaml", "--dir", str(archive), "--workers", "1", "--dry-run")
+
+        assert HymnBook.objects.count() == 0
+        assert "Validated 2 of 2 files" in capsys.readouterr().out
+
+    def test_empty_directory_raises(self, db, tmp_path):
+        """No matching files is an error."""
+        with pytest.raises(CommandError, match="No YAML files found"):
+            call_command("import_yaml", "--dir", str(tmp_path))
+
+    def test_requires_file_or_dir(self, db):
+        """Calling without a file or --dir is an error."""
+        with pytest.raises(CommandError, match="Pass a YAML file or --dir"):
+            call_command("import_yaml")
+
+
+def with_cover(content, cover_image_path):
+    """Add cover_image_path to a hymn book YAML built by book_yaml."""
+    return content.replace("  owner: Owner\n", f"  owner: Owner\n  cover_image_path: {cover_image_path}\n")
+
+
+class TestImportYamlArchive:
+    """Test suite for importing .zip/.tar.gz archives."""
+
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path / "media")
+
+    @pytest.fixture
+    def zip_archive(self, tmp_path):
+        import zipfile
+
+        path = tmp_path / "hinarios.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("hinarios/a.yaml", with_cover(book_yaml("Hinário A", hymns=3), "capas/a.jpg"))
+            archive.writestr("hinarios/capas/a.jpg", b"fake-jpeg")
+            archive.writestr("b.yml", book_yaml("Hinário B"))
+            archive.writestr("LEIAME.txt", "ignored")
+            archive.writestr("__MACOSX/hinarios/._a.yaml", b"\x00\x05")
+        return path
+
+    def test_imports_every_yaml_member_of_zip(self, db, zip_archive, capsys):
+        """YAML members are imported; other members are ignored."""
+        call_command("import_yaml", str(zip_archive))
+
+        assert set(HymnBook.objects.values_list("name", flat=True)) == {"Hinário A", "Hinário B"}
+        assert Hymn.objects.count() == 5
+        assert "Imported 2 of 2 files (5 hymns)" in capsys.readouterr().out
+
+    def test_attaches_cover_image_from_archive(self, db, zip_archive):
+        """cover_image_path is resolved relative to the YAML member."""
+        call_command("import_yaml", str(zip_archive))
+
+        hymn_book = HymnBook.objects.get(name="Hinário A")
+        assert hymn_book.cover_image.name.startswith("hymn_covers/a")
+        with hymn_book.cover_image.open("rb") as f:
+            assert f.read() == b"fake-jpeg"
+
+    def test_imports_tar_gz(self, db, tmp_path):
+        """tar.gz archives are read member by member."""
+        import io
+        import tarfile
+
+        path = tmp_path / "hinarios.tar.gz"
+        with tarfile.open(path, "w:gz") as archive:
+            for name, content in [
+                ("a.yaml", with_cover(book_yaml("Hinário A"), "a.png").encode()),
+                ("a.png", b"fake-png"),
+            ]:
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content))
+
+        call_command("import_yaml", str(path))
+
+        hymn_book = HymnBook.objects.get(name="Hinário A")
+        assert hymn_book.hymns.count() == 2
+        assert hymn_book.cover_image
+
+    def test_tar_gz_members_are_read_once_in_archive_order(self, db, tmp_path, monkeypatch):
+        """Each YAML member is extracted once, front to back, for both hashing and parsing."""
+        import io
+        import tarfile
+
+        from apps.hymns.ingestion import Archive
+
+        path = tmp_path / "hinarios.tar.gz"
+        names = ["c.yaml", "a.yaml", "b.yaml"]
+        with tarfile.open(path, "w:gz") as archive:
+            for name in names:
+                content = book_yaml(f"Hinário {name[0].upper()}").encode()
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content))
+        opened = []
+        original_open = Archive.open
+        monkeypatch.setattr(Archive, "open", lambda self, name: opened.append(name) or original_open(self, name))
+
+        call_command("import_yaml", str(path))
+
+        assert opened == names
+        assert HymnBook.objects.count() == 3
+
+    def test_invalid_date_fails_only_its_member(self, db, tmp_path, capsys):
+        """A member the YAML loader cannot read is reported; the other members are imported."""
+        import zipfile
+
+        path = tmp_path / "datas.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("a.yaml", book_yaml("Hinário A"))
+            archive.writestr(
+                "b.yaml", book_yaml("Data Ruim").replace("title:", "received_at: 2020-13-45\n      title:", 1)
+            )
+
+        with pytest.raises(CommandError, match="1 file\\(s\\) failed"):
+            call_command("import_yaml", str(path))
+
+        assert list(HymnBook.objects.values_list("name", flat=True)) == ["Hinário A"]
+        assert "b.yaml: Invalid value in YAML file" in capsys.readouterr().out
+
+    def test_rerun_skips_imported_members(self, db, zip_archive, capsys):
+        """Members are recorded by content hash like --dir files."""
+        call_command("import_yaml", str(zip_archive))
+        capsys.readouterr()
+
+        call_command("import_yaml", str(zip_archive))
+
+        assert "2 already imported" in capsys.readouterr().out
+
+    def test_missing_cover_is_a_warning(self, db, tmp_path, capsys):
+        """A cover image that is not in the archive does not fail the import."""
+        import zipfile
+
+        path = tmp_path / "sem-capa.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("a.yaml", with_cover(book_yaml("Hinário A"), "nao-existe.jpg"))
+
+        call_command("import_yaml", str(path))
+
+        assert not HymnBook.objects.get(name="Hinário A").cover_image
+        assert "Cover image not found: nao-existe.jpg" in capsys.readouterr().out
+
+    def test_invalid_member_is_reported(self, db, tmp_path, capsys):
+        """Invalid members fail individually with the member name in the report."""
+        import zipfile
+
+        path = tmp_path / "misto.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            archive.writestr("ok.yaml", book_yaml("Hinário A"))
+            archive.writestr("ruim.yaml", "invalid: yaml: content: [")
+
+        with pytest.raises(CommandError, match="1 file\\(s\\) failed"):
+            call_command("import_yaml", str(path))
+
+        assert HymnBook.objects.filter(name="Hinário A").exists()
+        assert "misto.zip:ruim.yaml: Error parsing YAML file" in capsys.readouterr().out
+
+    def test_corrupt_archive_raises(self, db, tmp_path):
+        """A file with an archive extension that is not an archive is an error."""
+        path = tmp_path / "corrompido.zip"
+        path.write_bytes(b"not an archive")
+
+        with pytest.raises(CommandError, match="Error reading archive"):
+            call_command("import_yaml", str(path))
+
+    def test_single_file_attaches_cover_from_disk(self, db, tmp_path):
+        """Plain YAML imports resolve cover_image_path relative to the file."""
+        (tmp_path / "capa.jpg").write_bytes(b"fake-jpeg")
+        yaml_file = tmp_path / "a.yaml"
+        yaml_file.write_text(with_cover(book_yaml("Hinário A"), "capa.jpg"))
+
+        call_command("import_yaml", str(yaml_file))
+
+        assert HymnBook.objects.get(name="Hinário A").cover_image
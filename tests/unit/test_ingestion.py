@@ -0,0 +1,232 @@
+"""
+Tests for the shared YAML ingestion module.
+"""
+
+import io
+from datetime import date
+
+import pytest
+import yaml
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.hymns.ingestion import (
+    IngestionError,
+    YamlLoader,
+    build_hymns,
+    bulk_create_hymns,
+    delete_hymns,
+    load_yaml,
+    parse_hymnbook,
+)
+from apps.hymns.models import Favorite, Hymn, HymnBook, Tombstone
+
+
+def hymnbook_data(**overrides):
+    """Minimal valid hymnbook data (as loaded from YAML)."""
+    data = {
+        "name": "O Cruzeiro",
+        "owner": "Mestre Irineu",
+        "hymns": [
+            {"number": 1, "title": "Lua Branca", "text": "Lua branca", "received_at": date(1930, 7, 15)},
+            {"number": 2, "title": "Tuperci", "text": "Tuperci é um anjo", "style": "Marcha"},
+        ],
+    }
+    data.update(overrides)
+    return {"hymn_book": data}
+
+
+class TestLoadYaml:
+    """Tests for load_yaml."""
+
+    def test_prefers_c_loader(self):
+        """Uses libyaml's CSafeLoader when available."""
+        if yaml.__with_libyaml__:
+            assert YamlLoader is yaml.CSafeLoader
+        else:
+            assert YamlLoader is yaml.SafeLoader
+
+    def test_loads_from_binary_stream(self):
+        """Parses straight from a binary file object."""
+        stream = io.BytesIO("hymn_book:\n  name: Hinário Ção\n".encode("utf-8"))
+
+        assert load_yaml(stream) == {"hymn_book": {"name": "Hinário Ção"}}
+
+    def test_rejects_unsafe_tags(self):
+        """Only safe YAML is accepted."""
+        with pytest.raises(yaml.YAMLError):
+            load_yaml("!!python/object/apply:os.system ['true']")
+
+
+class TestParseHymnbook:
+    """Tests for parse_hymnbook."""
+
+    def test_normalizes_hymnbook(self):
+        """Produces the normalized structure with all keys present."""
+        hymn_book, warnings = parse_hymnbook(hymnbook_data(intro_name=" Cruzeiro "))
+
+        assert warnings == []
+        assert hymn_book["name"] == "O Cruzeiro"
+        assert hymn_book["owner"] == "Mestre Irineu"
+        assert hymn_book["intro_name"] == "Cruzeiro"
+        assert hymn_book["description"] == ""
+        assert hymn_book["hymns"][0] == {
+            "number": 1,
+            "title": "Lua Branca",
+            "text": "Lua branca",
+            "received_at": date(1930, 7, 15),
+            "offered_to": "",
+            "style": "",
+            "extra_instructions": "",
+            "repetitions": "",
+        }
+        assert hymn_book["hymns"][1]["style"] == "Marcha"
+
+    def test_strict_requires_root_key(self):
+        """Strict mode requires the hymn_book root key."""
+        with pytest.raises(IngestionError, match="must contain 'hymn_book' key") as exc_info:
+            parse_hymnbook({"name": "Teste"})
+
+        assert exc_info.value.code == "missing_root"
+
+    def test_lenient_accepts_flat_format_and_owner_name(self):
+        """Lenient mode accepts fields at the root and the owner_name alias."""
+        hymn_book, _ = parse_hymnbook({"name": "Teste", "owner_name": "Dono", "hymns": []}, strict=False)
+
+        assert hymn_book["owner"] == "Dono"
+        assert hymn_book["hymns"] == []
+
+    def test_rejects_non_mapping_root(self):
+        """A YAML list or scalar is not a hymnbook."""
+        with pytest.raises(IngestionError, match="mapping"):
+            parse_hymnbook(["a", "b"], strict=False)
+
+    def test_missing_name_has_code(self):
+        """Missing name is reported with a stable code."""
+        with pytest.raises(IngestionError) as exc_info:
+            parse_hymnbook({"owner": "Dono"}, strict=False)
+
+        assert exc_info.value.code == "missing_name"
+
+    def test_strict_requires_owner_and_hymns(self):
+        """Strict mode requires owner and at least one hymn."""
+        with pytest.raises(IngestionError, match="hymn_book.owner is required"):
+            parse_hymnbook(hymnbook_data(owner=None))
+
+        with pytest.raises(IngestionError, match="No hymns found"):
+            parse_hymnbook(hymnbook_data(hymns=[]))
+
+    def test_strict_accepts_explicit_empty_owner(self):
+        """owner: "" is how the export writes hymn books without a known owner."""
+        hymn_book, _ = parse_hymnbook(hymnbook_data(owner=""))
+
+        assert hymn_book["owner"] == ""
+
+    def test_reports_all_duplicate_numbers(self):
+        """Duplicate numbers are collected in one pass and reported sorted."""
+        hymns = [{"number": n, "title": "T", "text": "X"} for n in (3, 1, 3, 2, 1)]
+
+        with pytest.raises(IngestionError, match="Duplicate hymn numbers found in YAML: 1, 3"):
+            parse_hymnbook(hymnbook_data(hymns=hymns))
+
+    @pytest.mark.parametrize("hymns", ["abc", 42, {"number": 1, "title": "T", "text": "X"}])
+    def test_rejects_non_list_hymns(self, hymns):
+        """hymns must be a list; other types are a validation error, not a crash."""
+        with pytest.raises(IngestionError, match="hymn_book.hymns must be a list") as exc_info:
+            parse_hymnbook(hymnbook_data(hymns=hymns))
+
+        assert exc_info.value.code == "invalid_hymns"
+
+    @pytest.mark.parametrize("entry", [1, "Lua Branca", ["number", 1], None])
+    def test_rejects_non_mapping_hymn_entries(self, entry):
+        """Each hymn entry must be a mapping."""
+        hymns = [{"number": 1, "title": "T", "text": "X"}, entry]
+
+        with pytest.raises(IngestionError, match="Hymn #2 must be a mapping") as exc_info:
+            parse_hymnbook(hymnbook_data(hymns=hymns))
+
+        assert exc_info.value.code == "invalid_hymns"
+
+    @pytest.mark.parametrize(
+        "hymn, message",
+        [
+            ({"title": "T", "text": "X"}, "Hymn number is required"),
+            ({"number": "um", "title": "T", "text": "X"}, "Invalid hymn number"),
+            ({"number": 1, "text": "X"}, "Hymn title is required"),
+            ({"number": 1, "title": "T"}, "Hymn text is required"),
+        ],
+    )
+    def test_validates_required_hymn_fields(self, hymn, message):
+        """Each hymn needs a number, a title and a text."""
+        with pytest.raises(IngestionError, match=message):
+            parse_hymnbook(hymnbook_data(hymns=[hymn]))
+
+    def test_parses_string_dates(self):
+        """received_at given as a quoted string is parsed."""
+        hymn_book, _ = parse_hymnbook(
+            hymnbook_data(hymns=[{"number": 1, "title": "T", "text": "X", "received_at": "1931-01-20"}])
+        )
+
+        assert hymn_book["hymns"][0]["received_at"] == date(1931, 1, 20)
+
+    def test_invalid_date_becomes_warning(self):
+        """An invalid date is dropped with a warning instead of failing."""
+        hymn_book, warnings = parse_hymnbook(
+            hymnbook_data(hymns=[{"number": 7, "title": "T", "text": "X", "received_at": "ontem"}])
+        )
+
+        assert hymn_book["hymns"][0]["received_at"] is None
+        assert warnings == ["Invalid date format for hymn 7: ontem"]
+
+    def test_stringifies_scalar_fields(self):
+        """Numeric titles or styles from YAML become strings."""
+        hymn_book, _ = parse_hymnbook(hymnbook_data(hymns=[{"number": 1, "title": 1930, "text": "X", "style": 3}]))
+
+        assert hymn_book["hymns"][0]["title"] == "1930"
+        assert hymn_book["hymns"][0]["style"] == "3"
+
+
+@pytest.mark.django_db
+class TestBulkCreateHymns:
+    """Tests for build_hymns / bulk_create_hymns."""
+
+    def test_build_hymns_accepts_partial_dicts(self, hymn_book):
+        """Optional fields default to empty values."""
+        hymns = build_hymns(hymn_book, [{"number": 1, "title": "T", "text": "X"}])
+
+        assert hymns[0].style == ""
+        assert hymns[0].received_at is None
+
+    def test_bulk_create_hymns(self, hymn_book, django_assert_num_queries):
+        """All hymns are inserted with a single query, plus one UPDATE of the hymn counter."""
+        parsed, _ = parse_hymnbook(hymnbook_data())
+
+        with django_assert_num_queries(2):
+            bulk_create_hymns(hymn_book, parsed["hymns"])
+
+        assert list(Hymn.objects.filter(hymn_book=hymn_book).values_list("number", flat=True)) == [1, 2]
+        assert HymnBook.objects.get(pk=hymn_book.pk).hymns_total == 2
+
+
+@pytest.mark.django_db
+class TestDeleteHymns:
+    """Tests for delete_hymns."""
+
+    def test_counter_cache_and_tombstones_once_per_batch(self, hymn_book, hymn_factory, user_factory):
+        """Deleting many hymns issues one counter UPDATE and one tombstone INSERT, not one per hymn."""
+        hymns = [hymn_factory(hymn_book, number=number) for number in range(1, 6)]
+        Favorite.objects.create(user=user_factory(), hymn=hymns[0])
+        deleted = [hymn.id for hymn in hymns[:4]]
+
+        with CaptureQueriesContext(connection) as queries:
+            delete_hymns(hymn_book, deleted)
+
+        sql = [q["sql"] for q in queries]
+        assert sum('UPDATE "hymns_hymnbook"' in s for s in sql) == 1
+        assert sum('INSERT INTO "hymns_tombstone"' in s for s in sql) == 1
+        assert not any('FROM "hymns_hymnbook"' in s for s in sql)
+        assert list(Hymn.objects.values_list("number", flat=True)) == [5]
+        assert not Favorite.objects.exists()
+        assert set(Tombstone.objects.values_list("object_id", flat=True)) == set(deleted)
+        assert hymn_book.hymns_total == 1
+        assert HymnBook.objects.get(pk=hymn_book.pk).hymns_total == 1
@@ -0,0 +1,247 @@
+"""
+Tests for grouped notifications (apps/users/notifications.py).
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+
+from apps.hymns.models import Hymn, HymnBook, StagedUpload
+from apps.users.models import Notification, UserFollow
+from apps.users.notifications import describe_actors, fan_out_to_followers, notify_followers, record_notification
+
+
+@pytest.fixture
+def owner(user_factory):
+    return user_factory(email="dono@example.com")
+
+
+@pytest.fixture
+def hymn(db, owner):
+    hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu", owner_user=owner)
+    return Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="Lua branca")
+
+
+def favorite(recipient, actor, hymn):
+    return record_notification(
+        recipient.pk, actor.pk, Notification.TYPE_FAVORITE, f"hymn:{hymn.pk}", hymn.title, f"/hinos/{hymn.pk}/"
+    )
+
+
+class TestDescribeActors:
+    """Tests for the actor summary."""
+
+    @pytest.mark.parametrize(
+        "actors, count, expected",
+        [
+            (["ana"], 1, "ana"),
+            (["ana", "bruno"], 2, "ana e bruno"),
+            (["ana", "bruno", "carla"], 3, "ana, bruno e mais 1 pessoa"),
+            (["ana", "bruno", "carla"], 14, "ana, bruno e mais 12 pessoas"),
+        ],
+    )
+    def test_describe(self, actors, count, expected):
+        assert describe_actors(actors, count) == expected
+
+
+@pytest.mark.django_db
+class TestRecordNotification:
+    """Tests for grouping notifications."""
+
+    def test_actions_on_same_target_are_grouped(self, owner, hymn, user_factory):
+        """Many favorites of one hymn become one row with a count."""
+        for i in range(14):
+            favorite(owner, user_factory(email=f"fa{i}@example.com"), hymn)
+
+        notification = Notification.objects.get(recipient=owner)
+        assert notification.actor_count == 14
+        assert notification.actors[0] == "fa13"
+        assert notification.message == "fa13, fa12 e mais 12 pessoas favoritaram o hino Lua Branca"
+
+    def test_same_actor_counts_once(self, owner, hymn, user_factory):
+        """Favoriting again after unfavoriting does not inflate the count."""
+        fan = user_factory(email="fa@example.com")
+        favorite(owner, fan, hymn)
+        notification = favorite(owner, fan, hymn)
+
+        assert notification.actor_count == 1
+        assert notification.message == "fa favoritou o hino Lua Branca"
+
+    def test_read_notification_starts_a_new_group(self, owner, hymn, user_factory):
+        """Once read, new actions create a fresh notification."""
+        first = favorite(owner, user_factory(email="fa1@example.com"), hymn)
+        Notification.objects.filter(pk=first.pk).update(is_read=True)
+
+        second = favorite(owner, user_factory(email="fa2@example.com"), hymn)
+
+        assert second.pk != first.pk
+        assert second.actor_count == 1
+
+    def test_old_notification_starts_a_new_group(self, owner, hymn, user_factory, settings):
+        """Actions outside the window are not grouped."""
+        first = favorite(owner, user_factory(email="fa1@example.com"), hymn)
+        old = timezone.now() - timedelta(hours=settings.NOTIFICATION_GROUP_WINDOW_HOURS + 1)
+        Notification.objects.filter(pk=first.pk).update(created_at=old)
+
+        assert favorite(owner, user_factory(email="fa2@example.com"), hymn).pk != first.pk
+
+
+@pytest.mark.django_db
+class TestNotificationViews:
+    """The social views write notifications through the task."""
+
+    def test_favorites_are_grouped(self, client, owner, hymn, user_factory, django_capture_on_commit_callbacks):
+        for i in range(3):
+            client.force_login(user_factory(email=f"fa{i}@example.com"))
+            with django_capture_on_commit_callbacks(execute=True):
+                client.post(reverse("hymns:toggle_favorite", kwargs={"hymn_id": hymn.id}))
+
+        notification = Notification.objects.get(recipient=owner)
+        assert notification.notification_type == Notification.TYPE_FAVORITE
+        assert notification.actor_count == 3
+
+    def test_follows_are_grouped(self, client, owner, user_factory, django_capture_on_commit_callbacks):
+        for i in range(2):
+            client.force_login(user_factory(email=f"seguidor{i}@example.com"))
+            with django_capture_on_commit_callbacks(execute=True):
+                client.post(reverse("users:toggle_follow", kwargs={"username": owner.username}))
+
+        notification = Notification.objects.get(recipient=owner)
+        assert notification.message == "seguidor1 e seguidor0 começaram a seguir você"
+
+    def test_own_actions_are_not_notified(self, client, owner, hymn, django_capture_on_commit_callbacks):
+        client.force_login(owner)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("hymns:toggle_favorite", kwargs={"hymn_id": hymn.id}))
+
+        assert not Notification.objects.exists()
+
+
+@pytest.mark.django_db
+class TestFanOut:
+    """Tests for notifying every follower of a user."""
+
+    @pytest.fixture
+    def followers(self, owner, user_factory):
+        followers = [user_factory(email=f"seguidor{i}@example.com") for i in range(5)]
+        UserFollow.objects.bulk_create([UserFollow(follower=follower, followed=owner) for follower in followers])
+        return followers
+
+    def fan_out(self, owner, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            notify_followers(
+                owner, Notification.TYPE_NEW_HYMNBOOK, "hymnbook:1", target_label="O Cruzeiro", link="/hinarios/x/"
+            )
+
+    def test_every_follower_is_notified_in_batches(
+        self, owner, followers, settings, django_capture_on_commit_callbacks
+    ):
+        """Batches smaller than the follower list still reach everyone once."""
+        settings.NOTIFICATION_FANOUT_BATCH_SIZE = 2
+
+        self.fan_out(owner, django_capture_on_commit_callbacks)
+
+        notifications = Notification.objects.filter(notification_type=Notification.TYPE_NEW_HYMNBOOK)
+        assert sorted(notifications.values_list("recipient_id", flat=True)) == sorted(f.pk for f in followers)
+        assert notifications.first().message == "dono publicou o hinário O Cruzeiro"
+
+    def test_rerun_does_not_duplicate(self, owner, followers, django_capture_on_commit_callbacks):
+        """A retried or duplicated event notifies nobody twice."""
+        self.fan_out(owner, django_capture_on_commit_callbacks)
+        self.fan_out(owner, django_capture_on_commit_callbacks)
+
+        assert Notification.objects.count() == len(followers)
+
+    def test_batch_is_one_insert(self, owner, followers, django_assert_num_queries):
+        """Each batch costs a fixed number of queries, whatever its size."""
+        with django_assert_num_queries(4):
+            created, cursor = fan_out_to_followers(owner.pk, Notification.TYPE_NEW_HYMNBOOK, "hymnbook:1")
+
+        assert created == len(followers)
+        assert cursor is None
+
+    def test_upload_notifies_followers_after_commit(self, client, owner, followers, django_capture_on_commit_callbacks):
+        """Publishing a hymn book only schedules the fan-out; the request does no per-follower work."""
+        staged_upload = StagedUpload(user=owner, filename="a.yaml", name="Novo", status=StagedUpload.STATUS_DONE)
+        staged_upload.set_payload(
+            {"name": "Novo", "owner": "Dono", "hymns": [{"number": 1, "title": "A", "text": "B"}]}
+        )
+        staged_upload.save()
+        client.force_login(owner)
+        session = client.session
+        session["staged_upload_id"] = str(staged_upload.id)
+        session.save()
+
+        with patch("apps.users.tasks.fan_out_notification_task.delay") as delay:
+            with django_capture_on_commit_callbacks(execute=True):
+                client.post(reverse("users:upload_preview"))
+
+        hymn_book = HymnBook.objects.get(name="Novo")
+        delay.assert_called_once_with(
+            owner.pk, Notification.TYPE_NEW_HYMNBOOK, f"hymnbook:{hymn_book.pk}", "Novo", f"/hinarios/{hymn_book.slug}/"
+        )
+
+
+@pytest.mark.django_db
+class TestUnreadCount:
+    """Tests for the cached unread counter."""
+
+    url = reverse_lazy("users:unread_notifications_count")
+
+    def create(self, recipient, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=True):
+            return Notification.objects.create(
+                recipient=recipient, notification_type=Notification.TYPE_COMMENT, title="Oi", message="Oi"
+            )
+
+    def test_polling_does_not_touch_notifications_table(self, client, owner, django_capture_on_commit_callbacks):
+        """After the first call the count comes from the cache."""
+        self.create(owner, django_capture_on_commit_callbacks)
+        client.force_login(owner)
+        assert client.get(self.url).json()["count"] == 1
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.url)
+
+        assert response.json()["count"] == 1
+        assert not [query for query in queries if "users_notification" in query["sql"]]
+
+    def test_private_short_cache_headers(self, client, owner, settings):
+        client.force_login(owner)
+
+        response = client.get(self.url)
+
+        assert "private" in response["Cache-Control"]
+        assert f"max-age={settings.NOTIFICATION_UNREAD_MAX_AGE}" in response["Cache-Control"]
+
+    def test_count_follows_create_read_and_read_all(self, client, owner, django_capture_on_commit_callbacks):
+        """Creating, reading one and reading all keep the cached count right."""
+        client.force_login(owner)
+        first = self.create(owner, django_capture_on_commit_callbacks)
+        self.create(owner, django_capture_on_commit_callbacks)
+        assert client.get(self.url).json()["count"] == 2
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("users:mark_notification_read", kwargs={"notification_id": first.id}))
+        assert client.get(self.url).json()["count"] == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.get(reverse("users:notifications"))
+        assert client.get(self.url).json()["count"] == 0
+
+    def test_fan_out_updates_followers_counts(self, client, owner, user_factory, django_capture_on_commit_callbacks):
+        """bulk_create skips signals, so the fan-out invalidates the counts itself."""
+        follower = user_factory(email="seguidor@example.com")
+        UserFollow.objects.create(follower=follower, followed=owner)
+        client.force_login(follower)
+        assert client.get(self.url).json()["count"] == 0
+
+        with django_capture_on_commit_callbacks(execute=True):
+            fan_out_to_followers(owner.pk, Notification.TYPE_NEW_HYMNBOOK, "hymnbook:1")
+
+        assert client.get(self.url).json()["count"] == 1
@@ -0,0 +1,256 @@
+"""
+Tests for the anonymous page cache (apps/hymns/page_cache.py) and its invalidation signals.
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.hymns import page_cache
+from apps.hymns.ingestion import bulk_create_hymns
+from apps.hymns.models import Comment, Hymn, HymnAudio, HymnBook
+
+
+@pytest.fixture
+def hymn(db, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        return Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="Lua branca")
+
+
+def get_twice(client, url):
+    """GET url twice; return the second response and the queries it ran."""
+    client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    return response, queries
+
+
+@pytest.mark.django_db
+class TestAnonymousPageCache:
+    """Anonymous GETs are served from cache without touching the database."""
+
+    @pytest.mark.parametrize(
+        "url_for",
+        [
+            lambda hymn: reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}),
+            lambda hymn: reverse("hymns:hymnbook_detail", kwargs={"slug": hymn.hymn_book.slug}),
+            lambda hymn: reverse("hymns:hymnbook_list"),
+            lambda hymn: reverse("hymns:home"),
+        ],
+        ids=["hymn", "hymnbook", "list", "home"],
+    )
+    def test_second_request_runs_no_queries(self, client, hymn, url_for):
+        """A cached page costs zero queries."""
+        response, queries = get_twice(client, url_for(hymn))
+
+        assert response.status_code == 200
+        assert len(queries) == 0
+        assert b"O Cruzeiro" in response.content
+
+    def test_hymn_page_with_comments_is_cached(
+        self, client, hymn, django_user_model, django_capture_on_commit_callbacks
+    ):
+        """Visible comments render no CSRF token for visitors, so the page is still stored."""
+        user = django_user_model.objects.create_user(username="u", email="u@example.com", password="p")
+        with django_capture_on_commit_callbacks(execute=True):
+            Comment.objects.create(hymn=hymn, user=user, text="Comentario visivel")
+
+        response, queries = get_twice(client, reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}))
+
+        assert len(queries) == 0
+        assert b"Comentario visivel" in response.content
+        assert b"csrfmiddlewaretoken" not in response.content
+
+    def test_authenticated_requests_are_not_cached(self, client, hymn, django_user_model):
+        """Logged-in users always get a freshly rendered page."""
+        client.force_login(django_user_model.objects.create_user(username="u", email="u@example.com", password="p"))
+
+        response, queries = get_twice(client, reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}))
+
+        assert len(queries) > 0
+        assert response.context["hymn"] == hymn
+
+    def test_query_string_is_part_of_the_key(self, client, hymn):
+        """Different pages of the list are cached separately."""
+        url = reverse("hymns:hymnbook_list")
+        client.get(url)
+
+        response = client.get(url, {"page": 999})
+
+        assert response.status_code == 404
+
+    def test_404_is_not_cached(self, client, db):
+        """Only successful responses are stored."""
+        url = reverse("hymns:hymnbook_detail", kwargs={"slug": "nao-existe"})
+        client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+
+        assert response.status_code == 404
+        assert len(queries) > 0
+
+
+@pytest.mark.django_db
+class TestPageCacheInvalidation:
+    """Saving or deleting related objects bumps the page versions after commit."""
+
+    def test_comment_invalidates_hymn_page(self, client, hymn, django_user_model, django_capture_on_commit_callbacks):
+        """A new comment shows up for anonymous visitors."""
+        url = reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk})
+        client.get(url)
+        user = django_user_model.objects.create_user(username="u", email="u@example.com", password="p")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Comment.objects.create(hymn=hymn, user=user, text="Comentario novo")
+
+        assert b"Comentario novo" in client.get(url).content
+
+    def test_approved_audio_invalidates_hymn_page(self, client, hymn, django_capture_on_commit_callbacks):
+        """Approving an audio bumps the hymn version."""
+        url = reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk})
+        version = page_cache.get_version(page_cache.HYMN, str(hymn.pk))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            HymnAudio.objects.create(hymn=hymn, audio_file="audio.mp3", is_approved=True)
+
+        assert page_cache.get_version(page_cache.HYMN, str(hymn.pk)) != version
+        assert client.get(url).status_code == 200
+
+    def test_hymn_book_change_invalidates_its_hymn_pages(self, client, hymn, django_capture_on_commit_callbacks):
+        """The hymn book name and owner appear on every hymn page."""
+        url = reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk})
+        client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            hymn.hymn_book.owner_name = "Raimundo Irineu Serra"
+            hymn.hymn_book.save()
+
+        assert b"Raimundo Irineu Serra" in client.get(url).content
+
+    def test_hymn_change_invalidates_hymn_book_page(self, client, hymn, django_capture_on_commit_callbacks):
+        """Editing a hymn refreshes the hymn book page that lists it."""
+        url = reverse("hymns:hymnbook_detail", kwargs={"slug": hymn.hymn_book.slug})
+        client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            hymn.title = "Lua Branca Revisada"
+            hymn.save()
+
+        assert b"Lua Branca Revisada" in client.get(url).content
+
+    def test_bulk_import_invalidates_hymn_book_page(self, client, hymn, django_capture_on_commit_callbacks):
+        """bulk_create skips signals, so the ingestion path invalidates explicitly."""
+        url = reverse("hymns:hymnbook_detail", kwargs={"slug": hymn.hymn_book.slug})
+        client.get(url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            bulk_create_hymns(hymn.hymn_book, [{"number": 2, "title": "Tuperci", "text": "Tuperci"}])
+
+        assert b"Tuperci" in client.get(url).content
+
+    def test_invalidation_waits_for_commit(self, hymn, django_capture_on_commit_callbacks):
+        """Versions are not bumped while the transaction is still open."""
+        version = page_cache.get_version(page_cache.HYMN, str(hymn.pk))
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            hymn.title = "Outro"
+            hymn.save()
+
+        assert page_cache.get_version(page_cache.HYMN, str(hymn.pk)) == version
+        assert callbacks
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    """Pages carry ETag/Last-Modified validators and answer conditional GETs with 304."""
+
+    @pytest.mark.parametrize(
+        "url_for",
+        [
+            lambda hymn: reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}),
+            lambda hymn: reverse("hymns:hymnbook_detail", kwargs={"slug": hymn.hymn_book.slug}),
+            lambda hymn: reverse("hymns:hymnbook_list"),
+            lambda hymn: reverse("hymns:home"),
+        ],
+        ids=["hymn", "hymnbook", "list", "home"],
+    )
+    def test_if_none_match_returns_304_without_queries(self, client, hymn, url_for):
+        """A matching ETag is answered from the version alone."""
+        etag = client.get(url_for(hymn))["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url_for(hymn), HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert len(queries) == 0
+
+    def test_if_modified_since_returns_304(self, client, hymn):
+        """Last-Modified is derived from the version timestamp."""
+        url = reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk})
+        last_modified = client.get(url)["Last-Modified"]
+
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == 304
+
+    def test_new_comment_changes_etag(self, client, hymn, django_user_model, django_capture_on_commit_callbacks):
+        """Related content changes invalidate the validator."""
+        url = reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk})
+        etag = client.get(url)["ETag"]
+        user = django_user_model.objects.create_user(username="u", email="u@example.com", password="p")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Comment.objects.create(hymn=hymn, user=user, text="Comentario novo")
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_anonymous_responses_are_public(self, client, hymn, settings):
+        """Anonymous pages may be reused by browsers and proxies for a short while."""
+        settings.PAGE_BROWSER_MAX_AGE = 120
+
+        response = client.get(reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}))
+
+        assert "public" in response["Cache-Control"]
+        assert "max-age=120" in response["Cache-Control"]
+        assert "Cookie" in response["Vary"]
+
+    def test_authenticated_responses_are_private_and_per_user(self, client, hymn, django_user_model):
+        """Logged-in pages are private, always revalidated and never share an ETag with another user."""
+        url = reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk})
+        anonymous_etag = client.get(url)["ETag"]
+        client.force_login(django_user_model.objects.create_user(username="u", email="u@example.com", password="p"))
+
+        response = client.get(url)
+
+        assert "private" in response["Cache-Control"]
+        assert "no-cache" in response["Cache-Control"]
+        assert response["ETag"] != anonymous_etag
+        assert client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+    def test_login_changes_authenticated_etag(self, client, hymn, django_user_model):
+        """A new login rotates the CSRF secret, so the page cached by the browser is not reused."""
+        url = reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk})
+        django_user_model.objects.create_user(username="u", email="u@example.com", password="p")
+        client.login(username="u", password="p")
+        client.get(url)
+        etag = client.get(url)["ETag"]
+
+        client.logout()
+        client.login(username="u", password="p")
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+
+    def test_404_has_no_validators(self, client, db):
+        """Only successful pages get an ETag."""
+        response = client.get(reverse("hymns:hymnbook_detail", kwargs={"slug": "nao-existe"}))
+
+        assert response.status_code == 404
+        assert not response.has_header("ETag")
@@ -193,6 +193,146 @@ class TestToggleFollow:
         assert not UserFollow.objects.filter(follower=user, followed=user).exists()
 
 
+@pytest.mark.django_db
+class TestSocialCounters:
+    """Tests for the denormalized social counters."""
+
+    def test_toggle_favorite_updates_counter(self, client):
+        """Favoriting and unfavoriting adjust Hymn.favorites_count."""
+        user = User.objects.create_user(username="user1", email="user1@example.com", password="pass123")
+        hb = HymnBook.objects.create(name="Test", owner_name="Owner")
+        hymn = Hymn.objects.create(hymn_book=hb, number=1, title="Test", text="Text")
+        client.force_login(user)
+        url = reverse("hymns:toggle_favorite", kwargs={"hymn_id": hymn.id})
+
+        client.post(url)
+        hymn.refresh_from_db()
+        assert hymn.favorites_count == 1
+
+        client.post(url)
+        hymn.refresh_from_db()
+        assert hymn.favorites_count == 0
+
+    def test_comments_update_counter(self, client):
+        """Adding and deleting comments adjust Hymn.comments_count."""
+        user = User.objects.create_user(username="user1", email="user1@example.com", password="pass123")
+        hb = HymnBook.objects.create(name="Test", owner_name="Owner")
+        hymn = Hymn.objects.create(hymn_book=hb, number=1, title="Test", text="Text")
+        client.force_login(user)
+
+        client.post(reverse("hymns:add_comment", kwargs={"hymn_id": hymn.id}), {"text": "Great hymn!"})
+        hymn.refresh_from_db()
+        assert hymn.comments_count == 1
+
+        comment = Comment.objects.get(hymn=hymn)
+        client.post(reverse("hymns:delete_comment", kwargs={"comment_id": comment.id}))
+        hymn.refresh_from_db()
+        assert hymn.comments_count == 0
+
+    def test_flagging_hides_comment_from_counter(self, client):
+        """A flagged comment is no longer counted; flagging it again changes nothing."""
+        author = User.objects.create_user(username="user1", email="user1@example.com", password="pass123")
+        reporter = User.objects.create_user(username="user2", email="user2@example.com", password="pass123")
+        hb = HymnBook.objects.create(name="Test", owner_name="Owner")
+        hymn = Hymn.objects.create(hymn_book=hb, number=1, title="Test", text="Text")
+        client.force_login(author)
+        client.post(reverse("hymns:add_comment", kwargs={"hymn_id": hymn.id}), {"text": "Great hymn!"})
+        comment = Comment.objects.get(hymn=hymn)
+
+        client.force_login(reporter)
+        url = reverse("hymns:flag_comment", kwargs={"comment_id": comment.id})
+        client.post(url)
+        client.post(url)
+
+        hymn.refresh_from_db()
+        assert hymn.comments_count == 0
+
+        # Deleting an already hidden comment does not decrement again
+        Hymn.objects.filter(pk=hymn.pk).update(comments_count=1)
+        client.force_login(author)
+        client.post(reverse("hymns:delete_comment", kwargs={"comment_id": comment.id}))
+        hymn.refresh_from_db()
+        assert hymn.comments_count == 1
+
+    def test_decrement_never_goes_negative(self, client):
+        """A drifted counter at zero stays at zero on removal."""
+        user = User.objects.create_user(username="user1", email="user1@example.com", password="pass123")
+        hb = HymnBook.objects.create(name="Test", owner_name="Owner")
+        hymn = Hymn.objects.create(hymn_book=hb, number=1, title="Test", text="Text")
+        Favorite.objects.create(user=user, hymn=hymn)  # bypasses the view: counter stays 0
+        client.force_login(user)
+
+        client.post(reverse("hymns:toggle_favorite", kwargs={"hymn_id": hymn.id}))
+
+        hymn.refresh_from_db()
+        assert hymn.favorites_count == 0
+
+    def test_toggle_follow_updates_both_users(self, client):
+        """Following adjusts followers_count of the followed and following_count of the follower."""
+        user1 = User.objects.create_user(username="user1", email="user1@example.com", password="pass123")
+        user2 = User.objects.create_user(username="user2", email="user2@example.com", password="pass123")
+        client.force_login(user1)
+        url = reverse("users:toggle_follow", kwargs={"username": user2.username})
+
+        client.post(url)
+        user1.refresh_from_db()
+        user2.refresh_from_db()
+        assert (user1.following_count, user2.followers_count) == (1, 1)
+
+        client.post(url)
+        user1.refresh_from_db()
+        user2.refresh_from_db()
+        assert (user1.following_count, user2.followers_count) == (0, 0)
+
+    def test_profile_reads_counters_without_count_queries(self, client):
+        """The profile page shows the stored counters and runs no COUNT on follows."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        user = User.objects.create_user(username="user1", email="user1@example.com", password="pass123")
+        User.objects.filter(pk=user.pk).update(followers_count=3, following_count=5)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse("users:profile", kwargs={"username": user.username}))
+
+        assert response.context["followers_count"] == 3
+        assert response.context["following_count"] == 5
+        assert not [q for q in queries if "users_userfollow" in q["sql"]]
+
+
+@pytest.mark.django_db
+class TestReconcileSocialCounts:
+    """Tests for the reconcile_social_counts task."""
+
+    def test_fixes_drifted_counters(self):
+        """Counters drifted by writes that bypass the views are recomputed."""
+        from apps.hymns.tasks import reconcile_social_counts
+
+        user1 = User.objects.create_user(username="user1", email="user1@example.com", password="pass123")
+        user2 = User.objects.create_user(username="user2", email="user2@example.com", password="pass123")
+        hb = HymnBook.objects.create(name="Test", owner_name="Owner")
+        hymn = Hymn.objects.create(hymn_book=hb, number=1, title="Test", text="Text")
+        other = Hymn.objects.create(hymn_book=hb, number=2, title="Other", text="Text")
+        Favorite.objects.create(user=user1, hymn=hymn)
+        Comment.objects.create(user=user2, hymn=hymn, text="Bonito")
+        Comment.objects.create(user=user1, hymn=hymn, text="Reportado", is_flagged=True)
+        Comment.objects.create(user=user1, hymn=hymn, text="Pendente", is_approved=False)
+        UserFollow.objects.create(follower=user1, followed=user2)
+        Hymn.objects.filter(pk=other.pk).update(favorites_count=4)
+
+        result = reconcile_social_counts.delay().get()
+
+        assert result == {"hymns": 2, "users": 2}
+        hymn.refresh_from_db()
+        other.refresh_from_db()
+        user1.refresh_from_db()
+        user2.refresh_from_db()
+        assert (hymn.favorites_count, hymn.comments_count) == (1, 1)
+        assert other.favorites_count == 0
+        assert (user1.following_count, user1.followers_count) == (1, 0)
+        assert (user2.following_count, user2.followers_count) == (0, 1)
+
+
 @pytest.mark.django_db
 class TestNotifications:
     """Tests for notifications views."""
@@ -0,0 +1,39 @@
+"""
+Tests for the repair_hymn_counts management command.
+"""
+
+from django.core.management import call_command
+
+from apps.hymns.models import Hymn, HymnBook
+
+
+class TestRepairHymnCountsCommand:
+    """Test suite for repair_hymn_counts command."""
+
+    def test_fixes_drifted_counters(self, db, capsys):
+        """Counters that drifted (e.g. writes that bypass signals) are recomputed."""
+        cruzeiro = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        Hymn.objects.create(hymn_book=cruzeiro, number=1, title="Lua Branca", text="Lua branca")
+        Hymn.objects.create(hymn_book=cruzeiro, number=2, title="Tuperci", text="Tuperci")
+        padrinho = HymnBook.objects.create(name="Hinário do Padrinho", owner_name="Padrinho Sebastião")
+        Hymn.objects.create(hymn_book=padrinho, number=1, title="Sol", text="Sol")
+        # bulk_create does not send signals
+        Hymn.objects.bulk_create([Hymn(hymn_book=cruzeiro, number=3, title="Sol, Lua, Estrela", text="Sol")])
+        HymnBook.objects.filter(pk=padrinho.pk).update(hymns_total=7)
+        empty = HymnBook.objects.create(name="Vazio", owner_name="Owner")
+
+        call_command("repair_hymn_counts")
+
+        assert HymnBook.objects.get(pk=cruzeiro.pk).hymns_total == 3
+        assert HymnBook.objects.get(pk=padrinho.pk).hymns_total == 1
+        assert HymnBook.objects.get(pk=empty.pk).hymns_total == 0
+        assert "Repaired hymn counts of 2 hymn books" in capsys.readouterr().out
+
+    def test_consistent_counters_are_left_alone(self, db, capsys):
+        """Nothing to repair reports zero."""
+        hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="Lua branca")
+
+        call_command("repair_hymn_counts")
+
+        assert "Repaired hymn counts of 0 hymn books" in capsys.readouterr().out
@@ -0,0 +1,96 @@
+"""
+Tests for the cached site statistics (apps/hymns/stats.py) used by the home page.
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.hymns import page_cache, stats, tasks
+from apps.hymns.models import Hymn, HymnAudio, HymnBook, HymnBookVersion
+
+
+@pytest.fixture
+def catalogue(db):
+    hymn_book = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+    hymn = Hymn.objects.create(hymn_book=hymn_book, number=1, title="Lua Branca", text="Lua branca")
+    Hymn.objects.create(hymn_book=hymn_book, number=2, title="Tuperci", text="Tuperci")
+    return hymn
+
+
+@pytest.mark.django_db
+class TestComputeStats:
+    """Totals computed from the database."""
+
+    def test_counts_approved_audios_and_contributors(self, catalogue, django_user_model):
+        """Only approved audios count; contributors are users with an approved audio or an uploaded version."""
+        singer = django_user_model.objects.create_user(username="a", email="a@example.com", password="p")
+        editor = django_user_model.objects.create_user(username="b", email="b@example.com", password="p")
+        django_user_model.objects.create_user(username="c", email="c@example.com", password="p")
+        HymnAudio.objects.create(hymn=catalogue, audio_file="a.mp3", uploaded_by=singer, is_approved=True)
+        HymnAudio.objects.create(hymn=catalogue, audio_file="b.mp3", uploaded_by=singer, is_approved=True)
+        HymnAudio.objects.create(hymn=catalogue, audio_file="c.mp3", is_approved=False)
+        HymnBookVersion.objects.create(hymn_book=catalogue.hymn_book, version_name="2010", uploaded_by=editor)
+
+        assert stats.compute_stats() == {"hymn_books": 1, "hymns": 2, "audios": 2, "contributors": 2}
+
+    def test_estimate_is_unavailable_outside_postgres(self, db):
+        """pg_class is only queried on PostgreSQL."""
+        if connection.vendor == "postgresql":
+            pytest.skip("estimate is available on PostgreSQL")
+
+        assert stats.estimated_count(Hymn) is None
+
+    def test_large_tables_use_the_estimate(self, catalogue, settings, monkeypatch):
+        """Above the threshold the planner estimate replaces COUNT."""
+        settings.SITE_STATS_ESTIMATE_THRESHOLD = 1000
+        monkeypatch.setattr(stats, "estimated_count", lambda model: 5000 if model is Hymn else 10)
+
+        assert stats.table_count(Hymn) == 5000
+        assert stats.table_count(HymnBook) == 1
+
+
+@pytest.mark.django_db
+class TestHomeStats:
+    """The home page reads the totals from the cache."""
+
+    def test_home_runs_no_count_query(self, client, catalogue):
+        """With warm stats the hot path issues no COUNT."""
+        stats.get_stats()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(reverse("hymns:home"))
+
+        assert response.context["total_hymns"] == 2
+        assert not [q for q in queries if "COUNT(" in q["sql"].upper()]
+
+    def test_changes_refresh_stats_after_commit(self, client, catalogue, django_capture_on_commit_callbacks):
+        """New hymns show up on the (page-cached) home once the transaction commits."""
+        client.get(reverse("hymns:home"))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Hymn.objects.create(hymn_book=catalogue.hymn_book, number=3, title="Sol, Lua, Estrela", text="...")
+
+        assert stats.get_stats()["hymns"] == 3
+        assert client.get(reverse("hymns:home")).context["total_hymns"] == 3
+
+    def test_refresh_is_enqueued_once_per_burst(self, catalogue, monkeypatch, django_capture_on_commit_callbacks):
+        """Several changes in one transaction schedule a single refresh task."""
+        calls = []
+        monkeypatch.setattr(tasks.refresh_site_stats, "delay", lambda: calls.append(1))
+
+        with django_capture_on_commit_callbacks(execute=True):
+            for number in range(3, 6):
+                Hymn.objects.create(hymn_book=catalogue.hymn_book, number=number, title=f"Hino {number}", text="...")
+
+        assert len(calls) == 1
+
+    def test_unchanged_stats_keep_home_version(self, catalogue):
+        """The home page is only invalidated when a total actually changes."""
+        tasks.refresh_site_stats()
+        version = page_cache.get_version(page_cache.SITE)
+
+        tasks.refresh_site_stats()
+
+        assert page_cache.get_version(page_cache.SITE) == version
@@ -0,0 +1,80 @@
+"""
+Tests for the cached sitemaps (apps/hymns/sitemaps.py).
+"""
+
+import pytest
+from django.urls import reverse
+
+from apps.hymns import page_cache
+
+
+def section_url(section):
+    return reverse("sitemap_section", kwargs={"section": section})
+
+
+@pytest.mark.django_db
+class TestSitemaps:
+    """Tests for the sitemap index and sections."""
+
+    def test_index_lists_every_section_page(self, client, hymns_multiple, settings):
+        """Sections larger than SITEMAP_PAGE_SIZE are split into ?p= pages."""
+        settings.SITEMAP_PAGE_SIZE = 2
+
+        content = client.get(reverse("sitemap_index")).content.decode()
+
+        assert f"{section_url('hinarios')}</loc>" in content
+        assert f"{section_url('hinos')}?p=3</loc>" in content
+        assert f"{section_url('perfis')}</loc>" in content
+
+    def test_hymns_section_has_lastmod(self, client, hymns_multiple):
+        """Each hymn URL carries its updated_at."""
+        hymn = hymns_multiple[0]
+
+        response = client.get(section_url("hinos"))
+
+        content = response.content.decode()
+        assert reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}) in content
+        assert f"<lastmod>{hymn.updated_at.date().isoformat()}" in content
+        assert response["X-Robots-Tag"] == "noindex, noodp, noarchive"
+
+    def test_profiles_section(self, client, user_factory):
+        """Active users' profiles are listed."""
+        user = user_factory()
+
+        content = client.get(section_url("perfis")).content.decode()
+
+        assert reverse("users:profile", kwargs={"username": user.username}) in content
+
+    def test_unknown_section_is_404(self, client, db):
+        assert client.get(section_url("nada")).status_code == 404
+
+    def test_cached_section_costs_no_queries(self, client, hymns_multiple, django_assert_num_queries):
+        """A repeated crawler hit is served from the cache."""
+        client.get(section_url("hinos"))
+
+        with django_assert_num_queries(0):
+            response = client.get(section_url("hinos"))
+
+        assert response.status_code == 200
+
+    def test_section_is_invalidated_when_rows_change(
+        self, client, hymn_book, hymns_multiple, hymn_factory, django_capture_on_commit_callbacks
+    ):
+        """A new hymn shows up on the next hit."""
+        client.get(section_url("hinos"))
+        with django_capture_on_commit_callbacks(execute=True):
+            hymn = hymn_factory(hymn_book, number=6, title="Hino 6", text="Sol")
+
+        content = client.get(section_url("hinos")).content.decode()
+
+        assert reverse("hymns:hymn_detail", kwargs={"pk": hymn.pk}) in content
+
+    def test_login_does_not_invalidate_profiles(self, user_factory, django_capture_on_commit_callbacks):
+        """Saving only last_login keeps the profiles section cached."""
+        user = user_factory()
+        version = page_cache.get_version(page_cache.SITEMAP, "perfis")
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.save(update_fields=["last_login"])
+
+        assert page_cache.get_version(page_cache.SITEMAP, "perfis") == version
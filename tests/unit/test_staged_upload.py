@@ -0,0 +1,190 @@
+"""
+Tests for the StagedUpload store used by the upload flow.
+"""
+
+import zlib
+from datetime import date, timedelta
+
+import pytest
+import yaml
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.hymns.models import Hymn, HymnBook, HymnBookVersion, StagedUpload
+from apps.hymns.tasks import cleanup_expired_staged_uploads
+
+
+@pytest.fixture
+def user(django_user_model):
+    """Create test user."""
+    return django_user_model.objects.create_user(username="uploader", email="uploader@example.com", password="pass123")
+
+
+@pytest.fixture
+def hymnbook_yaml():
+    """Uploaded YAML with two hymns."""
+    content = yaml.dump(
+        {
+            "hymn_book": {
+                "name": "Hinário Novo",
+                "owner": "Dono",
+                "intro_name": "Novo",
+                "hymns": [
+                    {"number": 1, "title": "Primeiro", "text": "Letra um", "received_at": date(1930, 7, 15)},
+                    {"number": 2, "title": "Segundo", "text": "Letra dois", "style": "Marcha"},
+                ],
+            }
+        },
+        allow_unicode=True,
+    )
+    return SimpleUploadedFile("novo.yaml", content.encode("utf-8"))
+
+
+@pytest.mark.django_db
+class TestStagedUploadModel:
+    """Tests for payload storage on StagedUpload."""
+
+    def test_payload_roundtrip(self, user):
+        """Payload is stored compressed and read back as the same structure."""
+        data = {"name": "Teste", "hymns": [{"number": 1, "title": "A", "text": "Texto " * 100}]}
+        staged_upload = StagedUpload(user=user, filename="a.yaml", name="Teste")
+        staged_upload.set_payload(data)
+        staged_upload.save()
+
+        staged_upload = StagedUpload.objects.get(id=staged_upload.id)
+        assert staged_upload.payload_data == data
+        assert len(bytes(staged_upload.payload)) < len("Texto " * 100)
+        assert zlib.decompress(staged_upload.payload)
+
+    def test_payload_serializes_dates(self, user):
+        """Dates parsed by YAML are stored as ISO strings."""
+        staged_upload = StagedUpload(user=user, filename="a.yaml", name="Teste")
+        staged_upload.set_payload({"hymns": [{"number": 1, "received_at": date(1930, 7, 15)}]})
+
+        assert staged_upload.payload_data["hymns"][0]["received_at"] == "1930-07-15"
+
+    def test_hymns_property(self, user):
+        """Hymns used for duplicate detection come from the payload."""
+        staged_upload = StagedUpload(user=user, filename="a.yaml", name="Teste")
+        staged_upload.set_payload({"hymns": [{"number": 1, "title": "A", "text": "B", "style": "Valsa"}]})
+
+        assert staged_upload.hymns == [{"number": 1, "title": "A", "text": "B"}]
+
+    def test_default_expiry(self, user, settings):
+        """New staged uploads expire after STAGED_UPLOAD_TTL_HOURS."""
+        settings.STAGED_UPLOAD_TTL_HOURS = 2
+        staged_upload = StagedUpload.objects.create(user=user, filename="a.yaml", name="Teste", payload=b"")
+
+        assert timezone.now() + timedelta(hours=1) < staged_upload.expires_at <= timezone.now() + timedelta(hours=2)
+
+
+@pytest.mark.django_db
+class TestStagedUploadCleanup:
+    """Tests for expired staged upload cleanup."""
+
+    def test_cleanup_removes_only_expired(self, user):
+        """Only expired uploads are deleted."""
+        expired = StagedUpload.objects.create(
+            user=user, filename="a.yaml", name="Velho", payload=b"", expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        active = StagedUpload.objects.create(user=user, filename="b.yaml", name="Novo", payload=b"")
+
+        assert cleanup_expired_staged_uploads() == 1
+        assert not StagedUpload.objects.filter(id=expired.id).exists()
+        assert StagedUpload.objects.filter(id=active.id).exists()
+
+    def test_cleanup_command(self, user, capsys):
+        """Management command reports removed uploads."""
+        StagedUpload.objects.create(
+            user=user, filename="a.yaml", name="Velho", payload=b"", expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        call_command("cleanup_staged_uploads")
+
+        assert "Removed 1 expired staged uploads" in capsys.readouterr().out
+        assert StagedUpload.objects.count() == 0
+
+
+@pytest.mark.django_db
+class TestUploadFlowWithStagedUpload:
+    """Tests for the upload flow reading from the StagedUpload store."""
+
+    def test_session_only_keeps_id(self, client, user, hymnbook_yaml):
+        """The parsed YAML is not stored in the session."""
+        client.force_login(user)
+
+        client.post(reverse("users:upload"), {"yaml_file": hymnbook_yaml})
+
+        session = client.session
+        assert "upload_data" not in session
+        assert session["staged_upload_id"] == str(StagedUpload.objects.get(user=user).id)
+
+    def test_preview_creates_hymnbook_and_discards_staged_upload(self, client, user, hymnbook_yaml):
+        """Confirming the preview creates the hymnbook from the staged payload."""
+        client.force_login(user)
+        client.post(reverse("users:upload"), {"yaml_file": hymnbook_yaml})
+
+        response = client.get(reverse("users:upload_preview"))
+        assert response.status_code == 200
+        assert b"Primeiro" in response.content
+
+        response = client.post(reverse("users:upload_preview"))
+
+        hymnbook = HymnBook.objects.get(name="Hinário Novo")
+        assert response.status_code == 302
+        assert response.url == reverse("hymns:hymnbook_detail", kwargs={"slug": hymnbook.slug})
+        assert hymnbook.owner_name == "Dono"
+        assert hymnbook.hymns.count() == 2
+        assert Hymn.objects.get(hymn_book=hymnbook, number=1).received_at == date(1930, 7, 15)
+        assert StagedUpload.objects.count() == 0
+        assert "staged_upload_id" not in client.session
+
+    def test_expired_upload_redirects_to_upload(self, client, user, hymnbook_yaml):
+        """An expired staged upload can no longer be previewed."""
+        client.force_login(user)
+        client.post(reverse("users:upload"), {"yaml_file": hymnbook_yaml})
+        StagedUpload.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        response = client.get(reverse("users:upload_preview"))
+
+        assert response.status_code == 302
+        assert response.url == reverse("users:upload")
+
+    def test_confirm_creates_version_from_payload(
+        self, client, user, hymnbook_yaml, django_capture_on_commit_callbacks
+    ):
+        """Adding as version stores a YAML rebuilt from the staged payload."""
+        existing = HymnBook.objects.create(name="Hinário Novo", owner_name="Dono")
+        client.force_login(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("users:upload"), {"yaml_file": hymnbook_yaml})
+
+        response = client.post(
+            reverse("users:upload_disambiguate"),
+            {"choice": "add_version", "selected_hymnbook": str(existing.id), "version_name": "Edição 2020"},
+        )
+        assert response.url == reverse("users:upload_confirm")
+
+        response = client.post(reverse("users:upload_confirm"))
+
+        assert response.status_code == 302
+        version = HymnBookVersion.objects.get(hymn_book=existing)
+        assert version.version_name == "Edição 2020"
+        with version.yaml_file.open("rb") as f:
+            data = yaml.safe_load(f)
+        assert data["hymn_book"]["hymns"][1]["title"] == "Segundo"
+        assert StagedUpload.objects.count() == 0
+
+    def test_cancel_discards_staged_upload(self, client, user, hymnbook_yaml, django_capture_on_commit_callbacks):
+        """Cancelling in disambiguation deletes the staged upload."""
+        HymnBook.objects.create(name="Hinário Novo", owner_name="Dono")
+        client.force_login(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("users:upload"), {"yaml_file": hymnbook_yaml})
+
+        response = client.post(reverse("users:upload_disambiguate"), {"choice": "cancel"})
+
+        assert response.url == reverse("users:upload")
+        assert StagedUpload.objects.count() == 0
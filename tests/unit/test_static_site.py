@@ -0,0 +1,109 @@
+"""
+Tests for the static export of the public catalogue (apps/hymns/static_site.py).
+"""
+
+import gzip
+
+import pytest
+from django.core.management import call_command
+
+from apps.hymns.models import Comment
+from apps.hymns.static_site import build_static_site, page_file
+
+
+@pytest.fixture
+def hymns(hymn_book, hymn_factory):
+    return [hymn_factory(hymn_book, number=number, title=f"Hino {number}", text="Lua branca") for number in range(1, 4)]
+
+
+@pytest.mark.django_db
+class TestBuildStaticSite:
+    """Tests for build_static_site."""
+
+    def test_renders_every_public_page(self, hymn_book, hymns, tmp_path):
+        """Home, list, hymn book and hymn pages are written with a gzip copy."""
+        result = build_static_site(tmp_path)
+
+        assert result == {"rendered": 6, "unchanged": 0, "removed": 0, "failed": 0}
+        assert (tmp_path / "index.html").exists()
+        assert (tmp_path / "hinarios" / "index.html").exists()
+        book_page = page_file(tmp_path, f"/hinarios/{hymn_book.slug}/")
+        assert "Hino 2" in book_page.read_text()
+        assert gzip.decompress(book_page.with_name("index.html.gz").read_bytes()) == book_page.read_bytes()
+
+    def test_second_build_renders_nothing(self, hymns, tmp_path):
+        """Without changes every page is reused from the previous build."""
+        build_static_site(tmp_path)
+
+        assert build_static_site(tmp_path)["rendered"] == 0
+
+    def test_only_changed_pages_are_rendered(self, hymns, tmp_path, django_capture_on_commit_callbacks):
+        """Editing a hymn re-renders its page and its hymn book's page only."""
+        build_static_site(tmp_path)
+        hymn = hymns[0]
+        hymn.title = "Lua Branca"
+        with django_capture_on_commit_callbacks(execute=True):
+            hymn.save()
+
+        result = build_static_site(tmp_path)
+
+        assert result["rendered"] == 2
+        assert "Lua Branca" in page_file(tmp_path, f"/hinos/{hymn.pk}/").read_text()
+
+    def test_new_comment_rerenders_hymn_page(self, hymns, tmp_path, user_factory, django_capture_on_commit_callbacks):
+        """Visible comments are part of the hymn page's source rows."""
+        build_static_site(tmp_path)
+        hymn = hymns[1]
+        with django_capture_on_commit_callbacks(execute=True):
+            Comment.objects.create(hymn=hymn, user=user_factory(), text="Que hino bonito")
+
+        build_static_site(tmp_path)
+
+        assert "Que hino bonito" in page_file(tmp_path, f"/hinos/{hymn.pk}/").read_text()
+
+    def test_flagged_comment_rerenders_hymn_page(
+        self, hymns, tmp_path, user_factory, django_capture_on_commit_callbacks
+    ):
+        """Hiding an older comment changes the page even though the newest visible comment is the same."""
+        hymn = hymns[1]
+        with django_capture_on_commit_callbacks(execute=True):
+            older = Comment.objects.create(hymn=hymn, user=user_factory("a@example.com"), text="Comentario abusivo")
+            Comment.objects.create(hymn=hymn, user=user_factory("b@example.com"), text="Comentario recente")
+        build_static_site(tmp_path)
+        assert "Comentario abusivo" in page_file(tmp_path, f"/hinos/{hymn.pk}/").read_text()
+
+        older.is_flagged = True
+        with django_capture_on_commit_callbacks(execute=True):
+            older.save(update_fields=["is_flagged"])
+
+        result = build_static_site(tmp_path)
+
+        assert result["rendered"] == 1
+        content = page_file(tmp_path, f"/hinos/{hymn.pk}/").read_text()
+        assert "Comentario abusivo" not in content
+        assert "Comentario recente" in content
+
+    def test_deleted_pages_are_removed(self, hymns, tmp_path):
+        """Pages of deleted hymns disappear from the output."""
+        build_static_site(tmp_path)
+        hymn = hymns[2]
+        file = page_file(tmp_path, f"/hinos/{hymn.pk}/")
+        hymn.delete()
+
+        result = build_static_site(tmp_path)
+
+        assert result["removed"] == 1
+        assert not file.exists()
+        assert not file.parent.exists()
+
+    def test_full_rebuild_ignores_manifest(self, hymns, tmp_path):
+        """--full renders every page again."""
+        build_static_site(tmp_path)
+
+        assert build_static_site(tmp_path, full=True)["rendered"] == 6
+
+    def test_command(self, hymns, tmp_path, capsys):
+        """The management command reports what it rendered."""
+        call_command("build_static_site", "--output", str(tmp_path), "--workers", "1")
+
+        assert "Rendered 6 pages" in capsys.readouterr().out
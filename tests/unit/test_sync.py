@@ -0,0 +1,123 @@
+"""
+Tests for the catalog sync feed (apps/hymns/sync.py and /api/v1/sync/).
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.pagination import encode_cursor
+from apps.hymns.models import Hymn, Tombstone
+from apps.hymns.tasks import prune_tombstones
+
+
+@pytest.fixture(autouse=True)
+def no_lag(settings):
+    settings.SYNC_LAG_SECONDS = 0
+
+
+@pytest.fixture
+def hymns(hymn_book, hymn_factory):
+    return [hymn_factory(hymn_book, number=number, title=f"Hino {number}", text="Lua branca") for number in range(1, 4)]
+
+
+def sync(client, **params):
+    response = client.get(reverse("hymns:api_sync"), params)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db
+class TestSyncFeed:
+    """Tests for the delta sync endpoint."""
+
+    def test_initial_sync_returns_whole_catalog(self, client, hymns):
+        """Without a cursor every hymn book and hymn comes back as an upsert."""
+        data = sync(client)
+
+        assert {(change["type"], change["op"]) for change in data["changes"]} == {
+            ("hymn_book", "upsert"),
+            ("hymn", "upsert"),
+        }
+        assert len(data["changes"]) == 4
+        assert data["has_more"] is False
+        titles = {change["data"]["title"] for change in data["changes"] if change["type"] == "hymn"}
+        assert titles == {"Hino 1", "Hino 2", "Hino 3"}
+        # hymns_total changes without touching updated_at, so it is not part of the feed
+        book = next(change["data"] for change in data["changes"] if change["type"] == "hymn_book")
+        assert "hymns_total" not in book
+
+    def test_incremental_sync_returns_only_changes(self, client, hymns):
+        """After a sync, the next cursor only returns what changed since."""
+        cursor = sync(client)["cursor"]
+        hymn = hymns[1]
+        hymn.title = "Hino dois"
+        hymn.save()
+
+        data = sync(client, since=cursor)
+
+        assert [(change["type"], change["id"]) for change in data["changes"]] == [("hymn", str(hymn.id))]
+        assert data["changes"][0]["data"]["title"] == "Hino dois"
+        assert sync(client, since=data["cursor"])["changes"] == []
+
+    def test_deletes_are_reported_as_tombstones(self, client, hymns):
+        """Deleted hymns appear as delete operations."""
+        cursor = sync(client)["cursor"]
+        hymn = hymns[2]
+        hymn_id = str(hymn.id)
+        hymn.delete()
+
+        changes = sync(client, since=cursor)["changes"]
+
+        assert {"type": "hymn", "op": "delete", "id": hymn_id} in [
+            {key: change[key] for key in ("type", "op", "id")} for change in changes
+        ]
+
+    def test_pages_with_limit(self, client, hymns):
+        """Following the cursor while has_more walks every change exactly once."""
+        seen = []
+        data = sync(client, limit=1)
+        seen += data["changes"]
+        while data["has_more"]:
+            data = sync(client, since=data["cursor"], limit=1)
+            seen += data["changes"]
+
+        assert len(seen) == 4
+        assert len({change["id"] for change in seen}) == 4
+
+    def test_recent_changes_wait_for_lag(self, client, hymns, settings):
+        """Changes newer than SYNC_LAG_SECONDS are held back until the next sync."""
+        settings.SYNC_LAG_SECONDS = 60
+
+        assert sync(client)["changes"] == []
+
+    def test_invalid_cursor_is_bad_request(self, client, db):
+        """A malformed cursor is rejected."""
+        response = client.get(reverse("hymns:api_sync"), {"since": "lixo"})
+
+        assert response.status_code == 400
+
+    def test_expired_cursor_requires_resync(self, client, db, settings):
+        """Cursors older than the tombstone retention answer 410."""
+        issued_at = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS + 1)
+        cursor = encode_cursor([issued_at] + [None] * 6)
+
+        response = client.get(reverse("hymns:api_sync"), {"since": cursor})
+
+        assert response.status_code == 410
+
+
+@pytest.mark.django_db
+def test_prune_tombstones_removes_expired(hymn_book, hymns, settings):
+    """Only tombstones older than the retention period are pruned."""
+    Hymn.objects.filter(hymn_book=hymn_book, number__in=[1, 2]).delete()
+    old = Tombstone.objects.first()
+    Tombstone.objects.filter(pk=old.pk).update(
+        deleted_at=timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_TTL_DAYS + 1)
+    )
+
+    assert prune_tombstones() == 1
+    assert not Tombstone.objects.filter(pk=old.pk).exists()
+    assert Tombstone.objects.count() == 1
@@ -18,6 +18,7 @@ from apps.search.typesense_client import (
     delete_hymn,
     get_typesense_client,
     index_hymn,
+    index_hymns,
     reindex_all_hymns,
     search_hymns,
 )
@@ -544,6 +545,72 @@ class TestSearchHymns:
         assert len(results["hits"]) == 2
 
 
+class TestIndexHymns:
+    """Testa a função index_hymns() (import em lote)."""
+
+    def make_hymn(self, number):
+        hymn = Mock()
+        hymn.id = uuid4()
+        hymn.hymn_book.id = uuid4()
+        hymn.hymn_book.name = "Hinário Teste"
+        hymn.hymn_book.slug = "hinario-teste"
+        hymn.hymn_book.owner_name = "João Silva"
+        hymn.number = number
+        hymn.title = f"Hino {number}"
+        hymn.text = "Letra"
+        hymn.style = ""
+        hymn.received_at = None
+        return hymn
+
+    @patch("apps.search.typesense_client.get_typesense_client")
+    def test_imports_all_documents_in_one_request(self, mock_get_client):
+        """Testa que todos os hinos vão em um único import com upsert."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        import_call = mock_client.collections["hymns"].documents.import_
+        import_call.return_value = [{"success": True}] * 3
+
+        count = index_hymns([self.make_hymn(n) for n in range(1, 4)])
+
+        import_call.assert_called_once()
+        docs, params = import_call.call_args[0]
+        assert [doc["number"] for doc in docs] == [1, 2, 3]
+        assert params == {"action": "upsert"}
+        assert count == 3
+
+    @patch("apps.search.typesense_client.get_typesense_client")
+    def test_splits_in_batches(self, mock_get_client):
+        """Testa que respeita batch_size."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        import_call = mock_client.collections["hymns"].documents.import_
+        import_call.side_effect = lambda docs, params: [{"success": True}] * len(docs)
+
+        count = index_hymns([self.make_hymn(n) for n in range(1, 6)], batch_size=2)
+
+        assert import_call.call_count == 3
+        assert count == 5
+
+    @patch("apps.search.typesense_client.get_typesense_client")
+    def test_counts_only_successes(self, mock_get_client):
+        """Testa que documentos rejeitados não são contados."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        import_call = mock_client.collections["hymns"].documents.import_
+        import_call.return_value = [{"success": True}, {"success": False, "error": "bad"}]
+
+        assert index_hymns([self.make_hymn(1), self.make_hymn(2)]) == 1
+
+    @patch("apps.search.typesense_client.get_typesense_client")
+    def test_empty_iterable_makes_no_request(self, mock_get_client):
+        """Testa que não chama a API sem hinos."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+
+        assert index_hymns([]) == 0
+        mock_client.collections["hymns"].documents.import_.assert_not_called()
+
+
 class TestReindexAllHymns:
     """Testa a função reindex_all_hymns()."""
 
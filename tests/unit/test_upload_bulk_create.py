@@ -0,0 +1,106 @@
+"""
+Tests for bulk hymn creation and deferred indexing when confirming an upload.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.hymns.models import HymnBook, StagedUpload
+
+
+@pytest.fixture
+def user(django_user_model):
+    """Create test user."""
+    return django_user_model.objects.create_user(username="uploader", email="uploader@example.com", password="pass123")
+
+
+def stage_upload(client, user, name, hymns_count):
+    """Create a finished StagedUpload with N hymns and point the session at it."""
+    staged_upload = StagedUpload(
+        user=user, filename="a.yaml", name=name, hymns_count=hymns_count, status=StagedUpload.STATUS_DONE
+    )
+    staged_upload.set_payload(
+        {
+            "name": name,
+            "owner": "Dono",
+            "hymns": [{"number": n, "title": f"Hino {n}", "text": f"Letra {n}"} for n in range(1, hymns_count + 1)],
+        }
+    )
+    staged_upload.save()
+
+    client.force_login(user)
+    session = client.session
+    session["staged_upload_id"] = str(staged_upload.id)
+    session.save()
+
+
+@pytest.mark.django_db
+class TestUploadPreviewBulkCreate:
+    """Tests for the confirm step of upload_preview_view."""
+
+    def count_confirm_queries(self, client, user, name, hymns_count):
+        stage_upload(client, user, name, hymns_count)
+        with patch("apps.search.tasks.index_hymns_task.delay"):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.post(reverse("users:upload_preview"))
+        assert response.status_code == 302
+        assert HymnBook.objects.get(name=name).hymns.count() == hymns_count
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_hymns(self, client, user):
+        """Creating 3 or 50 hymns costs the same number of queries (one INSERT per batch)."""
+        # SQLite caps parameters per statement, so stay within a single batch on the test DB
+        small = self.count_confirm_queries(client, user, "Pequeno", 3)
+        large = self.count_confirm_queries(client, user, "Grande", 50)
+
+        assert small == large
+
+    def test_indexing_is_scheduled_after_commit(self, client, user, django_capture_on_commit_callbacks):
+        """A single bulk indexing task is enqueued once the transaction commits."""
+        stage_upload(client, user, "Hinário", 4)
+
+        with patch("apps.search.tasks.index_hymns_task.delay") as mock_delay:
+            with django_capture_on_commit_callbacks(execute=False) as callbacks:
+                client.post(reverse("users:upload_preview"))
+
+            mock_delay.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+
+        hymnbook = HymnBook.objects.get(name="Hinário")
+        mock_delay.assert_called_once()
+        assert sorted(mock_delay.call_args[0][0]) == sorted(
+            str(pk) for pk in hymnbook.hymns.values_list("id", flat=True)
+        )
+
+    def test_broker_failure_does_not_break_upload(self, client, user, django_capture_on_commit_callbacks):
+        """If enqueueing the indexing task fails, the hymnbook is still created."""
+        stage_upload(client, user, "Hinário", 2)
+
+        with patch("apps.search.tasks.index_hymns_task.delay", side_effect=ConnectionError("broker down")):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = client.post(reverse("users:upload_preview"))
+
+        assert response.status_code == 302
+        assert HymnBook.objects.get(name="Hinário").hymns.count() == 2
+
+
+@pytest.mark.django_db
+class TestIndexHymnsTask:
+    """Tests for the index_hymns_task Celery task."""
+
+    def test_indexes_requested_hymns(self, hymns_multiple):
+        """The task loads the hymns with their hymnbook and bulk-indexes them."""
+        from apps.search.tasks import index_hymns_task
+
+        with patch("apps.search.tasks.index_hymns", return_value=2) as mock_index:
+            result = index_hymns_task.delay([str(hymns_multiple[0].id), str(hymns_multiple[1].id)])
+
+        assert result.get() == 2
+        hymns = list(mock_index.call_args[0][0])
+        assert {h.number for h in hymns} == {1, 2}
@@ -0,0 +1,182 @@
+"""
+Tests for background duplicate detection during hymnbook upload.
+"""
+
+import pytest
+import yaml
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from apps.hymns.models import Hymn, HymnBook, StagedUpload
+from apps.hymns.tasks import detect_upload_duplicates
+
+
+@pytest.fixture
+def user(django_user_model):
+    """Create test user."""
+    return django_user_model.objects.create_user(username="uploader", email="uploader@example.com", password="pass123")
+
+
+def make_yaml_upload(name, hymns=None):
+    """Build an uploaded YAML file for a hymnbook."""
+    content = yaml.dump({"hymn_book": {"name": name, "owner": "Owner", "hymns": hymns or []}}, allow_unicode=True)
+    return SimpleUploadedFile("hinario.yaml", content.encode("utf-8"))
+
+
+@pytest.mark.django_db
+class TestUploadDuplicateDetection:
+    """Tests for the staged upload + background duplicate detection flow."""
+
+    def test_upload_creates_staged_upload_and_redirects_to_status(self, client, user):
+        """Upload stages the hymnbook and hands off to the status page."""
+        client.force_login(user)
+
+        response = client.post(reverse("users:upload"), {"yaml_file": make_yaml_upload("Hinário Novo")})
+
+        assert response.status_code == 302
+        assert response.url == reverse("users:upload_status")
+
+        staged_upload = StagedUpload.objects.get(user=user)
+        assert staged_upload.name == "Hinário Novo"
+        assert client.session["staged_upload_id"] == str(staged_upload.id)
+
+    def test_eager_task_finishes_before_redirect(self, client, user, django_capture_on_commit_callbacks):
+        """In eager mode the detection runs on commit, before the browser lands on the status page."""
+        client.force_login(user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("users:upload"), {"yaml_file": make_yaml_upload("Hinário Novo")})
+
+        staged_upload = StagedUpload.objects.get(user=user)
+        assert staged_upload.status == StagedUpload.STATUS_DONE
+        assert staged_upload.progress == 100
+
+    def test_status_redirects_to_preview_without_duplicates(self, client, user, django_capture_on_commit_callbacks):
+        """No duplicates found: status page forwards to preview."""
+        client.force_login(user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("users:upload"), {"yaml_file": make_yaml_upload("Hinário Novo")})
+        response = client.get(reverse("users:upload_status"))
+
+        assert response.status_code == 302
+        assert response.url == reverse("users:upload_preview")
+
+    def test_status_redirects_to_disambiguate_on_exact_match(self, client, user, django_capture_on_commit_callbacks):
+        """Exact match: status page forwards to disambiguation."""
+        hymnbook = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        client.force_login(user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("users:upload"), {"yaml_file": make_yaml_upload("O Cruzeiro")})
+        response = client.get(reverse("users:upload_status"))
+
+        assert response.status_code == 302
+        assert response.url == reverse("users:upload_disambiguate")
+        assert StagedUpload.objects.get(user=user).duplicates["exact_match"] == str(hymnbook.id)
+
+    def test_detection_waits_for_commit(self, client, user, django_capture_on_commit_callbacks):
+        """The task is only enqueued once the staged upload is committed."""
+        client.force_login(user)
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            client.post(reverse("users:upload"), {"yaml_file": make_yaml_upload("Hinário Novo")})
+
+        assert len(callbacks) == 1
+        assert StagedUpload.objects.get(user=user).status == StagedUpload.STATUS_PENDING
+
+    def test_status_page_renders_while_pending(self, client, user):
+        """Pending detection renders the polling page."""
+        staged_upload = StagedUpload.objects.create(
+            user=user, filename="a.yaml", name="Pendente", hymns_count=3, payload=b""
+        )
+        client.force_login(user)
+        session = client.session
+        session["staged_upload_id"] = str(staged_upload.id)
+        session.save()
+
+        response = client.get(reverse("users:upload_status"))
+
+        assert response.status_code == 200
+        assert b"Analisando" in response.content
+        assert reverse("users:upload_progress").encode() in response.content
+
+    def test_status_without_session_redirects_to_upload(self, client, user):
+        """Status page without a staged upload goes back to upload."""
+        client.force_login(user)
+
+        response = client.get(reverse("users:upload_status"))
+
+        assert response.status_code == 302
+        assert response.url == reverse("users:upload")
+
+    def test_progress_returns_classification(self, client, user, django_capture_on_commit_callbacks):
+        """Progress endpoint reports status and final classification."""
+        hymnbook = HymnBook.objects.create(name="O Cruzeiro", owner_name="Mestre Irineu")
+        client.force_login(user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            client.post(reverse("users:upload"), {"yaml_file": make_yaml_upload("O Cruzeiro")})
+        response = client.get(reverse("users:upload_progress"))
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "done"
+        assert data["progress"] == 100
+        assert data["duplicates"]["exact_match"] == str(hymnbook.id)
+        assert data["duplicates"]["high_confidence"] == []
+
+    def test_progress_hides_other_users_uploads(self, client, user, django_user_model):
+        """A staged upload is only visible to its owner."""
+        other = django_user_model.objects.create_user(username="other", email="other@example.com", password="pass")
+        staged_upload = StagedUpload.objects.create(user=other, filename="a.yaml", name="Alheio", payload=b"")
+        client.force_login(user)
+        session = client.session
+        session["staged_upload_id"] = str(staged_upload.id)
+        session.save()
+
+        response = client.get(reverse("users:upload_progress"))
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db
+class TestDetectUploadDuplicatesTask:
+    """Tests for the detect_upload_duplicates Celery task."""
+
+    def test_high_confidence_is_serialized(self, user):
+        """Similar name + content ends up as high confidence, with JSON-friendly ids."""
+        hymnbook = HymnBook.objects.create(name="O Cruzeiro Universal", owner_name="Mestre Irineu")
+        Hymn.objects.create(hymn_book=hymnbook, number=1, title="Lua Branca", text="Lua branca da luz serena")
+        staged_upload = StagedUpload(user=user, filename="a.yaml", name="O Cruzeiro Universal.")
+        staged_upload.set_payload({"hymns": [{"number": 1, "title": "Lua Branca", "text": "Lua branca da luz serena"}]})
+        staged_upload.save()
+
+        detect_upload_duplicates.delay(str(staged_upload.id))
+
+        staged_upload.refresh_from_db()
+        assert staged_upload.status == StagedUpload.STATUS_DONE
+        assert staged_upload.duplicates["exact_match"] is None
+        assert staged_upload.duplicates["high_confidence"][0][0] == str(hymnbook.id)
+
+    def test_missing_upload_is_ignored(self, user):
+        """An upload cancelled or expired before the task runs is skipped."""
+        staged_upload = StagedUpload.objects.create(user=user, filename="a.yaml", name="Cancelado", payload=b"")
+        staged_upload_id = str(staged_upload.id)
+        staged_upload.delete()
+
+        assert detect_upload_duplicates.delay(staged_upload_id).get() is None
+
+    def test_failure_is_recorded(self, user):
+        """Errors during detection mark the upload as failed instead of raising."""
+        hymnbook = HymnBook.objects.create(name="Hinário Teste", owner_name="Owner")
+        Hymn.objects.create(hymn_book=hymnbook, number=1, title="T", text="T")
+        staged_upload = StagedUpload(user=user, filename="a.yaml", name="Hinário Teste 2")
+        staged_upload.set_payload({"hymns": [{"number": None, "title": "A"}, {"number": 2, "title": "B"}]})
+        staged_upload.save()
+
+        detect_upload_duplicates.delay(str(staged_upload.id))
+
+        staged_upload.refresh_from_db()
+        assert staged_upload.status == StagedUpload.STATUS_FAILED
+        assert staged_upload.error
@@ -130,3 +130,45 @@ class TestUploadViewsSimple:
 
         # Should show error
         assert response.status_code == 200
+
+    def test_upload_view_rejects_duplicate_hymn_numbers(self, client, user):
+        """Test upload validates hymns before staging."""
+        client.force_login(user)
+
+        yaml_content = yaml.dump(
+            {
+                "name": "Duplicado",
+                "hymns": [{"number": 1, "title": "A", "text": "A"}, {"number": 1, "title": "B", "text": "B"}],
+            }
+        )
+        yaml_file = SimpleUploadedFile("dup.yaml", yaml_content.encode("utf-8"))
+
+        response = client.post(reverse("users:upload"), {"yaml_file": yaml_file})
+
+        assert response.status_code == 200
+        assert b"Duplicate hymn numbers" in response.content
+
+    @pytest.mark.parametrize("hymns", [[1, 2], "abc"])
+    def test_upload_view_rejects_malformed_hymns(self, client, user, hymns):
+        """Hymns that are not a list of mappings are a form error, not a server error."""
+        client.force_login(user)
+
+        yaml_content = yaml.dump({"hymn_book": {"name": "Malformado", "owner": "Dono", "hymns": hymns}})
+        yaml_file = SimpleUploadedFile("bad.yaml", yaml_content.encode("utf-8"))
+
+        response = client.post(reverse("users:upload"), {"yaml_file": yaml_file})
+
+        assert response.status_code == 200
+        assert b"must be" in response.content
+
+    def test_upload_view_rejects_invalid_date(self, client, user):
+        """A date the YAML loader cannot build is a form error, not a server error."""
+        client.force_login(user)
+
+        content = b"hymn_book:\n  name: Data Ruim\n  owner: Dono\n  hymns:\n    - number: 1\n      title: T\n      text: X\n      received_at: 2020-13-45\n"
+        yaml_file = SimpleUploadedFile("bad-date.yaml", content)
+
+        response = client.post(reverse("users:upload"), {"yaml_file": yaml_file})
+
+        assert response.status_code == 200
+        assert b"Erro ao processar YAML" in response.content